@@ -1,14 +1,53 @@
 import streamlit as st
 import dotenv
+from procurement.db import connect, init_schema
+from procurement.search import INDEXES, search
+from procurement.tracing import end_page, span, start_page
 dotenv.load_dotenv()
 
+start_page("Home")
+
 # Set page configuration
 st.set_page_config(
     page_title="Meridian Manufacturing AutoMatic™️Procurement System",
     layout="wide"
 )
 
+# Where each kind of search result can be worked on
+RESULT_PAGES = {
+    "requisition": "🖨️ Requisition Releases",
+    "vendor": "⚒️ Vendor Management",
+    "match": "🧑🏻‍🏫 Vendor Assignment",
+}
+
+
+# Initialize database connection
+@st.cache_resource
+def init_db_connection():
+    return init_schema(connect())
+
 
 # Main page content
 st.title("Meridian Manufacturing AutoMatic™️ Procurement System")
 
+with span("connect"):
+    conn = init_db_connection()
+
+# Global search across requisitions, vendors and vendor match reasons
+col1, col2 = st.columns([3, 1])
+with col1:
+    query = st.text_input("🔍 Search", placeholder="e.g. nitrile gloves, hydraulic fittings").strip()
+with col2:
+    kinds = st.multiselect("In", list(INDEXES), default=list(INDEXES), format_func=lambda k: f"{k.title()}s")
+
+if query and kinds:
+    with span("search"):
+        results = search(conn, query, kinds, limit=25)
+    if results.empty:
+        st.info("Nothing matches that search.")
+    with span("render results"):
+        for result in results.itertuples():
+            st.markdown(f"**{result.title}** · {result.kind} #{result.id} · _{RESULT_PAGES[result.kind]}_  \n"
+                        f"{result.snippet}")
+
+end_page()
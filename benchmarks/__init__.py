@@ -0,0 +1 @@
+"""Performance benchmarks. Run modules from the repository root with ``python -m``."""
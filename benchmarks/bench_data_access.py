@@ -0,0 +1,245 @@
+"""Times every page loader and writer against a (synthetic) database.
+
+    python -m benchmarks.synthetic_data --db /tmp/bench.db
+    python -m benchmarks.bench_data_access --db /tmp/bench.db --output bench.json
+    python -m benchmarks.bench_data_access --db /tmp/bench.db --compare bench.json
+
+Writers run against a temporary copy unless ``--in-place`` is given, so the
+source database stays identical between runs. Results are written as JSON
+(ops/sec, mean, p50, p95 and max latency per function).
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from procurement import analytics, approvals, assignments, bids, ranking, requisitions, search, spend, tiers, vendors
+from procurement.db import connect, copy_database
+
+
+def _ids(conn, table):
+    return np.array([row[0] for row in conn.execute(f"SELECT id FROM {table}")])
+
+
+def build_operations(conn, rng):
+    # Each entry: (name, kind, prepare) where prepare() returns the zero-argument call to time
+    requisition_ids = _ids(conn, "requisitions")
+    vendor_ids = _ids(conn, "vendors")
+    match_ids = _ids(conn, "requisition_vendors")
+    bid_rows = conn.execute("SELECT id, requisition_id, vendor_id FROM vendor_bids").fetchall()
+    bid_requisitions = np.array(sorted({row[1] for row in bid_rows}))
+    tier_names = tiers.load_approval_tiers(conn)["name"].tolist()
+
+    def pick(values):
+        return int(values[rng.integers(0, len(values))])
+
+    def pick_bid():
+        return bid_rows[rng.integers(0, len(bid_rows))]
+
+    loaders = [
+        ("requisitions.load_requisitions", lambda: lambda: requisitions.load_requisitions(conn)),
+        ("requisitions.get_requisition_details",
+         lambda: (lambda rid: lambda: requisitions.get_requisition_details(conn, rid))(pick(requisition_ids))),
+        ("vendors.get_vendors", lambda: lambda: vendors.get_vendors(conn)),
+        ("vendors.load_vendors", lambda: lambda: vendors.load_vendors(conn)),
+        ("vendors.load_vendor_page", lambda: lambda: vendors.load_vendor_page(conn, 2, 50)),
+        ("vendors.load_vendor_page (search)", lambda: lambda: vendors.load_vendor_page(conn, 1, 50, "supplies")),
+        ("search.search", lambda: lambda: search.search(conn, "industrial supp")),
+        ("assignments.load_assignment_requisitions", lambda: lambda: assignments.load_assignment_requisitions(conn)),
+        ("assignments.load_requisition_vendors",
+         lambda: (lambda rid: lambda: assignments.load_requisition_vendors(conn, rid))(pick(requisition_ids))),
+        ("assignments.load_vendor_assignments", lambda: lambda: assignments.load_vendor_assignments(conn)),
+        ("bids.load_vendor_requisitions",
+         lambda: (lambda vid: lambda: bids.load_vendor_requisitions(conn, vid))(pick(vendor_ids))),
+        ("bids.load_vendor_requisition_page",
+         lambda: (lambda vid: lambda: bids.load_vendor_requisition_page(conn, vid, 1, 10))(pick(vendor_ids))),
+        ("bids.load_vendor_bids",
+         lambda: (lambda vid: lambda: bids.load_vendor_bids(conn, vid))(pick(vendor_ids))),
+        ("bids.check_existing_bid",
+         lambda: (lambda b: lambda: bids.check_existing_bid(conn, b[2], b[1]))(pick_bid())),
+        ("approvals.load_requisitions_with_bids", lambda: lambda: approvals.load_requisitions_with_bids(conn)),
+        ("approvals.load_bids_for_requisition",
+         lambda: (lambda rid: lambda: approvals.load_bids_for_requisition(conn, rid))(pick(bid_requisitions))),
+        ("approvals.get_bid_details",
+         lambda: (lambda b: lambda: approvals.get_bid_details(conn, b[0]))(pick_bid())),
+        ("approvals.load_approval_summary", lambda: lambda: approvals.load_approval_summary(conn)),
+        ("approvals.load_recent_approvals", lambda: lambda: approvals.load_recent_approvals(conn)),
+        ("approvals.load_pending_by_tier", lambda: lambda: approvals.load_pending_by_tier(conn)),
+        ("ranking.load_bids_for_ranking",
+         lambda: (lambda rid: lambda: ranking.load_bids_for_ranking(conn, [rid]))(pick(bid_requisitions))),
+        ("tiers.load_approval_tiers", lambda: lambda: tiers.load_approval_tiers(conn)),
+        ("spend.load_spend", lambda: lambda: spend.load_spend(conn, by=("month", "tier"))),
+        ("spend.load_spend (vendors)", lambda: lambda: spend.load_spend(conn, by=("vendor_id",))),
+        ("analytics.load_vendor_win_rates", lambda: lambda: analytics.load_vendor_win_rates(conn)),
+    ]
+
+    def new_vendor():
+        n = int(rng.integers(0, 1_000_000_000))
+        return lambda: vendors.add_vendor(conn, f"Bench Vendor {n}", f"bench{n}@example.com", "Benchmark vendor")
+
+    def delete_vendor():
+        vendors.add_vendor(conn, "Bench Vendor (delete)", "delete@example.com", "")
+        vendor_id = conn.execute("SELECT MAX(id) FROM vendors").fetchone()[0]
+        return lambda: vendors.delete_vendor(conn, vendor_id)
+
+    def matches():
+        rid = pick(requisition_ids)
+        chosen = [{"vendor_id": pick(vendor_ids), "match_score": 0.8, "match_reason": "benchmark"} for _ in range(3)]
+        return lambda: assignments.save_vendor_matches(conn, rid, chosen)
+
+    def new_bid():
+        return (lambda rid, vid: lambda: bids.save_bid(conn, vid, rid, 1234.5, "EUR", "", 10, "days"))(
+            pick(requisition_ids), pick(vendor_ids))
+
+    def update_bid():
+        b = pick_bid()
+        return lambda: bids.save_bid(conn, b[2], b[1], float(rng.uniform(10, 10_000)), "USD", "", 2, "weeks")
+
+    def decide(func):
+        def prepare():
+            b = pick_bid()
+            return lambda: func(conn, b[0], b[1], "Benchmark", "", tier_names[0])
+        return prepare
+
+    writers = [
+        ("requisitions.insert_requisition",
+         lambda: lambda: requisitions.insert_requisition(conn, "Bench item", "Benchmark requisition", 5, "pcs",
+                                                         "2025-07-01", False)),
+        ("requisitions.update_requisition",
+         lambda: (lambda rid: lambda: requisitions.update_requisition(conn, rid, "Bench item", "Updated", 7, "box",
+                                                                      "2025-07-02"))(pick(requisition_ids))),
+        ("vendors.add_vendor", new_vendor),
+        ("vendors.update_vendor",
+         lambda: (lambda vid: lambda: vendors.update_vendor(conn, vid, f"Vendor {vid}", f"v{vid}@example.com",
+                                                            "Updated"))(pick(vendor_ids))),
+        ("vendors.delete_vendor", delete_vendor),
+        ("assignments.save_vendor_matches", matches),
+        ("assignments.update_vendor_match_status",
+         lambda: (lambda mid: lambda: assignments.update_vendor_match_status(conn, mid, "approved"))(pick(match_ids))),
+        ("bids.save_bid (insert)", new_bid),
+        ("bids.save_bid (update)", update_bid),
+        ("approvals.approve_bid", decide(approvals.approve_bid)),
+        ("approvals.reject_bid", decide(approvals.reject_bid)),
+    ]
+    return [(name, "loader", prepare) for name, prepare in loaders] + \
+           [(name, "writer", prepare) for name, prepare in writers]
+
+
+def run(conn, operations, loader_iterations, writer_iterations, log=print):
+    results = {}
+    for name, kind, prepare in operations:
+        iterations = loader_iterations if kind == "loader" else writer_iterations
+        timings = []
+        for _ in range(iterations):
+            call = prepare()
+            start = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - start)
+        timings = np.array(timings)
+        results[name] = {
+            "kind": kind,
+            "calls": int(iterations),
+            "ops_per_sec": float(iterations / timings.sum()),
+            "mean_ms": float(timings.mean() * 1000),
+            "p50_ms": float(np.percentile(timings, 50) * 1000),
+            "p95_ms": float(np.percentile(timings, 95) * 1000),
+            "max_ms": float(timings.max() * 1000),
+        }
+        log(f"{name:<45} {kind:<7} {results[name]['ops_per_sec']:>10.1f} ops/s   "
+            f"p95 {results[name]['p95_ms']:>10.2f} ms")
+    return results
+
+
+def table_sizes(conn):
+    return {
+        table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for table in ["requisitions", "vendors", "requisition_vendors", "vendor_bids", "bid_approvals"]
+    }
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+
+    regressions = []
+    print(f"\n{'function':<45} {'baseline p95':>13} {'current p95':>13} {'ratio':>7}")
+    for name, current in results.items():
+        if name not in baseline:
+            continue
+        ratio = current["p95_ms"] / max(baseline[name]["p95_ms"], 1e-9)
+        flag = "  REGRESSION" if ratio > threshold else ""
+        print(f"{name:<45} {baseline[name]['p95_ms']:>11.2f}ms {current['p95_ms']:>11.2f}ms {ratio:>6.2f}x{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", required=True, help="database generated by benchmarks.synthetic_data")
+    parser.add_argument("--iterations", type=int, default=20, help="calls per loader")
+    parser.add_argument("--writes", type=int, default=200, help="calls per writer")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", help="comma-separated substrings of function names to run")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare p95 latency against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="p95 ratio reported as a regression")
+    parser.add_argument("--in-place", action="store_true", help="run writers against --db itself")
+    args = parser.parse_args()
+
+    workdir = None
+    path = args.db
+    if not args.in_place:
+        workdir = tempfile.mkdtemp(prefix="procurement-bench-")
+        path = os.path.join(workdir, os.path.basename(args.db))
+        copy_database(args.db, path)
+
+    try:
+        conn = connect(path)
+        rng = np.random.default_rng(args.seed)
+        sizes = table_sizes(conn)
+        operations = build_operations(conn, rng)
+        if args.only:
+            wanted = args.only.split(",")
+            operations = [op for op in operations if any(w in op[0] for w in wanted)]
+
+        results = run(conn, operations, args.iterations, args.writes)
+        conn.close()
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "database": os.path.abspath(args.db),
+            "table_sizes": sizes,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "loader_iterations": args.iterations,
+            "writer_iterations": args.writes,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Cold-start import cost of every page, measured with ``python -X importtime``.
+
+    python -m benchmarks.bench_import_time --output imports.json
+    python -m benchmarks.bench_import_time --repeat 10 --page Releases --top 15
+
+The module-level imports of each page are collected with ``ast`` and run in
+a fresh interpreter from the repository root, which is what a new Streamlit
+worker pays before the page's first line executes. Imports done inside
+functions are not counted, since they only cost something when that code
+path runs. A module's time is charged to the first import that pulls it in,
+so the heaviest-module list depends on the page's import order.
+"""
+import argparse
+import ast
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_IMPORT_TIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def page_files():
+    pages = [os.path.join(REPO, "Home.py")]
+    pages_dir = os.path.join(REPO, "pages")
+    pages += [os.path.join(pages_dir, name) for name in sorted(os.listdir(pages_dir)) if name.endswith(".py")]
+    return pages
+
+
+def top_level_imports(path):
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def measure(statements):
+    """Wall time of the interpreter and per-module ``-X importtime`` rows for one cold start."""
+    code = "\n".join(statements) or "pass"
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=REPO,
+                            capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    modules = []
+    for line in result.stderr.splitlines():
+        match = _IMPORT_TIME.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            # One space follows the bar; deeper imports are indented two more per level
+            modules.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return wall, modules
+
+
+def summarise(runs, baseline, top):
+    # Modules the bare interpreter already imports (site, encodings...) are not the page's cost
+    startup = {m[0] for m in baseline[1]}
+    runs = [(wall, [m for m in modules if m[0] not in startup]) for wall, modules in runs]
+    import_ms = np.array([sum(m[1] for m in modules) / 1000 for _, modules in runs])
+    wall_ms = np.array([wall * 1000 for wall, _ in runs])
+
+    # Direct imports of the page (level 0), heaviest first, by median cumulative time
+    direct = {}
+    for _, modules in runs:
+        for name, _, cumulative_us, level in modules:
+            if level == 0:
+                direct.setdefault(name, []).append(cumulative_us / 1000)
+    heaviest = sorted(((name, float(np.median(times))) for name, times in direct.items()),
+                      key=lambda item: -item[1])[:top]
+
+    return {
+        "modules": len(runs[0][1]),
+        "import_ms_p50": float(np.percentile(import_ms, 50)),
+        "import_ms_max": float(import_ms.max()),
+        "wall_ms_p50": float(np.percentile(wall_ms, 50)),
+        "startup_overhead_ms": float(np.percentile(wall_ms, 50) - baseline[0]),
+        "heaviest": [{"module": name, "cumulative_ms": ms} for name, ms in heaviest],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per page")
+    parser.add_argument("--page", action="append", help="substring of the page file names to run")
+    parser.add_argument("--top", type=int, default=8, help="heaviest direct imports to report per page")
+    parser.add_argument("--output", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    # A bare interpreter start, subtracted so wall times show what the imports add
+    bare = [measure([]) for _ in range(args.repeat)]
+    baseline = (float(np.median([wall * 1000 for wall, _ in bare])), bare[0][1])
+    print(f"{'bare interpreter':<32} wall p50 {baseline[0]:9.1f} ms")
+
+    results = {}
+    for path in page_files():
+        page = os.path.basename(path)
+        if args.page and not any(p in page for p in args.page):
+            continue
+        statements = top_level_imports(path)
+        runs = [measure(statements) for _ in range(args.repeat)]
+        results[page] = summary = summarise(runs, baseline, args.top)
+        summary["imports"] = statements
+
+        print(f"{page:<32} imports p50 {summary['import_ms_p50']:9.1f} ms   max {summary['import_ms_max']:9.1f} ms"
+              f"   +{summary['startup_overhead_ms']:8.1f} ms wall   {summary['modules']:5d} modules")
+        for entry in summary["heaviest"]:
+            print(f"    {entry['module']:<40} {entry['cumulative_ms']:9.1f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "meta": {
+                    "created_at": datetime.now().isoformat(timespec="seconds"),
+                    "repeat": args.repeat,
+                    "baseline_wall_ms": baseline[0],
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                },
+                "results": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
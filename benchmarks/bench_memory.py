@@ -0,0 +1,144 @@
+"""Memory held by the DataFrames each page session loads.
+
+    python -m benchmarks.synthetic_data --db /tmp/bench.db
+    python -m benchmarks.bench_memory --db /tmp/bench.db --output memory.json
+    python -m benchmarks.bench_memory --db /tmp/bench.db --compare memory.json
+
+Each page's loaders run once, as a session on that page would call them, for
+the vendor and requisition with the most rows. Per loader the rows, columns,
+``memory_usage(deep=True)`` of the frame and the tracemalloc peak while
+loading it are recorded, and summed per page. Loaders only read, so the
+database is opened read-only.
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tracemalloc
+from datetime import datetime
+
+from procurement import approvals, assignments, bids, requisitions, vendors
+from procurement.db import connect
+
+
+def _most(conn, sql):
+    row = conn.execute(sql).fetchone()
+    return row[0] if row else None
+
+
+def build_pages(conn):
+    # Each entry: page -> [(loader name, zero-argument call)]
+    vendor_id = _most(conn, """
+        SELECT vendor_id FROM requisition_vendors WHERE status = 'approved'
+        GROUP BY vendor_id ORDER BY COUNT(*) DESC LIMIT 1
+    """)
+    assigned_id = _most(conn, "SELECT requisition_id FROM requisition_vendors GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 1")
+    bid_id = _most(conn, "SELECT requisition_id FROM vendor_bids GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 1")
+    return {
+        "Requisition Releases": [
+            ("requisitions.load_requisitions", lambda: requisitions.load_requisitions(conn)),
+        ],
+        "Vendor Assignment": [
+            ("assignments.load_assignment_requisitions", lambda: assignments.load_assignment_requisitions(conn)),
+            ("assignments.load_requisition_vendors", lambda: assignments.load_requisition_vendors(conn, assigned_id)),
+            ("assignments.load_vendor_assignments", lambda: assignments.load_vendor_assignments(conn)),
+        ],
+        "Vendor Dashboard": [
+            ("vendors.load_vendors", lambda: vendors.load_vendors(conn)),
+            ("bids.load_vendor_requisition_page", lambda: bids.load_vendor_requisition_page(conn, vendor_id, 1, 10)),
+            ("bids.load_vendor_bids", lambda: bids.load_vendor_bids(conn, vendor_id)),
+        ],
+        "Bid Approvals": [
+            ("approvals.load_requisitions_with_bids", lambda: approvals.load_requisitions_with_bids(conn)),
+            ("approvals.load_bids_for_requisition", lambda: approvals.load_bids_for_requisition(conn, bid_id)),
+            ("approvals.load_recent_approvals", lambda: approvals.load_recent_approvals(conn, limit=10)),
+            ("approvals.load_pending_by_tier", lambda: approvals.load_pending_by_tier(conn, per_tier=10)),
+        ],
+    }
+
+
+def measure(call):
+    tracemalloc.start()
+    try:
+        df = call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "rows": len(df),
+        "columns": len(df.columns),
+        "frame_bytes": int(df.memory_usage(deep=True).sum()),
+        "peak_bytes": peak,
+    }
+
+
+def run(pages):
+    results = {}
+    for page, loaders in pages.items():
+        page_results = {name: measure(call) for name, call in loaders}
+        page_results["total"] = {
+            key: sum(result[key] for result in page_results.values())
+            for key in ("rows", "frame_bytes", "peak_bytes")
+        }
+        results[page] = page_results
+        for name, result in page_results.items():
+            columns = result.get("columns", "")
+            print(f"{page:<22} {name:<42} {result['rows']:>8} rows {columns:>3} cols "
+                  f"{result['frame_bytes'] / 1024:>10.1f} KiB frame {result['peak_bytes'] / 1024:>10.1f} KiB peak")
+    return results
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+
+    regressions = []
+    print(f"\n{'page':<22} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for page, current in results.items():
+        if page not in baseline:
+            continue
+        before, after = baseline[page]["total"]["frame_bytes"], current["total"]["frame_bytes"]
+        ratio = after / max(before, 1)
+        flag = "  REGRESSION" if ratio > threshold else ""
+        print(f"{page:<22} {before / 1024:>8.1f} KiB {after / 1024:>8.1f} KiB {ratio:>6.2f}x{flag}")
+        if flag:
+            regressions.append(page)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", required=True, help="database generated by benchmarks.synthetic_data")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare frame memory against")
+    parser.add_argument("--threshold", type=float, default=1.1, help="frame memory ratio reported as a regression")
+    args = parser.parse_args()
+
+    conn = connect(args.db, read_only=True)
+    results = run(build_pages(conn))
+    conn.close()
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "database": os.path.abspath(args.db),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
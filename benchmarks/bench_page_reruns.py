@@ -0,0 +1,344 @@
+"""Full-script rerun latency of every page, driven headlessly with AppTest.
+
+    python -m benchmarks.bench_page_reruns --output reruns.json
+    python -m benchmarks.bench_page_reruns --db /tmp/bench.db --repeat 5 --page Approvals
+
+Each page runs against a copy of a seeded database (generated on the fly
+unless ``--db`` is given) with the OpenAI client replaced by a canned stub,
+so no network calls are made. Every scenario step is one rerun: the first
+render plus the interactions a user would make on that page. Wall time and
+peak traced memory are recorded per step; ``--no-memory`` turns tracemalloc
+off, which removes its overhead from the timings. A page with no scenario of
+its own gets a first render and one rerun. A step that raises or times out
+is recorded under its page's ``errors``, the steps it kept from running
+under ``missing_steps``, and the run moves on to the next page; the exit
+status is then 1.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import re
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import openai
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.synthetic_data import generate
+from procurement import analytics, db
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+GENERATED_REQUISITION = """Requisition No:
+Requisition Date: 2025-07-01
+Requester Name: Dana Cruz
+Department: Warehouse
+Material ID:
+Title: Nitrile Gloves
+Description: Powder-free nitrile gloves for warehouse staff
+Size: Large
+Quantity: 100
+Unit: box
+Required By Date: 2025-07-01
+Justification for Requirement: Monthly replenishment
+Approved By:
+"""
+
+
+class StubOpenAI:
+    """Stands in for ``openai.OpenAI``; answers instantly with canned content."""
+
+    def __init__(self, *args, **kwargs):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model=None, messages=(), **kwargs):
+        prompt = messages[-1]["content"]
+        vendor_ids = re.findall(r"^Vendor (\d+):", prompt, re.MULTILINE)
+        if vendor_ids:
+            content = json.dumps([
+                {"vendor_id": int(v), "match_score": 0.9 - i * 0.1, "match_reason": "Benchmark match"}
+                for i, v in enumerate(vendor_ids[:3])
+            ])
+        else:
+            content = GENERATED_REQUISITION
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def _widget(widgets, label):
+    for widget in widgets:
+        if widget.label.startswith(label):
+            return widget
+    raise LookupError(f"no widget labelled {label!r}")
+
+
+def _pending_bid_requisition(conn):
+    # Requisition with a bid nobody has decided on, so the approval form renders
+    row = conn.execute("""
+        SELECT vb.requisition_id FROM vendor_bids vb
+        WHERE NOT EXISTS (SELECT 1 FROM bid_approvals ba WHERE ba.requisition_id = vb.requisition_id)
+        ORDER BY vb.requisition_id LIMIT 1
+    """).fetchone()
+    return row[0] if row else None
+
+
+def _bidding_vendor(conn):
+    row = conn.execute("""
+        SELECT vendor_id FROM requisition_vendors WHERE status = 'approved'
+        GROUP BY vendor_id ORDER BY COUNT(*), vendor_id LIMIT 1
+    """).fetchone()
+    return row[0] if row else None
+
+
+def _spend_currency(conn):
+    # Currency with the most approved spend, for the Spend Analytics filter
+    row = conn.execute("SELECT currency FROM spend_monthly GROUP BY currency ORDER BY SUM(amount_base) DESC").fetchone()
+    return row[0] if row else None
+
+
+def scenarios(conn):
+    # page file -> [(step name, action applied before the rerun)]
+    requisition_id = _pending_bid_requisition(conn)
+    vendor_id = _bidding_vendor(conn)
+    # Requisition without assignments, so auto-assign and approval have work to do
+    unassigned_id = conn.execute("""
+        SELECT MIN(id) FROM requisitions
+        WHERE id NOT IN (SELECT requisition_id FROM requisition_vendors)
+    """).fetchone()[0] or 1
+
+    def select(label, value):
+        # Selectboxes take the raw option value; the page's format_func renders the label
+        return lambda at: _widget(at.selectbox, label).select(value)
+
+    def add_vendor(at):
+        _widget(at.text_input, "Vendor Name").input("Benchmark Supplies")
+        _widget(at.text_input, "Vendor Email").input("bench@example.com")
+        _widget(at.button, "Add Vendor").click()
+
+    def search_vendors(at):
+        _widget(at.text_input, "🔍 Search vendors").input("Supplies")
+
+    def next_vendor_page(at):
+        _widget(at.text_input, "🔍 Search vendors").input("")
+        _widget(at.number_input, "Page").increment()
+
+    def manual_requisition(at):
+        _widget(at.text_input, "Title").input("Safety Goggles")
+        _widget(at.button, "📥 Submit Requisition").click()
+
+    def generate_requisition(at):
+        _widget(at.text_area, "Describe your requisition needs").input("100 boxes of nitrile gloves")
+        _widget(at.button, "🔮 Generate").click()
+
+    def approve_match(at):
+        next(b for b in at.button if b.key and b.key.startswith("approve_")).click()
+
+    def login(at):
+        _widget(at.selectbox, "Select your vendor account").select(vendor_id)
+        _widget(at.button, "Login").click()
+
+    def submit_bid(at):
+        next(b for b in at.button if b.label in ("Submit Bid", "Update Bid")).click()
+
+    def approve_bid(at):
+        _widget(at.text_input, "Your Name").input("Benchmark Approver")
+        _widget(at.button, "✅ Approve Bid").click()
+
+    return {
+        "Home.py": [("first render", None), ("rerun", lambda at: None)],
+        "⚒️Vendor Management.py": [
+            ("first render", None),
+            ("add vendor", add_vendor),
+            ("search vendors", search_vendors),
+            ("next page", next_vendor_page),
+        ],
+        "📝Requisiton Form.py": [
+            ("first render", None),
+            ("submit manual requisition", manual_requisition),
+            ("generate with AI", generate_requisition),
+        ],
+        "🖨️Requisition Releases.py": [
+            ("first render", None),
+            ("select requisition", select("Select a requisition", 1)),
+            ("generate PDF", lambda at: _widget(at.button, "🖨️ Generate PDF").click()),
+        ],
+        "🧑🏻‍🏫Vendor Assignment.py": [
+            ("first render", None),
+            ("select requisition", select("Select a requisition", unassigned_id)),
+            ("auto-assign vendors", lambda at: _widget(at.button, "🤖 Auto-Assign").click()),
+            ("approve match", approve_match),
+        ],
+        "🧮Vendor Dashboard.py": [
+            ("first render", None),
+            ("log in", login),
+            # Login does not rerun by itself; the next interaction shows the dashboard
+            ("open dashboard", lambda at: None),
+            ("submit bid", submit_bid),
+        ],
+        "💰Bid Approvals.py": [
+            ("first render", None),
+            ("select requisition", select("Select a requisition", requisition_id)),
+            ("approve bid", approve_bid),
+        ],
+        "⏱️SLA Dashboard.py": [
+            ("first render", None),
+            ("group by tier", select("Group by", "Approval tier")),
+            ("approval metric", lambda at: _widget(at.radio, "Metric").set_value("approval")),
+        ],
+        "📊Spend Analytics.py": [
+            ("first render", None),
+            ("filter currency", select("Bid currency", _spend_currency(conn))),
+        ],
+        "🩺Diagnostics.py": [
+            ("first render", None),
+            ("reset statistics", lambda at: _widget(at.button, "🔄 Reset Statistics").click()),
+        ],
+    }
+
+
+def run_page(path, steps, measure_memory, timeout):
+    # Cached connections and queries belong to the previous page's database state
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+    # Returns the timed steps and, when a step failed or timed out, its error; later steps are skipped
+    at = AppTest.from_file(path, default_timeout=timeout)
+    results = []
+    for name, action in steps:
+        try:
+            if action is not None:
+                action(at)
+            if measure_memory:
+                tracemalloc.start()
+            start = time.perf_counter()
+            at.run()
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] if measure_memory else None
+        except Exception as e:
+            return results, f"{name}: {type(e).__name__}: {e}"
+        finally:
+            if measure_memory:
+                tracemalloc.stop()
+        if at.exception:
+            return results, f"{name}: {at.exception[0].value}"
+        results.append((name, elapsed, peak))
+    return results, None
+
+
+def summarise(samples):
+    seconds = np.array([s[0] for s in samples])
+    summary = {
+        "runs": len(samples),
+        "mean_ms": float(seconds.mean() * 1000),
+        "p50_ms": float(np.percentile(seconds, 50) * 1000),
+        "max_ms": float(seconds.max() * 1000),
+    }
+    peaks = [s[1] for s in samples if s[1] is not None]
+    if peaks:
+        summary["peak_memory_mb"] = max(peaks) / 2 ** 20
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="seeded database to copy (default: generate one)")
+    parser.add_argument("--requisitions", type=int, default=500)
+    parser.add_argument("--vendors", type=int, default=50)
+    parser.add_argument("--bids", type=int, default=2_500)
+    parser.add_argument("--repeat", type=int, default=3, help="fresh sessions per page")
+    parser.add_argument("--page", action="append", help="substring of the page file names to run")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds allowed per rerun")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc peak memory")
+    parser.add_argument("--output", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="procurement-reruns-")
+    source = os.path.join(workdir, "seed.db")
+    if args.db:
+        db.copy_database(args.db, source)
+    else:
+        generate(source, requisitions=args.requisitions, vendors=args.vendors, bids=args.bids, log=lambda _: None)
+
+    openai.OpenAI = StubOpenAI
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+    try:
+        conn = db.connect(source)
+        plan = scenarios(conn)
+        conn.close()
+
+        # Pages without a scenario yet still get their first render and a rerun timed
+        for page in sorted(os.listdir(os.path.join(REPO, "pages"))):
+            if page.endswith(".py"):
+                plan.setdefault(page, [("first render", None), ("rerun", lambda at: None)])
+
+        timings, errors = {}, {}
+        for page, steps in plan.items():
+            if args.page and not any(p in page for p in args.page):
+                continue
+            path = os.path.join(REPO, page) if page == "Home.py" else os.path.join(REPO, "pages", page)
+            timings[page] = {}
+            for _ in range(args.repeat):
+                # Every session starts from the same data, so writes do not accumulate.
+                # analytics_connect reads its own import of DB_PATH.
+                db.DB_PATH = analytics.DB_PATH = os.path.join(workdir, "bench.db")
+                db.copy_database(source, db.DB_PATH)
+                steps_run, error = run_page(path, steps, not args.no_memory, args.timeout)
+                # Drop the session's cached connections so none is still open when the next copy replaces the file
+                st.cache_resource.clear()
+                gc.collect()
+                for name, elapsed, peak in steps_run:
+                    timings[page].setdefault(name, []).append((elapsed, peak))
+                if error:
+                    # A failing page is recorded and the run goes on with the next one
+                    errors.setdefault(page, []).append(error)
+                    print(f"{page:<32} ERROR {error}")
+                    break
+
+        results = {page: {step: summarise(samples) for step, samples in steps.items()}
+                   for page, steps in timings.items()}
+        for page, page_errors in errors.items():
+            results[page]["errors"] = page_errors
+            # Steps the failure kept from ever being timed, so their absence shows in the output
+            results[page]["missing_steps"] = [name for name, _ in plan[page] if name not in timings[page]]
+        for page, steps in results.items():
+            for step, summary in steps.items():
+                if step in ("errors", "missing_steps"):
+                    continue
+                memory = f"   peak {summary['peak_memory_mb']:8.1f} MB" if "peak_memory_mb" in summary else ""
+                print(f"{page:<32} {step:<28} p50 {summary['p50_ms']:9.1f} ms   max {summary['max_ms']:9.1f} ms{memory}")
+            for step in steps.get("missing_steps", []):
+                print(f"{page:<32} {step:<28} NOT TIMED")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "meta": {
+                    "created_at": datetime.now().isoformat(timespec="seconds"),
+                    "database": os.path.abspath(args.db) if args.db else {
+                        "requisitions": args.requisitions, "vendors": args.vendors, "bids": args.bids,
+                    },
+                    "repeat": args.repeat,
+                    "memory_traced": not args.no_memory,
+                    "python": platform.python_version(),
+                    "streamlit": st.__version__,
+                    "platform": platform.platform(),
+                },
+                "results": results,
+            }, f, indent=2)
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
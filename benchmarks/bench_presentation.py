@@ -0,0 +1,94 @@
+"""Micro-benchmark: row-wise display formatting vs procurement.presentation.
+
+    python -m benchmarks.bench_presentation --rows 100000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from procurement import presentation
+
+
+def make_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2024-01-01T00:00:00")
+    offsets = rng.integers(0, 365 * 24 * 3600, rows).astype("timedelta64[s]")
+    stamps = (start + offsets).astype(str)
+    stamps = np.char.replace(stamps, "T", " ")
+    decided = np.where(rng.random(rows) < 0.3, None, stamps)
+    return pd.DataFrame({
+        "created_at": stamps,
+        "approved_at": decided,
+        "currency": rng.choice(["USD", "EUR", "GBP", "JPY"], rows),
+        "min_bid": rng.uniform(10, 5000, rows).round(2),
+        "max_bid": rng.uniform(5000, 200000, rows).round(2),
+        "bid_amount": rng.uniform(10, 200000, rows).round(2),
+        "delivery_time": rng.integers(1, 60, rows),
+        "delivery_unit": rng.choice(["days", "weeks", "months"], rows),
+        "vendor_count": rng.integers(0, 5, rows),
+        "approved_count": rng.integers(0, 3, rows),
+    })
+
+
+# Implementations as they were written in the pages before the shared module
+def legacy(df):
+    out = pd.DataFrame(index=df.index)
+    out["vendor_status"] = df.apply(
+        lambda row: f"{row['approved_count']}/{row['vendor_count']}" if row['vendor_count'] > 0 else "None",
+        axis=1
+    )
+    out["price_range"] = df.apply(
+        lambda row: f"{row['currency']} {row['min_bid']} - {row['currency']} {row['max_bid']}", axis=1
+    )
+    out["bid_display"] = df.apply(lambda row: f"{row['bid_amount']} {row['currency']}", axis=1)
+    out["delivery_display"] = df.apply(lambda row: f"{row['delivery_time']} {row['delivery_unit']}", axis=1)
+    out["created_at"] = pd.to_datetime(df["created_at"]).dt.strftime("%Y-%m-%d %H:%M")
+    out["approved_at"] = pd.to_datetime(df["approved_at"]).apply(
+        lambda x: x.strftime("%Y-%m-%d %H:%M") if not pd.isna(x) else ""
+    )
+    return out
+
+
+def vectorized(df):
+    df = presentation.parse_timestamps(df.copy(), ["created_at", "approved_at"])
+    out = pd.DataFrame(index=df.index)
+    out["vendor_status"] = presentation.ratio_label(df["approved_count"], df["vendor_count"])
+    out["price_range"] = presentation.price_range(df["currency"], df["min_bid"], df["max_bid"])
+    out["bid_display"] = presentation.join_text(df["bid_amount"], df["currency"])
+    out["delivery_display"] = presentation.join_text(df["delivery_time"], df["delivery_unit"])
+    out["created_at"] = presentation.format_timestamps(df["created_at"])
+    out["approved_at"] = presentation.format_timestamps(df["approved_at"])
+    return out
+
+
+def best_of(func, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    legacy_time, expected = best_of(legacy, df, args.repeat)
+    vector_time, actual = best_of(vectorized, df, args.repeat)
+
+    pd.testing.assert_frame_equal(expected, actual, check_dtype=False)
+
+    print(f"rows:        {args.rows}")
+    print(f"row-wise:    {legacy_time:.3f}s")
+    print(f"vectorized:  {vector_time:.3f}s")
+    print(f"speedup:     {legacy_time / vector_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
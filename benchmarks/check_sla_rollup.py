@@ -0,0 +1,132 @@
+"""Checks that the trigger-maintained SLA rollup matches a full rebuild after a random mix of writes.
+
+    python -m benchmarks.check_sla_rollup
+    python -m benchmarks.check_sla_rollup --db /tmp/bench.db --operations 5000 --seed 7
+
+Runs against a copy of a seeded database (generated on the fly unless
+``--db`` is given). The writes are the ones the pages, API and CLI make, plus
+the ones nothing in the app makes yet but the triggers must still follow:
+department changes, decisions taken back to pending or rejected,
+re-approvals, backdated bids and deleted requisitions, bids and decisions.
+Afterwards ``sla_drift`` compares ``sla_daily`` with ``rebuild_sla``. Any
+difference is printed and the exit status is 1.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from collections import Counter
+
+import numpy as np
+
+from benchmarks.synthetic_data import DEPARTMENTS, generate
+from procurement import approvals, assignments, bids
+from procurement.db import connect, copy_database, init_schema
+from procurement.sla import sla_drift
+
+
+def _pick(conn, rng, sql, params=()):
+    rows = conn.execute(sql, params).fetchall()
+    return rows[rng.integers(0, len(rows))] if rows else None
+
+
+def _backdated(rng):
+    return f"2024-{rng.integers(1, 13):02d}-{rng.integers(1, 29):02d} {rng.integers(0, 24):02d}:00:00"
+
+
+def build_operations(conn, rng):
+    # name -> zero-argument write; each one picks its own random target
+    def department():
+        row = _pick(conn, rng, "SELECT id FROM requisitions")
+        conn.execute("UPDATE requisitions SET department = ? WHERE id = ?",
+                     (DEPARTMENTS[rng.integers(0, len(DEPARTMENTS))], row[0]))
+
+    def delete_requisition():
+        row = _pick(conn, rng, "SELECT id FROM requisitions")
+        conn.execute("DELETE FROM requisitions WHERE id = ?", row)
+
+    def match_status():
+        row = _pick(conn, rng, "SELECT id FROM requisition_vendors")
+        status = ["approved", "rejected", "pending"][rng.integers(0, 3)]
+        assignments.update_vendor_match_status(conn, row[0], status, actor="check", commit=False)
+
+    def save_bid():
+        row = _pick(conn, rng, "SELECT vendor_id, requisition_id FROM requisition_vendors WHERE status = 'approved'")
+        if row:
+            bids.save_bid(conn, row[0], row[1], float(rng.integers(100, 10_000)), "USD", "", 7, "days", commit=False)
+
+    def backdated_bid():
+        row = _pick(conn, rng, "SELECT vendor_id, requisition_id FROM requisition_vendors")
+        conn.execute("""
+            INSERT INTO vendor_bids (vendor_id, requisition_id, bid_amount, currency, bid_timestamp, status)
+            VALUES (?, ?, ?, 'USD', ?, 'submitted')
+        """, (row[0], row[1], float(rng.integers(100, 10_000)), _backdated(rng)))
+
+    def delete_bid():
+        row = _pick(conn, rng, "SELECT id FROM vendor_bids")
+        conn.execute("DELETE FROM vendor_bids WHERE id = ?", row)
+
+    def approve():
+        row = _pick(conn, rng, "SELECT id, requisition_id FROM vendor_bids")
+        approvals.approve_bid(conn, row[0], row[1], "check", "", "Manager Level", commit=False)
+
+    def reject():
+        row = _pick(conn, rng, "SELECT vendor_bid_id, requisition_id FROM bid_approvals WHERE status = 'approved'")
+        if row:
+            approvals.reject_bid(conn, row[0], row[1], "check", "", "Manager Level", commit=False)
+
+    def backdate_approval():
+        row = _pick(conn, rng, "SELECT id FROM bid_approvals")
+        conn.execute("UPDATE bid_approvals SET approved_at = ? WHERE id = ?", (_backdated(rng), row[0]))
+
+    def delete_approval():
+        row = _pick(conn, rng, "SELECT id FROM bid_approvals")
+        conn.execute("DELETE FROM bid_approvals WHERE id = ?", row)
+
+    return [department, delete_requisition, match_status, save_bid, backdated_bid, delete_bid, approve, reject,
+            backdate_approval, delete_approval]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="seeded database to copy; generated when omitted")
+    parser.add_argument("--requisitions", type=int, default=500, help="size of the generated database")
+    parser.add_argument("--operations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="procurement-sla-check-")
+    try:
+        path = os.path.join(workdir, "check.db")
+        if args.db:
+            copy_database(args.db, path)
+        else:
+            generate(path, requisitions=args.requisitions, vendors=max(args.requisitions // 10, 10),
+                     bids=args.requisitions * 5, log=lambda _: None)
+        conn = init_schema(connect(path))
+        rng = np.random.default_rng(args.seed)
+        operations = build_operations(conn, rng)
+        counts = Counter()
+        for _ in range(args.operations):
+            operation = operations[rng.integers(0, len(operations))]
+            operation()
+            conn.commit()
+            counts[operation.__name__] += 1
+        print(", ".join(f"{name}: {count}" for name, count in sorted(counts.items())))
+
+        drift = sla_drift(conn)
+        conn.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if drift.empty:
+        print("sla_daily matches rebuild_sla")
+    else:
+        print(f"{len(drift)} sla_daily rows differ from rebuild_sla:")
+        print(drift.to_string(index=False))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+"""Concurrent write-contention stress test for the shared SQLite file.
+
+    python -m benchmarks.stress_concurrency --threads 16 --duration 20
+    python -m benchmarks.stress_concurrency --processes 4 --threads 4 --connections session
+
+Simulates ``--processes`` x ``--threads`` sessions running against one copy
+of a seeded database. Each session plays a role: a vendor bidding from the
+Vendor Dashboard, an approver working the Vendor Assignment and Bid Approvals
+pages, or a buyer on the Requisition Form. Bids and approvals target a small
+set of "hot" requisitions to mimic a deadline rush.
+
+``--connections`` picks how sessions hold connections:
+
+* ``page`` (default) mirrors the pages. Dashboard/Assignment/Approvals share
+  one ``st.cache_resource`` connection per server process, and the Form
+  opens one per call.
+* ``shared``, ``session`` or ``op`` apply one pattern to every role.
+
+Lock wait is the time an operation took beyond its uncontended median,
+which is measured in a single-session warm-up before the run. Afterwards
+the database is checked for duplicate bids (the check-then-insert in
+``save_bid``), doubly approved requisitions, acknowledged inserts that
+vanished, and bid updates whose latest acknowledged version is not
+stored.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.synthetic_data import generate
+from procurement import approvals, assignments, bids, requisitions
+from procurement.db import connect, copy_database
+
+ROLES = ["vendor", "approver", "buyer"]
+ROLE_WEIGHTS = [0.6, 0.25, 0.15]
+# Connection pattern each role's page uses
+PAGE_CONNECTIONS = {"vendor": "shared", "approver": "shared", "buyer": "op"}
+
+
+def load_fixture(conn, hot_requisitions, seed):
+    rng = np.random.default_rng(seed)
+    with_bids = [row[0] for row in conn.execute("SELECT DISTINCT requisition_id FROM vendor_bids")]
+    hot = sorted(rng.choice(with_bids, min(hot_requisitions, len(with_bids)), replace=False).tolist())
+    marks = ",".join("?" * len(hot))
+    return {
+        "hot": hot,
+        # (requisition, vendor) pairs allowed to bid on the hot requisitions
+        "pairs": conn.execute(
+            f"SELECT requisition_id, vendor_id FROM requisition_vendors "
+            f"WHERE status = 'approved' AND requisition_id IN ({marks})", hot).fetchall(),
+        "matches": [row[0] for row in conn.execute(
+            f"SELECT id FROM requisition_vendors WHERE requisition_id IN ({marks})", hot)],
+        "bids": conn.execute(
+            f"SELECT id, requisition_id FROM vendor_bids WHERE requisition_id IN ({marks})", hot).fetchall(),
+    }
+
+
+class Session:
+    """One simulated user; ``step`` performs a single read or write and records it."""
+
+    def __init__(self, name, role, fixture, conn_factory, write_ratio, seed):
+        self.name = name
+        self.role = role
+        self.fixture = fixture
+        self.conn_factory = conn_factory
+        self.write_ratio = write_ratio
+        self.rng = np.random.default_rng(seed)
+        self.samples = []
+        self.inserted_requisitions = []
+        self.bid_writes = []
+        self.count = 0
+
+    def _pick(self, values):
+        return values[self.rng.integers(0, len(values))]
+
+    def operation(self):
+        # -> (operation name, call(conn))
+        write = self.rng.random() < self.write_ratio
+        if self.role == "vendor":
+            requisition_id, vendor_id = self._pick(self.fixture["pairs"])
+            if not write:
+                return "bids.load_vendor_bids", lambda conn: bids.load_vendor_bids(conn, vendor_id)
+            self.count += 1
+            marker = f"stress:{self.name}:{self.count}"
+
+            def save(conn):
+                bids.save_bid(conn, vendor_id, requisition_id, float(self.rng.uniform(100, 10_000)), "USD",
+                              marker, 14, "days")
+                self.bid_writes.append((requisition_id, vendor_id, marker, time.time()))
+            return "bids.save_bid", save
+
+        if self.role == "approver":
+            if not write:
+                requisition_id = self._pick(self.fixture["hot"])
+                return ("approvals.load_bids_for_requisition",
+                        lambda conn: approvals.load_bids_for_requisition(conn, requisition_id))
+            if self.rng.random() < 0.5:
+                match_id = self._pick(self.fixture["matches"])
+                status = self._pick(["approved", "rejected", "pending"])
+                return ("assignments.update_vendor_match_status",
+                        lambda conn: assignments.update_vendor_match_status(conn, match_id, status))
+            bid_id, requisition_id = self._pick(self.fixture["bids"])
+            return ("approvals.approve_bid",
+                    lambda conn: approvals.approve_bid(conn, bid_id, requisition_id, self.name, "", "Team Lead"))
+
+        if not write:
+            requisition_id = self._pick(self.fixture["hot"])
+            return ("requisitions.get_requisition_details",
+                    lambda conn: requisitions.get_requisition_details(conn, requisition_id))
+
+        def insert(conn):
+            self.inserted_requisitions.append(requisitions.insert_requisition(
+                conn, "Stress item", f"Inserted by {self.name}", 1, "pcs", "2025-07-01", False))
+        return "requisitions.insert_requisition", insert
+
+    def step(self):
+        name, call = self.operation()
+        conn, owned = self.conn_factory()
+        start = time.perf_counter()
+        error = None
+        try:
+            call(conn)
+        except Exception as e:
+            # pandas re-raises sqlite errors as its own DatabaseError, and concurrent use of a
+            # shared connection surfaces as ProgrammingError/SystemError; all of them count
+            error = f"{type(e).__name__}: {e}".splitlines()[0]
+            # A page would leave the transaction open; roll back so this session can continue
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+        elapsed = time.perf_counter() - start
+        if owned:
+            conn.close()
+        self.samples.append((name, elapsed, error))
+
+
+def connection_factory(mode, path, timeout, shared):
+    if mode == "shared":
+        return lambda: (shared, False)
+    if mode == "session":
+        conn = connect(path, timeout=timeout)
+        return lambda: (conn, False)
+    return lambda: (connect(path, timeout=timeout), True)
+
+
+def run_process(config, process_index):
+    """Runs this process's share of sessions as threads until the deadline."""
+    path = config["path"]
+    shared = connect(path, timeout=config["busy_timeout"])
+    sessions = []
+    for i in range(config["threads"]):
+        index = process_index * config["threads"] + i
+        rng = np.random.default_rng([config["seed"], index])
+        role = ROLES[rng.choice(len(ROLES), p=ROLE_WEIGHTS)]
+        mode = PAGE_CONNECTIONS[role] if config["connections"] == "page" else config["connections"]
+        sessions.append(Session(f"s{index}", role, config["fixture"],
+                                connection_factory(mode, path, config["busy_timeout"], shared),
+                                config["write_ratio"], [config["seed"], index, 1]))
+
+    def loop(session):
+        time.sleep(max(0.0, config["start_at"] - time.time()))
+        deadline = config["start_at"] + config["duration"]
+        while time.time() < deadline:
+            session.step()
+            if config["think_time"]:
+                time.sleep(session.rng.exponential(config["think_time"]))
+
+    threads = [threading.Thread(target=loop, args=(s,)) for s in sessions]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return [{
+        "name": s.name,
+        "role": s.role,
+        "samples": s.samples,
+        "inserted_requisitions": s.inserted_requisitions,
+        "bid_writes": s.bid_writes,
+    } for s in sessions]
+
+
+def calibrate(path, fixture, seed, rounds=30):
+    # Uncontended median latency of each operation from a single session
+    session = Session("warmup", None, fixture, lambda: (conn, False), 0.5, seed)
+    conn = connect(path)
+    for role in ROLES:
+        session.role = role
+        for _ in range(rounds):
+            session.step()
+    conn.close()
+    timings = defaultdict(list)
+    for name, elapsed, error in session.samples:
+        if error is None:
+            timings[name].append(elapsed)
+    return {name: float(np.median(values)) for name, values in timings.items()}
+
+
+def integrity(conn, results):
+    inserted = [rid for r in results for rid in r["inserted_requisitions"]]
+    stored = {row[0] for row in conn.execute("SELECT id FROM requisitions WHERE title = 'Stress item'")}
+
+    latest = {}
+    for r in results:
+        for requisition_id, vendor_id, marker, acked in r["bid_writes"]:
+            key = (requisition_id, vendor_id)
+            # Wall-clock acknowledgement time orders writes across processes
+            if key not in latest or acked > latest[key][1]:
+                latest[key] = (marker, acked)
+    stored_notes = defaultdict(set)
+    for requisition_id, vendor_id, notes in conn.execute(
+            "SELECT requisition_id, vendor_id, notes FROM vendor_bids WHERE notes LIKE 'stress:%'"):
+        stored_notes[(requisition_id, vendor_id)].add(notes)
+
+    return {
+        "duplicate_bids": conn.execute("""
+            SELECT COALESCE(SUM(n - 1), 0) FROM (
+                SELECT COUNT(*) as n FROM vendor_bids GROUP BY vendor_id, requisition_id HAVING n > 1
+            )
+        """).fetchone()[0],
+        "double_approved_requisitions": conn.execute("""
+            SELECT COUNT(*) FROM (
+                SELECT requisition_id FROM bid_approvals WHERE status = 'approved'
+                GROUP BY requisition_id HAVING COUNT(DISTINCT vendor_bid_id) > 1
+            )
+        """).fetchone()[0],
+        "duplicate_approval_rows": conn.execute("""
+            SELECT COALESCE(SUM(n - 1), 0) FROM (
+                SELECT COUNT(*) as n FROM bid_approvals GROUP BY vendor_bid_id HAVING n > 1
+            )
+        """).fetchone()[0],
+        "lost_requisition_inserts": len(set(inserted) - stored),
+        "lost_bid_updates": sum(marker not in stored_notes[key] for key, (marker, _) in latest.items()),
+    }
+
+
+def summarise(results, baseline, duration):
+    by_operation = defaultdict(list)
+    for r in results:
+        for name, elapsed, error in r["samples"]:
+            by_operation[name].append((elapsed, error))
+
+    operations = {}
+    for name, samples in sorted(by_operation.items()):
+        elapsed = np.array([s[0] for s in samples])
+        errors = [s[1] for s in samples if s[1]]
+        wait = np.clip(elapsed - baseline.get(name, 0.0), 0, None)
+        operations[name] = {
+            "calls": len(samples),
+            "ops_per_sec": len(samples) / duration,
+            "p50_ms": float(np.percentile(elapsed, 50) * 1000),
+            "p95_ms": float(np.percentile(elapsed, 95) * 1000),
+            "max_ms": float(elapsed.max() * 1000),
+            "uncontended_ms": baseline.get(name, 0.0) * 1000,
+            "lock_wait_total_s": float(wait.sum()),
+            "lock_wait_p95_ms": float(np.percentile(wait, 95) * 1000),
+            "locked_errors": sum("database is locked" in e for e in errors),
+            "other_errors": sum("database is locked" not in e for e in errors),
+        }
+
+    errors = defaultdict(int)
+    for r in results:
+        for _, _, error in r["samples"]:
+            if error:
+                errors[error] += 1
+    calls = sum(o["calls"] for o in operations.values())
+    return {
+        "throughput_ops_per_sec": calls / duration,
+        "calls": calls,
+        "lock_wait_total_s": sum(o["lock_wait_total_s"] for o in operations.values()),
+        "locked_errors": sum(o["locked_errors"] for o in operations.values()),
+        "errors": dict(errors),
+        "roles": {role: sum(r["role"] == role for r in results) for role in ROLES},
+        "operations": operations,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="seeded database to copy (default: generate one)")
+    parser.add_argument("--requisitions", type=int, default=5_000)
+    parser.add_argument("--vendors", type=int, default=300)
+    parser.add_argument("--bids", type=int, default=50_000)
+    parser.add_argument("--processes", type=int, default=1, help="server processes")
+    parser.add_argument("--threads", type=int, default=8, help="sessions per process")
+    parser.add_argument("--connections", choices=["page", "shared", "session", "op"], default="page")
+    parser.add_argument("--duration", type=float, default=10, help="seconds of load")
+    parser.add_argument("--write-ratio", type=float, default=0.5, help="share of operations that write")
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean pause between operations (s)")
+    parser.add_argument("--hot-requisitions", type=int, default=10, help="requisitions bids concentrate on")
+    parser.add_argument("--busy-timeout", type=float, default=5.0, help="sqlite3 connect timeout (s)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write the report to this JSON file")
+    args = parser.parse_args()
+
+    if args.processes > 1 and args.connections == "shared":
+        parser.error("--connections shared cannot span processes; use page, session or op")
+
+    workdir = tempfile.mkdtemp(prefix="procurement-stress-")
+    path = os.path.join(workdir, "stress.db")
+    try:
+        if args.db:
+            copy_database(args.db, path)
+        else:
+            generate(path, requisitions=args.requisitions, vendors=args.vendors, bids=args.bids,
+                     log=lambda _: None)
+
+        conn = connect(path)
+        fixture = load_fixture(conn, args.hot_requisitions, args.seed)
+        conn.close()
+        baseline = calibrate(path, fixture, args.seed)
+
+        config = {
+            "path": path,
+            "fixture": fixture,
+            "threads": args.threads,
+            "connections": args.connections,
+            "duration": args.duration,
+            "write_ratio": args.write_ratio,
+            "think_time": args.think_time,
+            "busy_timeout": args.busy_timeout,
+            "seed": args.seed,
+            "start_at": time.time() + 1.0,
+        }
+        if args.processes == 1:
+            results = run_process(config, 0)
+        else:
+            config["start_at"] += 2.0
+            with ProcessPoolExecutor(args.processes) as pool:
+                results = [s for chunk in pool.map(run_process, [config] * args.processes, range(args.processes))
+                           for s in chunk]
+
+        conn = connect(path)
+        report = summarise(results, baseline, args.duration)
+        report["integrity"] = integrity(conn, results)
+        conn.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{args.processes} process(es) x {args.threads} session(s), connections={args.connections}, "
+          f"roles={report['roles']}")
+    print(f"throughput {report['throughput_ops_per_sec']:.1f} ops/s, lock wait {report['lock_wait_total_s']:.2f}s, "
+          f"'database is locked' {report['locked_errors']}")
+    for name, o in report["operations"].items():
+        print(f"  {name:<40} {o['ops_per_sec']:8.1f} ops/s  p95 {o['p95_ms']:8.2f} ms  "
+              f"wait p95 {o['lock_wait_p95_ms']:8.2f} ms  locked {o['locked_errors']:4d}  other {o['other_errors']:4d}")
+    for error, count in report["errors"].items():
+        print(f"  error x{count}: {error}")
+    print("integrity:", ", ".join(f"{k}={v}" for k, v in report["integrity"].items()))
+
+    if args.output:
+        report["meta"] = {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "config": {k: v for k, v in vars(args).items() if k != "output"},
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Seeded synthetic procurement database at production scale.
+
+    python -m benchmarks.synthetic_data --db /tmp/bench.db \\
+        --requisitions 100000 --vendors 5000 --bids 1000000
+
+All five tables are populated. Every bid belongs to an approved vendor
+assignment, a share of requisitions carries extra pending/rejected
+assignments, and ``--approval-rate`` of the requisitions with bids have been
+decided (lowest base-currency bid approved, the rest rejected).
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from procurement.db import connect, init_schema
+from procurement.fx import load_fx_rates
+from procurement.tiers import load_approval_tiers, resolve_approval_tiers
+
+# Fixed so that a given seed always produces the same database
+HISTORY_END = "2025-06-30T00:00:00"
+
+ITEMS = [
+    "Nitrile Gloves", "Hydraulic Fittings", "Disinfectant Solution", "Safety Goggles", "Steel Bolts",
+    "Copper Wire", "Packing Tape", "Pallet Wrap", "Bearings", "Lubricant Oil", "Welding Rods",
+    "Printer Paper", "Ear Plugs", "LED Panels", "Air Filters", "Conveyor Belts", "Solvent Cleaner",
+    "Cable Ties", "Hard Hats", "Fork Lift Batteries",
+]
+DEPARTMENTS = ["Maintenance", "Warehouse", "Production", "Quality", "Facilities", "IT", "Logistics"]
+UNITS = ["pcs", "box", "drum", "roll", "pack", "kg", "litre"]
+CURRENCIES = ["USD", "EUR", "GBP", "JPY", "CAD", "AUD"]
+CURRENCY_WEIGHTS = [0.6, 0.15, 0.08, 0.07, 0.05, 0.05]
+DELIVERY_UNITS = ["days", "weeks", "months"]
+ADJECTIVES = ["Alpha", "Prime", "United", "Global", "Delta", "Summit", "Apex", "Pioneer", "Metro", "Allied"]
+NOUNS = ["Supplies", "Traders", "Industrial", "Chemicals", "Components", "Logistics", "Distributors"]
+REASONS = [
+    "Specialises in the requested category with proven delivery history.",
+    "Regional supplier with stock on hand and competitive pricing.",
+    "Certified manufacturer matching the quality requirements.",
+    "Broad catalogue covering the requisition; moderate lead times.",
+]
+
+
+def _timestamps(values):
+    # datetime64[s] array -> "YYYY-MM-DD HH:MM:SS"
+    return np.char.replace(np.datetime_as_string(values, unit="s"), "T", " ").tolist()
+
+
+def _seconds(rng, low_hours, high_hours, size):
+    return (rng.uniform(low_hours, high_hours, size) * 3600).astype("timedelta64[s]")
+
+
+def _insert(conn, sql, rows, batch_size):
+    for start in range(0, len(rows), batch_size):
+        conn.executemany(sql, rows[start:start + batch_size])
+
+
+def generate(path, requisitions=100_000, vendors=5_000, bids=1_000_000, extra_assignments=0.5,
+             approval_rate=0.3, days=730, seed=42, batch_size=50_000, log=print):
+    rng = np.random.default_rng(seed)
+    conn = connect(path)
+    conn.execute("PRAGMA journal_mode = MEMORY")
+    conn.execute("PRAGMA synchronous = OFF")
+    init_schema(conn)
+
+    if conn.execute("SELECT COUNT(*) FROM requisitions").fetchone()[0]:
+        raise SystemExit(f"{path} already contains data; use --overwrite to regenerate it")
+
+    started = time.perf_counter()
+    origin = np.datetime64(HISTORY_END, "s") - np.timedelta64(days, "D")
+
+    # Vendors
+    vendor_ids = np.arange(1, vendors + 1)
+    vendor_rows = list(zip(
+        vendor_ids.tolist(),
+        [f"{ADJECTIVES[i % len(ADJECTIVES)]} {NOUNS[i % len(NOUNS)]} {i:05d}" for i in vendor_ids],
+        [f"sales{i}@vendor{i}.example.com" for i in vendor_ids],
+        [f"Supplier of {ITEMS[a]}, {ITEMS[b]} and related products"
+         for a, b in rng.integers(0, len(ITEMS), (vendors, 2))],
+    ))
+    _insert(conn, "INSERT INTO vendors (id, name, email, description) VALUES (?, ?, ?, ?)", vendor_rows, batch_size)
+    log(f"vendors: {vendors}")
+
+    # Requisitions
+    requisition_ids = np.arange(1, requisitions + 1)
+    submitted = origin + rng.integers(0, days * 86400, requisitions).astype("timedelta64[s]")
+    item = rng.integers(0, len(ITEMS), requisitions)
+    department = rng.integers(0, len(DEPARTMENTS), requisitions)
+    requisition_rows = list(zip(
+        requisition_ids.tolist(),
+        [ITEMS[i] for i in item],
+        [f"Department: {DEPARTMENTS[d]}\nDescription: {ITEMS[i]} required for ongoing operations."
+         for i, d in zip(item, department)],
+        rng.integers(1, 500, requisitions).tolist(),
+        rng.choice(UNITS, requisitions).tolist(),
+        np.datetime_as_string((submitted + np.timedelta64(14, "D")).astype("datetime64[D]")).tolist(),
+        (rng.random(requisitions) < 0.6).tolist(),
+        _timestamps(submitted),
+        [DEPARTMENTS[d] for d in department],
+    ))
+    _insert(conn, """
+        INSERT INTO requisitions
+        (id, title, description, quantity, unit, request_date, generated_by_ai, timestamp, department)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, requisition_rows, batch_size)
+    log(f"requisitions: {requisitions}")
+
+    # Unique (requisition, vendor) pairs that receive a bid
+    bids = min(bids, requisitions * vendors)
+    keys = np.unique(rng.integers(0, requisitions * vendors, int(bids * 1.1) + 10))
+    while len(keys) < bids:
+        keys = np.unique(np.concatenate([keys, rng.integers(0, requisitions * vendors, bids)]))
+    keys = rng.permutation(keys)[:bids]
+    keys.sort()
+    bid_requisition = keys // vendors + 1
+    bid_vendor = keys % vendors + 1
+
+    # Approved assignments behind every bid, plus extra pending/rejected ones
+    n_extra = int(requisitions * extra_assignments)
+    assign_requisition = np.concatenate([bid_requisition, rng.integers(1, requisitions + 1, n_extra)])
+    assign_vendor = np.concatenate([bid_vendor, rng.integers(1, vendors + 1, n_extra)])
+    assign_status = np.concatenate([
+        np.full(bids, "approved"),
+        rng.choice(["pending", "rejected"], n_extra),
+    ])
+    assign_created = submitted[assign_requisition - 1] + _seconds(rng, 1, 72, len(assign_requisition))
+    assign_decided = assign_created + _seconds(rng, 1, 48, len(assign_requisition))
+    decided_text = np.array(_timestamps(assign_decided), dtype=object)
+    decided_text[assign_status == "pending"] = None
+    assignment_rows = list(zip(
+        assign_requisition.tolist(),
+        assign_vendor.tolist(),
+        rng.uniform(0.4, 1.0, len(assign_requisition)).round(2).tolist(),
+        rng.choice(REASONS, len(assign_requisition)).tolist(),
+        assign_status.tolist(),
+        _timestamps(assign_created),
+        decided_text.tolist(),
+    ))
+    _insert(conn, """
+        INSERT INTO requisition_vendors
+        (requisition_id, vendor_id, match_score, match_reason, status, created_at, approved_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, assignment_rows, batch_size)
+    log(f"requisition_vendors: {len(assignment_rows)}")
+
+    # Bids
+    rates = load_fx_rates(conn).set_index("currency")["rate_to_base"]
+    currency = rng.choice(CURRENCIES, bids, p=CURRENCY_WEIGHTS)
+    amount_base = rng.lognormal(mean=8.5, sigma=1.4, size=bids).round(2)
+    bid_amount = (amount_base / rates.reindex(currency).to_numpy()).round(2)
+    bid_time = assign_decided[:bids] + _seconds(rng, 1, 120, bids)
+    bid_ids = np.arange(1, bids + 1)
+    bid_rows = list(zip(
+        bid_ids.tolist(),
+        bid_vendor.tolist(),
+        bid_requisition.tolist(),
+        bid_amount.tolist(),
+        currency.tolist(),
+        rng.choice(["", "Net 30 payment terms", "Includes delivery", "Price valid for 30 days"], bids).tolist(),
+        rng.integers(1, 12, bids).tolist(),
+        rng.choice(DELIVERY_UNITS, bids, p=[0.6, 0.3, 0.1]).tolist(),
+        _timestamps(bid_time),
+    ))
+    _insert(conn, """
+        INSERT INTO vendor_bids
+        (id, vendor_id, requisition_id, bid_amount, currency, notes, delivery_time, delivery_unit, bid_timestamp, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'submitted')
+    """, bid_rows, batch_size)
+    log(f"vendor_bids: {bids}")
+
+    # Decisions: the cheapest bid of a decided requisition is approved, the others rejected
+    frame = pd.DataFrame({
+        "bid_id": bid_ids,
+        "requisition_id": bid_requisition,
+        "amount_base": bid_amount * rates.reindex(currency).to_numpy(),
+        "bid_time": bid_time,
+    })
+    decided_requisitions = np.unique(bid_requisition)
+    decided_requisitions = decided_requisitions[rng.random(len(decided_requisitions)) < approval_rate]
+    frame = frame[frame["requisition_id"].isin(decided_requisitions)]
+    grouped = frame.groupby("requisition_id")
+    frame = frame.assign(
+        max_amount=grouped["amount_base"].transform("max"),
+        last_bid=grouped["bid_time"].transform("max"),
+        winner=frame["bid_id"].isin(frame.loc[grouped["amount_base"].idxmin(), "bid_id"]),
+    )
+    tiers = resolve_approval_tiers(frame["max_amount"], load_approval_tiers(conn))["name"]
+    decided_at = frame["last_bid"].to_numpy() + _seconds(rng, 1, 72, len(frame))
+    approval_rows = list(zip(
+        frame["requisition_id"].tolist(),
+        frame["bid_id"].tolist(),
+        tiers.tolist(),
+        rng.choice(["A. Rivera", "J. Chen", "M. Okafor", "S. Patel"], len(frame)).tolist(),
+        _timestamps(decided_at),
+        np.where(frame["winner"], "", "Automatically rejected as another bid was selected").tolist(),
+        np.where(frame["winner"], "approved", "rejected").tolist(),
+    ))
+    _insert(conn, """
+        INSERT INTO bid_approvals
+        (requisition_id, vendor_bid_id, approval_tier, approved_by, approved_at, approval_notes, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, approval_rows, batch_size)
+    log(f"bid_approvals: {len(approval_rows)}")
+
+    conn.commit()
+    conn.execute("ANALYZE")
+    # Leave the file in the WAL mode init_schema gives the app's databases
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.close()
+    log(f"generated {path} in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", required=True, help="SQLite file to create")
+    parser.add_argument("--requisitions", type=int, default=100_000)
+    parser.add_argument("--vendors", type=int, default=5_000)
+    parser.add_argument("--bids", type=int, default=1_000_000)
+    parser.add_argument("--extra-assignments", type=float, default=0.5,
+                        help="pending/rejected assignments per requisition on top of the bid-backed ones")
+    parser.add_argument("--approval-rate", type=float, default=0.3,
+                        help="share of requisitions with bids that have been decided")
+    parser.add_argument("--days", type=int, default=730, help="history length")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--overwrite", action="store_true", help="delete an existing file first")
+    args = parser.parse_args()
+
+    if args.overwrite and os.path.exists(args.db):
+        os.remove(args.db)
+
+    generate(args.db, requisitions=args.requisitions, vendors=args.vendors, bids=args.bids,
+             extra_assignments=args.extra_assignments, approval_rate=args.approval_rate,
+             days=args.days, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
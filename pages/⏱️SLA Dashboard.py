@@ -0,0 +1,108 @@
+import streamlit as st
+from datetime import date, timedelta
+from procurement.analytics import analytics_connect, analytics_engine
+from procurement.db import connect, init_schema
+from procurement.sla import SLA_METRICS, load_sla_percentiles, load_sla_trend, sla_date_range
+from procurement.tracing import end_page, span, start_page
+
+GROUPINGS = {
+    "Department": ("department",),
+    "Approval tier": ("tier",),
+    "Department and tier": ("department", "tier"),
+}
+
+start_page("SLA Dashboard")
+
+st.set_page_config(page_title="⏱️ Procurement SLAs", page_icon="⏱️", layout="wide")
+
+st.title("⏱️ Procurement Cycle-Time SLAs")
+st.caption("Hours from a requisition being raised to its first approved vendor, its first bid and its approved "
+           "bid. Percentiles come from daily histograms and are accurate to within about 20%.")
+
+
+@st.cache_resource
+def init_db_connection():
+    return init_schema(connect())
+
+
+# Reports run on a separate read-only connection, DuckDB when PROCUREMENT_ANALYTICS=duckdb
+@st.cache_resource
+def init_analytics_connection():
+    return analytics_connect()
+
+
+with span("connect"):
+    conn = init_db_connection()
+    analytics = init_analytics_connection()
+st.caption(f"Analytics engine: {analytics_engine(analytics)}")
+
+first_day, last_day = sla_date_range(conn)
+if first_day is None:
+    st.info("No requisition has reached a milestone yet.")
+    end_page()
+    st.stop()
+
+first_day, last_day = date.fromisoformat(first_day), date.fromisoformat(last_day)
+col1, col2 = st.columns([2, 1])
+with col1:
+    period = st.date_input(
+        "Milestones reached between",
+        value=(max(first_day, last_day - timedelta(days=90)), last_day),
+        min_value=first_day,
+        max_value=last_day
+    )
+with col2:
+    grouping = st.selectbox("Group by", list(GROUPINGS))
+# While a range is being picked the input holds a single date
+start, end = period if len(period) == 2 else (period[0], period[0])
+
+with span("load sla overview"):
+    overview = load_sla_percentiles(analytics, start, end, by=()).set_index("metric")
+
+columns = st.columns(len(SLA_METRICS))
+for column, (metric, label) in zip(columns, SLA_METRICS.items()):
+    if metric in overview.index:
+        row = overview.loc[metric]
+        column.metric(label, f"{row['p50_hours']:,.1f} h median",
+                      f"p90 {row['p90_hours']:,.1f} h · {int(row['events']):,} requisitions", delta_color="off")
+    else:
+        column.metric(label, "–")
+
+metric = st.radio("Metric", list(SLA_METRICS), format_func=SLA_METRICS.get, horizontal=True)
+by = GROUPINGS[grouping]
+
+with span("load sla percentiles"):
+    percentiles = load_sla_percentiles(analytics, start, end, by=by)
+    percentiles = percentiles[percentiles["metric"] == metric].drop(columns="metric")
+    for column in by:
+        percentiles[column] = percentiles[column].replace("", "(none)")
+
+if percentiles.empty:
+    st.info("No requisition reached this milestone in the selected period.")
+else:
+    with span("render sla percentiles"):
+        percentiles["group"] = percentiles[list(by)].agg(" · ".join, axis=1)
+        st.subheader(f"{SLA_METRICS[metric]} by {grouping.lower()}")
+        st.bar_chart(percentiles.set_index("group")[["p50_hours", "p90_hours"]], stack=False)
+        st.dataframe(
+            percentiles.drop(columns="group"),
+            column_config={
+                "department": "Department",
+                "tier": "Approval Tier",
+                "events": "Requisitions",
+                "mean_hours": st.column_config.NumberColumn("Mean (h)", format="%.1f"),
+                "p50_hours": st.column_config.NumberColumn("Median (h)", format="%.1f"),
+                "p90_hours": st.column_config.NumberColumn("p90 (h)", format="%.1f"),
+                "p95_hours": st.column_config.NumberColumn("p95 (h)", format="%.1f"),
+            },
+            use_container_width=True,
+            hide_index=True
+        )
+
+    with span("load sla trend"):
+        trend = load_sla_trend(analytics, metric, start, end).set_index("day")
+    st.subheader("Daily trend")
+    st.line_chart(trend["mean_hours"], y_label="Mean hours")
+    st.bar_chart(trend["events"], y_label="Requisitions")
+
+end_page()
@@ -1,70 +1,118 @@
-import sqlite3
 import streamlit as st
+import io
+from procurement.db import connect
+from procurement.tracing import end_page, span, start_page
+from procurement.vendors import (
+    FILE_FORMATS, add_vendor, count_vendors, diff_vendor_page, export_vendors, import_vendors, init_vendors,
+    load_vendor_page, read_vendor_file, save_vendor_changes
+)
+
+PAGE_SIZES = [25, 50, 100, 250]
 
 # Initialize DB
 def init():
-    conn = sqlite3.connect('db.db', check_same_thread=False)
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS vendors (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT,
-            email TEXT,
-            description TEXT
-        )
-    """)
+    conn = connect()
+    init_vendors(conn)
     return conn
 
-conn = init()
-
-# Helper functions
-def add_vendor(name, email, description):
-    conn.execute("INSERT INTO vendors (name, email, description) VALUES (?, ?, ?)", (name, email, description))
-    conn.commit()
-
-def get_vendors():
-    return conn.execute("SELECT * FROM vendors").fetchall()
+start_page("Vendor Management")
 
-def update_vendor(vendor_id, name, email, description):
-    conn.execute("UPDATE vendors SET name = ?, email = ?, description = ? WHERE id = ?", (name, email, description, vendor_id))
-    conn.commit()
-
-def delete_vendor(vendor_id):
-    conn.execute("DELETE FROM vendors WHERE id = ?", (vendor_id,))
-    conn.commit()
+with span("connect"):
+    conn = init()
 
 # Streamlit UI
 st.title("🛠️ Vendor Management")
 
 # Section to add new vendor
-with st.expander("➕ Add New Vendor"):
+with st.expander("➕ Add New Vendor"), span("add vendor form"):
     name = st.text_input("Vendor Name")
     email = st.text_input("Vendor Email")
     description = st.text_area("Description")
     if st.button("Add Vendor"):
         if name and email:
-            add_vendor(name, email, description)
+            add_vendor(conn, name, email, description)
             st.success(f"Vendor '{name}' added.")
         else:
             st.warning("Name and Email are required.")
 
-# Show vendor list
+# Bulk import/export of the vendor master, matched on email
+with st.expander("📦 Bulk Import / Export"), span("bulk vendors"):
+    uploaded = st.file_uploader("Vendor file (name, email, description)", type=list(FILE_FORMATS))
+    update_existing = st.checkbox("Update vendors that are already on file", value=True)
+    if uploaded is not None and st.button("Import Vendors"):
+        try:
+            with span("import vendors"):
+                counts = import_vendors(conn, read_vendor_file(uploaded), update_existing=update_existing)
+            st.success(f"Imported vendors: {counts['inserted']} added, {counts['updated']} updated, "
+                       f"{counts['skipped']} skipped.")
+        except ValueError as e:
+            st.error(str(e))
+
+    export_format = st.radio("Export format", FILE_FORMATS, horizontal=True, format_func=str.upper)
+    if st.button("Prepare Export"):
+        with span("export vendors"):
+            buffer = io.BytesIO()
+            export_vendors(conn, buffer, export_format)
+        st.download_button(
+            label=f"⬇️ Download vendors.{export_format}",
+            data=buffer.getvalue(),
+            file_name=f"vendors.{export_format}",
+            mime="text/csv" if export_format == "csv" else "application/octet-stream"
+        )
+
+# Show vendor list, one page at a time
 st.subheader("📋 Existing Vendors")
 
-vendors = get_vendors()
-
-for v in vendors:
-    with st.expander(f"{v[1]}"):
-        new_name = st.text_input(f"Name [{v[0]}]", value=v[1], key=f"name_{v[0]}")
-        new_email = st.text_input(f"Email [{v[0]}]", value=v[2], key=f"email_{v[0]}")
-        new_desc = st.text_area(f"Description [{v[0]}]", value=v[3], key=f"desc_{v[0]}")
-
-        col1, col2 = st.columns([1, 1])
-        with col1:
-            if st.button("Update", key=f"update_{v[0]}"):
-                update_vendor(v[0], new_name, new_email, new_desc)
-                st.success(f"Vendor '{new_name}' updated.")
-        with col2:
-            if st.button("Delete", key=f"delete_{v[0]}"):
-                delete_vendor(v[0])
-                st.warning(f"Vendor '{v[1]}' deleted.")
-                st.rerun()
\ No newline at end of file
+col1, col2 = st.columns([3, 1])
+with col1:
+    search = st.text_input("🔍 Search vendors", placeholder="Name, email or description").strip()
+with col2:
+    page_size = st.selectbox("Rows per page", PAGE_SIZES, index=1)
+
+with span("count vendors"):
+    total = count_vendors(conn, search)
+page_count = max((total + page_size - 1) // page_size, 1)
+page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1, step=1)
+
+with span("load vendors"):
+    vendors = load_vendor_page(conn, page, page_size, search)
+
+# The editor key changes after a save or when the page changes, so stale edits are discarded
+editor_version = st.session_state.setdefault("vendor_editor_version", 0)
+with span("render vendors"):
+    st.caption(f"{total:,} vendors{' matching' if search else ''}. Edit cells, add rows at the bottom or "
+               f"select rows to delete, then save.")
+    edited = st.data_editor(
+        vendors,
+        key=f"vendor_editor_{editor_version}_{search}_{page}_{page_size}",
+        column_config={
+            "id": st.column_config.NumberColumn("ID", disabled=True),
+            "name": st.column_config.TextColumn("Name", required=True),
+            "email": st.column_config.TextColumn("Email", required=True),
+            "description": st.column_config.TextColumn("Description", width="large"),
+        },
+        num_rows="dynamic",
+        use_container_width=True,
+        hide_index=True
+    )
+
+if st.button("💾 Save Changes"):
+    changes = diff_vendor_page(vendors, edited)
+    incomplete = [row for row in changes["inserts"] + changes["updates"] if not row[0] or not row[1]]
+    if incomplete:
+        st.warning("Name and Email are required.")
+    elif not any(changes.values()):
+        st.info("No changes to save.")
+    else:
+        with span("save vendors"):
+            counts = save_vendor_changes(conn, changes)
+        st.session_state["vendor_editor_version"] = editor_version + 1
+        st.session_state["vendor_save_counts"] = counts
+        st.rerun()
+
+# Reported after the rerun that shows the saved rows
+counts = st.session_state.pop("vendor_save_counts", None)
+if counts:
+    st.success(f"Saved: {counts['inserts']} added, {counts['updates']} updated, {counts['deletes']} deleted.")
+
+end_page()
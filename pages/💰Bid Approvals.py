@@ -1,8 +1,21 @@
 import streamlit as st
-import sqlite3
 import pandas as pd
-from datetime import datetime
-import json
+from procurement.approvals import (
+    approve_bid, load_approval_summary, load_bids_for_requisition, load_pending_by_tier, load_recent_approvals,
+    load_requisitions_with_bids, reject_bid
+)
+from procurement.bids import get_bid_notes
+from procurement.db import connect, init_schema
+from procurement.fx import BASE_CURRENCY, load_fx_rates, load_fx_rates_csv
+from procurement.presentation import format_timestamp, format_timestamps, join_text, price_range
+from procurement.ranking import DEFAULT_WEIGHTS, load_bids_for_ranking, rank_bids
+from procurement.requisitions import get_requisition_details
+from procurement.revisions import load_bid_history
+from procurement.tiers import get_approval_tier, load_approval_tiers, resolve_approval_tiers
+from procurement.transitions import ENTITY_LABELS, load_requisition_transitions
+from procurement.tracing import end_page, span, start_page
+
+start_page("Bid Approvals")
 
 # Page configuration
 st.set_page_config(
@@ -13,169 +26,170 @@ st.set_page_config(
 )
 
 # Custom CSS for styling
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 2.5rem;
-        color: #1E3A8A;
-        padding-bottom: 1rem;
-        border-bottom: 2px solid #E5E7EB;
-        margin-bottom: 2rem;
-    }
-    .subheader {
-        font-size: 1.5rem;
-        color: #1E3A8A;
-        padding-top: 1rem;
-        padding-bottom: 0.5rem;
-    }
-    .card {
-        background-color: #F3F4F6;
-        border-radius: 10px;
-        padding: 20px;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        margin-bottom: 20px;
-    }
-    .info-text {
-        color: #4B5563;
-    }
-    .stButton>button {
-        background-color: #1E3A8A;
-        color: white;
-        border-radius: 5px;
-        padding: 0.5rem 1rem;
-        font-weight: bold;
-    }
-    .stButton>button:hover {
-        background-color: #2563EB;
-        border-color: #2563EB;
-    }
-    .success-button>button {
-        background-color: #059669;
-    }
-    .success-button>button:hover {
-        background-color: #047857;
-    }
-    .danger-button>button {
-        background-color: #DC2626;
-        color: white;
-    }
-    .danger-button>button:hover {
-        background-color: #B91C1C;
-    }
-    .success {
-        background-color: #D1FAE5;
-        padding: 15px;
-        border-radius: 5px;
-        color: #065F46;
-        font-weight: bold;
-        margin: 10px 0;
-    }
-    .warning {
-        background-color: #FEF3C7;
-        padding: 15px;
-        border-radius: 5px;
-        color: #92400E;
-        font-weight: bold;
-        margin: 10px 0;
-    }
-    .error {
-        background-color: #FEE2E2;
-        padding: 15px;
-        border-radius: 5px;
-        color: #B91C1C;
-        font-weight: bold;
-        margin: 10px 0;
-    }
-    .tier-badge {
-        display: inline-block;
-        padding: 4px 10px;
-        border-radius: 4px;
-        font-size: 0.8rem;
-        font-weight: bold;
-        text-transform: uppercase;
-        margin-bottom: 10px;
-    }
-    .tier-1 {
-        background-color: #D1FAE5;
-        color: #065F46;
-    }
-    .tier-2 {
-        background-color: #E0F2FE;
-        color: #075985;
-    }
-    .tier-3 {
-        background-color: #FEF3C7;
-        color: #92400E;
-    }
-    .tier-4 {
-        background-color: #FEE2E2;
-        color: #B91C1C;
-    }
-    .price-tag {
-        font-size: 1.5rem;
-        font-weight: bold;
-        color: #1E3A8A;
-        margin: 10px 0;
-    }
-    .bid-card {
-        border-left: 4px solid #3B82F6;
-        background-color: #F9FAFB;
-        padding: 15px;
-        margin: 10px 0;
-        border-radius: 0 5px 5px 0;
-        box-shadow: 0 2px 4px rgba(0, 0, 0, 0.05);
-    }
-    .status-badge {
-        display: inline-block;
-        padding: 3px 8px;
-        border-radius: 4px;
-        font-size: 0.8rem;
-        font-weight: bold;
-        text-transform: uppercase;
-    }
-    .status-pending {
-        background-color: #E0F2FE;
-        color: #075985;
-    }
-    .status-approved {
-        background-color: #D1FAE5;
-        color: #065F46;
-    }
-    .status-rejected {
-        background-color: #FEE2E2;
-        color: #B91C1C;
-    }
-    .comparison-table {
-        width: 100%;
-        border-collapse: collapse;
-        margin: 15px 0;
-    }
-    .comparison-table th {
-        background-color: #E0F2FE;
-        padding: 8px;
-        text-align: left;
-        border: 1px solid #CBD5E1;
-    }
-    .comparison-table td {
-        padding: 8px;
-        border: 1px solid #CBD5E1;
-    }
-    .comparison-table tr:nth-child(even) {
-        background-color: #F8FAFC;
-    }
-    .comparison-table .best-value {
-        background-color: #D1FAE5;
-    }
-    div[data-testid="stDataFrame"] div[data-testid="stHorizontalBlock"] {
-        background-color: #F9FAFB;
-    }
-    div[data-testid="stDataFrame"] th {
-        background-color: #1E3A8A;
-        color: white;
-        font-weight: bold;
-    }
-</style>
-""", unsafe_allow_html=True)
+with span("inject css"):
+    st.markdown("""
+    <style>
+        .main-header {
+            font-size: 2.5rem;
+            color: #1E3A8A;
+            padding-bottom: 1rem;
+            border-bottom: 2px solid #E5E7EB;
+            margin-bottom: 2rem;
+        }
+        .subheader {
+            font-size: 1.5rem;
+            color: #1E3A8A;
+            padding-top: 1rem;
+            padding-bottom: 0.5rem;
+        }
+        .card {
+            background-color: #F3F4F6;
+            border-radius: 10px;
+            padding: 20px;
+            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+            margin-bottom: 20px;
+        }
+        .info-text {
+            color: #4B5563;
+        }
+        .stButton>button {
+            background-color: #1E3A8A;
+            color: white;
+            border-radius: 5px;
+            padding: 0.5rem 1rem;
+            font-weight: bold;
+        }
+        .stButton>button:hover {
+            background-color: #2563EB;
+            border-color: #2563EB;
+        }
+        .success-button>button {
+            background-color: #059669;
+        }
+        .success-button>button:hover {
+            background-color: #047857;
+        }
+        .danger-button>button {
+            background-color: #DC2626;
+            color: white;
+        }
+        .danger-button>button:hover {
+            background-color: #B91C1C;
+        }
+        .success {
+            background-color: #D1FAE5;
+            padding: 15px;
+            border-radius: 5px;
+            color: #065F46;
+            font-weight: bold;
+            margin: 10px 0;
+        }
+        .warning {
+            background-color: #FEF3C7;
+            padding: 15px;
+            border-radius: 5px;
+            color: #92400E;
+            font-weight: bold;
+            margin: 10px 0;
+        }
+        .error {
+            background-color: #FEE2E2;
+            padding: 15px;
+            border-radius: 5px;
+            color: #B91C1C;
+            font-weight: bold;
+            margin: 10px 0;
+        }
+        .tier-badge {
+            display: inline-block;
+            padding: 4px 10px;
+            border-radius: 4px;
+            font-size: 0.8rem;
+            font-weight: bold;
+            text-transform: uppercase;
+            margin-bottom: 10px;
+        }
+        .tier-1 {
+            background-color: #D1FAE5;
+            color: #065F46;
+        }
+        .tier-2 {
+            background-color: #E0F2FE;
+            color: #075985;
+        }
+        .tier-3 {
+            background-color: #FEF3C7;
+            color: #92400E;
+        }
+        .tier-4 {
+            background-color: #FEE2E2;
+            color: #B91C1C;
+        }
+        .price-tag {
+            font-size: 1.5rem;
+            font-weight: bold;
+            color: #1E3A8A;
+            margin: 10px 0;
+        }
+        .bid-card {
+            border-left: 4px solid #3B82F6;
+            background-color: #F9FAFB;
+            padding: 15px;
+            margin: 10px 0;
+            border-radius: 0 5px 5px 0;
+            box-shadow: 0 2px 4px rgba(0, 0, 0, 0.05);
+        }
+        .status-badge {
+            display: inline-block;
+            padding: 3px 8px;
+            border-radius: 4px;
+            font-size: 0.8rem;
+            font-weight: bold;
+            text-transform: uppercase;
+        }
+        .status-pending {
+            background-color: #E0F2FE;
+            color: #075985;
+        }
+        .status-approved {
+            background-color: #D1FAE5;
+            color: #065F46;
+        }
+        .status-rejected {
+            background-color: #FEE2E2;
+            color: #B91C1C;
+        }
+        .comparison-table {
+            width: 100%;
+            border-collapse: collapse;
+            margin: 15px 0;
+        }
+        .comparison-table th {
+            background-color: #E0F2FE;
+            padding: 8px;
+            text-align: left;
+            border: 1px solid #CBD5E1;
+        }
+        .comparison-table td {
+            padding: 8px;
+            border: 1px solid #CBD5E1;
+        }
+        .comparison-table tr:nth-child(even) {
+            background-color: #F8FAFC;
+        }
+        .comparison-table .best-value {
+            background-color: #D1FAE5;
+        }
+        div[data-testid="stDataFrame"] div[data-testid="stHorizontalBlock"] {
+            background-color: #F9FAFB;
+        }
+        div[data-testid="stDataFrame"] th {
+            background-color: #1E3A8A;
+            color: white;
+            font-weight: bold;
+        }
+    </style>
+    """, unsafe_allow_html=True)
 
 # Page header
 st.markdown('<div class="main-header">🔍 Bid Approval System</div>', unsafe_allow_html=True)
@@ -186,183 +200,36 @@ st.markdown('<p class="info-text">Review and approve vendor bids based on tiered
 # Initialize database connection
 @st.cache_resource
 def init_db_connection():
-    conn = sqlite3.connect('db.db', check_same_thread=False)
-
-    # Create bid_approvals table if it doesn't exist
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS bid_approvals (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            requisition_id INTEGER,
-            vendor_bid_id INTEGER,
-            approval_tier TEXT,
-            approved_by TEXT,
-            approved_at TEXT,
-            approval_notes TEXT,
-            status TEXT DEFAULT 'pending',
-            FOREIGN KEY (requisition_id) REFERENCES requisitions (id),
-            FOREIGN KEY (vendor_bid_id) REFERENCES vendor_bids (id)
-        )
-    """)
-
-    conn.commit()
-    return conn
-
-
-conn = init_db_connection()
-
-# Approval tiers definition
-APPROVAL_TIERS = [
-    {"name": "Department Manager", "min": 0, "max": 5000, "level": 1, "class": "tier-1"},
-    {"name": "Division Director", "min": 5000, "max": 25000, "level": 2, "class": "tier-2"},
-    {"name": "VP Level", "min": 25000, "max": 100000, "level": 3, "class": "tier-3"},
-    {"name": "C-Suite", "min": 100000, "max": float('inf'), "level": 4, "class": "tier-4"}
-]
-
-
-# Helper function to determine approval tier
-def get_approval_tier(amount):
-    for tier in APPROVAL_TIERS:
-        if tier["min"] <= amount < tier["max"]:
-            return tier
-    return APPROVAL_TIERS[-1]  # Default to highest tier if not found
-
-
-# Database functions
-def load_requisitions_with_bids():
-    df = pd.read_sql_query("""
-        SELECT r.id as requisition_id, r.title, r.description, r.quantity, r.unit,
-               COUNT(vb.id) as bid_count,
-               MIN(vb.bid_amount) as min_bid,
-               MAX(vb.bid_amount) as max_bid,
-               AVG(vb.bid_amount) as avg_bid,
-               (SELECT vb2.currency FROM vendor_bids vb2 WHERE vb2.requisition_id = r.id LIMIT 1) as currency
-        FROM requisitions r
-        JOIN vendor_bids vb ON r.id = vb.requisition_id
-        GROUP BY r.id
-        ORDER BY r.id DESC
-    """, conn)
-    return df
-
-
-def load_bids_for_requisition(requisition_id):
-    df = pd.read_sql_query("""
-        SELECT vb.*, v.name as vendor_name, v.email as vendor_email,
-               ba.status as approval_status, ba.approved_by, ba.approved_at, ba.approval_notes
-        FROM vendor_bids vb
-        JOIN vendors v ON vb.vendor_id = v.id
-        LEFT JOIN bid_approvals ba ON vb.id = ba.vendor_bid_id
-        WHERE vb.requisition_id = ?
-        ORDER BY vb.bid_amount ASC
-    """, conn, params=(requisition_id,))
-    return df
-
-
-def get_requisition_details(requisition_id):
-    df = pd.read_sql_query("""
-        SELECT * FROM requisitions WHERE id = ?
-    """, conn, params=(requisition_id,))
-    if df.empty:
-        return None
-    return df.iloc[0]
-
-
-def get_bid_details(bid_id):
-    df = pd.read_sql_query("""
-        SELECT vb.*, v.name as vendor_name, v.email as vendor_email
-        FROM vendor_bids vb
-        JOIN vendors v ON vb.vendor_id = v.id
-        WHERE vb.id = ?
-    """, conn, params=(bid_id,))
-    if df.empty:
-        return None
-    return df.iloc[0]
-
-
-def approve_bid(bid_id, requisition_id, approver, notes, tier_name):
-    cursor = conn.cursor()
-    approval_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    # Check if approval already exists
-    cursor.execute(
-        "SELECT id FROM bid_approvals WHERE vendor_bid_id = ?",
-        (bid_id,)
-    )
-    result = cursor.fetchone()
-
-    if result:
-        # Update existing approval
-        cursor.execute(
-            """
-            UPDATE bid_approvals 
-            SET approval_tier = ?, approved_by = ?, approved_at = ?, 
-                approval_notes = ?, status = 'approved'
-            WHERE vendor_bid_id = ?
-            """,
-            (tier_name, approver, approval_time, notes, bid_id)
-        )
-    else:
-        # Insert new approval
-        cursor.execute(
-            """
-            INSERT INTO bid_approvals 
-            (requisition_id, vendor_bid_id, approval_tier, approved_by, approved_at, approval_notes, status)
-            VALUES (?, ?, ?, ?, ?, ?, 'approved')
-            """,
-            (requisition_id, bid_id, tier_name, approver, approval_time, notes)
-        )
-
-    # Mark other bids as rejected
-    cursor.execute(
-        """
-        INSERT OR REPLACE INTO bid_approvals 
-        (requisition_id, vendor_bid_id, approval_tier, approved_by, approved_at, approval_notes, status)
-        SELECT ?, id, ?, ?, ?, 'Automatically rejected as another bid was selected', 'rejected'
-        FROM vendor_bids
-        WHERE requisition_id = ? AND id != ?
-        """,
-        (requisition_id, tier_name, approver, approval_time, requisition_id, bid_id)
-    )
-
-    conn.commit()
-    return True
-
-
-def reject_bid(bid_id, requisition_id, approver, notes, tier_name):
-    cursor = conn.cursor()
-    approval_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    # Check if approval already exists
-    cursor.execute(
-        "SELECT id FROM bid_approvals WHERE vendor_bid_id = ?",
-        (bid_id,)
-    )
-    result = cursor.fetchone()
-
-    if result:
-        # Update existing approval
-        cursor.execute(
-            """
-            UPDATE bid_approvals 
-            SET approval_tier = ?, approved_by = ?, approved_at = ?, 
-                approval_notes = ?, status = 'rejected'
-            WHERE vendor_bid_id = ?
-            """,
-            (tier_name, approver, approval_time, notes, bid_id)
-        )
-    else:
-        # Insert new approval
-        cursor.execute(
-            """
-            INSERT INTO bid_approvals 
-            (requisition_id, vendor_bid_id, approval_tier, approved_by, approved_at, approval_notes, status)
-            VALUES (?, ?, ?, ?, ?, ?, 'rejected')
-            """,
-            (requisition_id, bid_id, tier_name, approver, approval_time, notes)
-        )
-
-    conn.commit()
-    return True
-
+    return init_schema(connect())
+
+
+with span("connect"):
+    conn = init_db_connection()
+
+# Approval tiers definition, ordered by threshold
+with span("load approval tiers"):
+    approval_tiers = load_approval_tiers(conn)
+
+
+# Exchange rates used to normalise bid amounts
+with st.sidebar.expander(f"💱 Exchange Rates (to {BASE_CURRENCY})"), span("exchange rates"):
+    st.dataframe(load_fx_rates(conn), use_container_width=True, hide_index=True)
+    rates_file = st.file_uploader("Load rates from CSV", type="csv", key="fx_rates_csv")
+    if rates_file is not None and st.button("Update Rates"):
+        try:
+            updated = load_fx_rates_csv(conn, rates_file)
+            st.success(f"Updated {updated} exchange rates.")
+        except ValueError as e:
+            st.error(str(e))
+
+# Weights for the bid ranking score
+with st.sidebar.expander("⚖️ Bid Ranking Weights"):
+    ranking_weights = {
+        "price": st.slider("Price", 0.0, 1.0, DEFAULT_WEIGHTS["price"], 0.05),
+        "lead_time": st.slider("Lead Time", 0.0, 1.0, DEFAULT_WEIGHTS["lead_time"], 0.05),
+        "match_score": st.slider("Vendor Match Score", 0.0, 1.0, DEFAULT_WEIGHTS["match_score"], 0.05),
+        "win_rate": st.slider("Historical Win Rate", 0.0, 1.0, DEFAULT_WEIGHTS["win_rate"], 0.05),
+    }
 
 # Initialize session state for approvals if not already done
 if "bid_approvals" not in st.session_state:
@@ -371,11 +238,12 @@ if "bid_approvals" not in st.session_state:
 # Main layout
 tab1, tab2 = st.tabs(["📦 Requisitions with Bids", "📊 Approval Dashboard"])
 
-with tab1:
+with tab1, span("requisitions tab"):
     st.markdown('<div class="subheader">📦 Requisitions with Vendor Bids</div>', unsafe_allow_html=True)
 
     # Load requisitions with submitted bids
-    requisitions_with_bids = load_requisitions_with_bids()
+    with span("load requisitions with bids"):
+        requisitions_with_bids = load_requisitions_with_bids(conn)
 
     if requisitions_with_bids.empty:
         st.info("No requisitions with submitted bids found.")
@@ -384,14 +252,10 @@ with tab1:
         display_df = requisitions_with_bids.copy()
 
         # Add price range column
-        display_df["price_range"] = display_df.apply(
-            lambda row: f"{row['currency']} {row['min_bid']} - {row['currency']} {row['max_bid']}", axis=1
-        )
+        display_df["price_range"] = price_range(display_df["currency"], display_df["min_bid"], display_df["max_bid"])
 
         # Determine approval tier for each requisition based on max bid
-        display_df["approval_tier"] = display_df.apply(
-            lambda row: get_approval_tier(row["max_bid"])["name"], axis=1
-        )
+        display_df["approval_tier"] = resolve_approval_tiers(display_df["max_bid"], approval_tiers)["name"]
 
         # Show the requisitions table
         st.dataframe(
@@ -409,90 +273,138 @@ with tab1:
         )
 
         # Select a requisition to review
+        requisition_labels = {
+            req_id: f"REQ-{req_id:04d}: {title}"
+            for req_id, title in zip(requisitions_with_bids["requisition_id"], requisitions_with_bids["title"])
+        }
         selected_req_id = st.selectbox(
             "Select a requisition to review bids",
-            requisitions_with_bids["requisition_id"],
-            format_func=lambda
-                x: f"REQ-{x:04d}: {requisitions_with_bids[requisitions_with_bids['requisition_id'] == x].iloc[0]['title']}"
+            list(requisition_labels),
+            format_func=requisition_labels.get
         )
 
         if selected_req_id:
             # Get requisition details
-            req_details = get_requisition_details(selected_req_id)
+            with span("load and rank bids"):
+                req_details = get_requisition_details(conn, selected_req_id)
 
-            # Get all bids for this requisition
-            bids = load_bids_for_requisition(selected_req_id)
+                # Get all bids for this requisition, best ranked first
+                bids = load_bids_for_requisition(conn, selected_req_id)
+                ranking = rank_bids(load_bids_for_ranking(conn, [selected_req_id]), ranking_weights)
+                bids = bids.merge(
+                    ranking[["bid_id", "delivery_days", "match_score", "win_rate", "score", "rank"]],
+                    left_on="id", right_on="bid_id", how="left"
+                ).sort_values(["rank", "amount_base"]).reset_index(drop=True)
 
             if bids.empty:
                 st.warning(f"No bids found for requisition #{selected_req_id}.")
             else:
-                # Determine the highest bid amount for tier calculation
-                max_bid = bids["bid_amount"].max()
-                approval_tier = get_approval_tier(max_bid)
+                # Determine the highest bid amount (in the base currency) for tier calculation
+                max_bid = bids["amount_base"].max()
+                approval_tier = get_approval_tier(max_bid, approval_tiers)
 
                 # Display requisition header with approval tier
                 st.markdown(f"""
                 <div class="card">
                     <h3>REQ-{selected_req_id:04d}: {req_details['title']}</h3>
-                    <div class="tier-badge {approval_tier['class']}">
+                    <div class="tier-badge {approval_tier['css_class']}">
                         {approval_tier['name']} Approval Required
                     </div>
                     <p><strong>Description:</strong> {req_details['description']}</p>
                     <p><strong>Quantity:</strong> {req_details['quantity']} {req_details['unit']}</p>
                     <p><strong>Bids received:</strong> {len(bids)}</p>
-                    <div class="price-tag">Price Range: {bids.iloc[0]['currency']} {bids['bid_amount'].min()} - {bids['bid_amount'].max()}</div>
+                    <div class="price-tag">Price Range: {BASE_CURRENCY} {bids['amount_base'].min():,.2f} - {bids['amount_base'].max():,.2f}</div>
                 </div>
                 """, unsafe_allow_html=True)
 
                 # Create comparison table of all bids
                 st.markdown("### Bid Comparison")
 
-                # Find the best value (lowest bid)
-                lowest_bid_id = bids.loc[bids['bid_amount'].idxmin()]['id']
-
-                # Start markdown table
-                comparison_table_md = "| Vendor | Bid Amount | Delivery Time | Status |\n"
-                comparison_table_md += "|--------|------------|---------------|--------|\n"
-
-                # Add rows
-                for _, bid in bids.iterrows():
-                    # Determine if this is the best value (add * for emphasis maybe)
-                    vendor_name = f"**{bid['vendor_name']}**" if bid['id'] == lowest_bid_id else bid['vendor_name']
-
-                    # Get status
-                    status = bid['approval_status'] if not pd.isna(bid['approval_status']) else "pending"
-                    status_text = status.upper()
-
-                    # Add row to markdown
-                    comparison_table_md += f"| {vendor_name} | {bid['currency']} {bid['bid_amount']} | {bid['delivery_time']} {bid['delivery_unit']} | {status_text} |\n"
+                with span("bid comparison table"):
+                    # Start markdown table
+                    comparison_table_md = f"| Rank | Vendor | Bid Amount | {BASE_CURRENCY} Equivalent | Delivery Time | Score | Status |\n"
+                    comparison_table_md += "|------|--------|------------|------------|---------------|-------|--------|\n"
+
+                    # Build all rows at once, emphasising the best ranked bid
+                    vendor_names = bids["vendor_name"].where(bids["rank"] != 1, "**" + bids["vendor_name"] + "**")
+                    status_text = bids["approval_status"].fillna("pending").str.upper()
+                    rows = join_text(
+                        "|", bids["rank"],
+                        "|", vendor_names,
+                        "|", join_text(bids["currency"], bids["bid_amount"]),
+                        "|", bids["amount_base"].map("{:,.2f}".format),
+                        "|", join_text(bids["delivery_time"], bids["delivery_unit"]),
+                        "|", bids["score"].map("{:.2f}".format),
+                        "|", status_text, "|"
+                    )
+                    comparison_table_md += "\n".join(rows) + "\n"
+
+                    # Display table
+                    st.markdown(comparison_table_md, unsafe_allow_html=True)
+
+                st.download_button(
+                    "⬇️ Export Bid Ranking (CSV)",
+                    data=bids[[
+                        "rank", "vendor_name", "bid_amount", "currency", "amount_base", "delivery_days",
+                        "match_score", "win_rate", "score", "approval_status"
+                    ]].to_csv(index=False),
+                    file_name=f"bid_ranking_REQ-{selected_req_id:04d}.csv",
+                    mime="text/csv"
+                )
 
-                # Display table
-                st.markdown(comparison_table_md, unsafe_allow_html=True)
+                # Every assignment and approval decision on this requisition, oldest first
+                with st.expander("🕘 Status History"), span("status history"):
+                    transitions = load_requisition_transitions(conn, int(selected_req_id))
+                    if transitions.empty:
+                        st.info("No status changes recorded for this requisition yet.")
+                    else:
+                        transitions["entity"] = transitions["entity"].map(ENTITY_LABELS)
+                        transitions["transitioned_at"] = format_timestamps(transitions["transitioned_at"])
+                        st.dataframe(
+                            transitions[["transitioned_at", "entity", "vendor_name", "from_status", "to_status",
+                                         "actor"]],
+                            use_container_width=True,
+                            hide_index=True
+                        )
 
                 # Select a bid to approve
                 st.markdown("### Review and Approve Bid")
 
+                bid_labels = {
+                    bid_id: f"{vendor_name}: {currency} {amount}"
+                    for bid_id, vendor_name, currency, amount in zip(bids["id"], bids["vendor_name"], bids["currency"],
+                                                                    bids["bid_amount"])
+                }
                 selected_bid_id = st.selectbox(
                     "Select a bid to review",
-                    bids["id"],
-                    format_func=lambda
-                        x: f"{bids[bids['id'] == x].iloc[0]['vendor_name']}: {bids[bids['id'] == x].iloc[0]['currency']} {bids[bids['id'] == x].iloc[0]['bid_amount']}"
+                    list(bid_labels),
+                    format_func=bid_labels.get
                 )
 
                 if selected_bid_id:
                     selected_bid = bids[bids["id"] == selected_bid_id].iloc[0]
 
+                    # Every change the vendor made to this bid, oldest first
+                    with st.expander("🕘 Revision History"), span("bid history"):
+                        history = load_bid_history(conn, int(selected_bid_id))
+                        st.dataframe(
+                            history[["revision", "revised_at", "changed", "bid_amount", "currency", "delivery_time",
+                                     "delivery_unit", "notes"]],
+                            use_container_width=True,
+                            hide_index=True
+                        )
+
                     # Check if already approved/rejected
                     if not pd.isna(selected_bid['approval_status']):
                         if selected_bid['approval_status'] == 'approved':
                             st.success(f"""
-                            Bid from {selected_bid['vendor_name']} was APPROVED on {pd.to_datetime(selected_bid['approved_at']).strftime('%Y-%m-%d %H:%M')}.
+                            Bid from {selected_bid['vendor_name']} was APPROVED on {format_timestamp(selected_bid['approved_at'])}.
                             Approved by: {selected_bid['approved_by']}
                             Notes: {selected_bid['approval_notes']}
                             """)
                         elif selected_bid['approval_status'] == 'rejected':
                             st.error(f"""
-                            Bid from {selected_bid['vendor_name']} was REJECTED on {pd.to_datetime(selected_bid['approved_at']).strftime('%Y-%m-%d %H:%M')}.
+                            Bid from {selected_bid['vendor_name']} was REJECTED on {format_timestamp(selected_bid['approved_at'])}.
                             Rejected by: {selected_bid['approved_by']}
                             Notes: {selected_bid['approval_notes']}
                             """)
@@ -553,13 +465,15 @@ with tab1:
                                         st.session_state.bid_approvals[selected_bid_id]["notes"] = approval_notes
 
                                         # Update database
-                                        approve_bid(
-                                            selected_bid_id,
-                                            selected_req_id,
-                                            approver_name,
-                                            approval_notes,
-                                            approval_tier['name']
-                                        )
+                                        with span("approve bid"):
+                                            approve_bid(
+                                                conn,
+                                                selected_bid_id,
+                                                selected_req_id,
+                                                approver_name,
+                                                approval_notes,
+                                                approval_tier['name']
+                                            )
                                         st.session_state.bid_approvals[selected_bid_id]["processed"] = True
                                         st.rerun()
 
@@ -569,13 +483,15 @@ with tab1:
                                         st.session_state.bid_approvals[selected_bid_id]["notes"] = approval_notes
 
                                         # Update database
-                                        reject_bid(
-                                            selected_bid_id,
-                                            selected_req_id,
-                                            approver_name,
-                                            approval_notes,
-                                            approval_tier['name']
-                                        )
+                                        with span("reject bid"):
+                                            reject_bid(
+                                                conn,
+                                                selected_bid_id,
+                                                selected_req_id,
+                                                approver_name,
+                                                approval_notes,
+                                                approval_tier['name']
+                                            )
                                         st.session_state.bid_approvals[selected_bid_id]["processed"] = True
                                         st.rerun()
 
@@ -587,58 +503,34 @@ with tab1:
                             elif st.session_state.bid_approvals[selected_bid_id]["action"] == "reject":
                                 st.error(f"Bid from {selected_bid['vendor_name']} has been rejected.")
 
-                        # Show bid details if provided
-                        if selected_bid['notes']:
+                        # Show bid details if provided; notes are only read for the selected bid
+                        vendor_notes = get_bid_notes(conn, int(selected_bid_id))
+                        if vendor_notes:
                             st.markdown("### Vendor Notes")
-                            st.info(selected_bid['notes'])
+                            st.info(vendor_notes)
 
-with tab2:
+with tab2, span("approval dashboard tab"):
     st.markdown('<div class="subheader">📊 Approval Dashboard</div>', unsafe_allow_html=True)
 
-    # Get approved and pending bids from database
-    approved_bids = pd.read_sql_query("""
-        SELECT ba.*, r.title as requisition_title, vb.bid_amount, vb.currency,
-               v.name as vendor_name, v.email as vendor_email
-        FROM bid_approvals ba
-        JOIN requisitions r ON ba.requisition_id = r.id
-        JOIN vendor_bids vb ON ba.vendor_bid_id = vb.id
-        JOIN vendors v ON vb.vendor_id = v.id
-        WHERE ba.status = 'approved'
-        ORDER BY ba.approved_at DESC
-    """, conn)
-
-    pending_approvals = pd.read_sql_query("""
-        SELECT r.id as requisition_id, r.title, 
-               MAX(vb.bid_amount) as max_bid_amount,
-               MIN(vb.bid_amount) as min_bid_amount,
-               COUNT(vb.id) as bid_count,
-               vb.currency
-        FROM requisitions r
-        JOIN vendor_bids vb ON r.id = vb.requisition_id
-        LEFT JOIN bid_approvals ba ON vb.id = ba.vendor_bid_id
-        WHERE ba.id IS NULL  -- No approval records exist
-        GROUP BY r.id
-        ORDER BY max_bid_amount DESC
-    """, conn)
+    # Aggregates come straight from SQL so the page cost does not grow with history
+    with span("load dashboard aggregates"):
+        approval_summary = load_approval_summary(conn)
+        recent_approvals = load_recent_approvals(conn, limit=10)
+        pending_approvals = load_pending_by_tier(conn, per_tier=10)
 
     # Show approval statistics
-    col1, col2, col3, col4 = st.columns(4)
-
-    with col1:
-        st.metric("Total Approved Bids", len(approved_bids))
+    metric_cols = st.columns(len(approval_tiers) + 1)
+    tier_counts = approval_summary.set_index('approval_tier')['approval_count']
+    tier_amounts = approval_summary.set_index('approval_tier')['total_amount']
 
-    with col2:
-        dept_manager_count = len(approved_bids[approved_bids['approval_tier'] == 'Department Manager'])
-        st.metric("Dept. Manager Approvals", dept_manager_count)
+    with metric_cols[0]:
+        st.metric("Total Approved Bids", int(tier_counts.sum()))
+        st.caption(f"{tier_amounts.sum():,.2f} approved in total")
 
-    with col3:
-        dir_count = len(approved_bids[approved_bids['approval_tier'] == 'Division Director'])
-        st.metric("Division Director Approvals", dir_count)
-
-    with col4:
-        vp_count = len(approved_bids[approved_bids['approval_tier'] == 'VP Level'])
-        c_suite_count = len(approved_bids[approved_bids['approval_tier'] == 'C-Suite'])
-        st.metric("VP/C-Suite Approvals", vp_count + c_suite_count)
+    for col, tier_name in zip(metric_cols[1:], approval_tiers['name']):
+        with col:
+            st.metric(f"{tier_name} Approvals", int(tier_counts.get(tier_name, 0)))
+            st.caption(f"{tier_amounts.get(tier_name, 0):,.2f} approved")
 
     # Show pending approvals by tier
     st.markdown("### Pending Approvals by Tier")
@@ -647,63 +539,47 @@ with tab2:
         st.info("No requisitions pending approval.")
     else:
         # Create tier containers
-        tier_cols = st.columns(4)
-
-        # Track requisitions by tier
-        tier_requisitions = {
-            "Department Manager": [],
-            "Division Director": [],
-            "VP Level": [],
-            "C-Suite": []
-        }
-
-        # Sort requisitions into tiers
-        for _, row in pending_approvals.iterrows():
-            tier = get_approval_tier(row['max_bid_amount'])
-            tier_requisitions[tier['name']].append({
-                "id": row['requisition_id'],
-                "title": row['title'],
-                "max_amount": row['max_bid_amount'],
-                "min_amount": row['min_bid_amount'],
-                "currency": row['currency'],
-                "bid_count": row['bid_count']
-            })
-
-        # Display by tier
-        for i, (tier_name, tier_class) in enumerate([
-            ("Department Manager", "tier-1"),
-            ("Division Director", "tier-2"),
-            ("VP Level", "tier-3"),
-            ("C-Suite", "tier-4")
-        ]):
-            with tier_cols[i]:
-                st.markdown(
-                    f'<div class="tier-badge {tier_class}" style="width:100%; text-align:center;">{tier_name}</div>',
-                    unsafe_allow_html=True)
-
-                if not tier_requisitions[tier_name]:
-                    st.info(f"No approvals needed")
-                else:
-                    for req in tier_requisitions[tier_name]:
-                        st.markdown(f"""
-                        <div class="bid-card">
-                            <strong>REQ-{req['id']:04d}:</strong> {req['title'][:30]}...
-                            <div>{req['currency']} {req['min_amount']} - {req['max_amount']}</div>
-                            <div>{req['bid_count']} bids</div>
-                        </div>
-                        """, unsafe_allow_html=True)
+        with span("render pending by tier"):
+            tier_cols = st.columns(len(approval_tiers))
+            tier_requisitions = dict(list(pending_approvals.groupby("tier_name", sort=False)))
+
+            # Display by tier
+            for i, tier in enumerate(approval_tiers.itertuples()):
+                with tier_cols[i]:
+                    st.markdown(
+                        f'<div class="tier-badge {tier.css_class}" style="width:100%; text-align:center;">{tier.name}</div>',
+                        unsafe_allow_html=True)
+
+                    if tier.name not in tier_requisitions:
+                        st.info(f"No approvals needed")
+                    else:
+                        tier_rows = tier_requisitions[tier.name]
+                        for req in tier_rows.itertuples():
+                            # Unpriced requisitions have no bid with an FX rate yet
+                            amounts = ("no FX rate for these bids" if pd.isna(req.max_bid_amount)
+                                       else f"{req.currency} {req.min_bid_amount} - {req.max_bid_amount}")
+                            st.markdown(f"""
+                            <div class="bid-card">
+                                <strong>REQ-{req.requisition_id:04d}:</strong> {req.title[:30]}...
+                                <div>{amounts}</div>
+                                <div>{req.bid_count} bids</div>
+                            </div>
+                            """, unsafe_allow_html=True)
+
+                        tier_total = int(tier_rows['tier_total'].iloc[0])
+                        if tier_total > len(tier_rows):
+                            st.caption(f"Showing {len(tier_rows)} of {tier_total} requisitions")
 
     # Recent approvals
     st.markdown("### Recent Bid Approvals")
 
-    if approved_bids.empty:
+    if recent_approvals.empty:
         st.info("No approved bids yet.")
     else:
         # Format for display
-        display_approved = approved_bids.copy()
-        display_approved["approved_at"] = pd.to_datetime(display_approved["approved_at"]).dt.strftime("%Y-%m-%d %H:%M")
-        display_approved["bid_display"] = display_approved.apply(lambda row: f"{row['currency']} {row['bid_amount']}",
-                                                                 axis=1)
+        display_approved = recent_approvals.copy()
+        display_approved["approved_at"] = format_timestamps(display_approved["approved_at"])
+        display_approved["bid_display"] = join_text(display_approved["currency"], display_approved["bid_amount"])
 
         # Show table of recent approvals
         st.dataframe(
@@ -717,7 +593,9 @@ with tab2:
                     "approved_by": "Approved By",
                     "approved_at": "Date"
                 }
-            ).head(10),
+            ),
             use_container_width=True,
             height=300
-        )
\ No newline at end of file
+        )
+
+end_page()
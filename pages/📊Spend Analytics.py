@@ -0,0 +1,169 @@
+import streamlit as st
+import pandas as pd
+from procurement.analytics import analytics_connect, analytics_engine, load_vendor_win_rates
+from procurement.db import connect, init_schema
+from procurement.fx import BASE_CURRENCY
+from procurement.spend import load_spend, load_spend_yoy, spend_month_range
+from procurement.tracing import end_page, span, start_page
+
+TOP_VENDORS = 15
+
+start_page("Spend Analytics")
+
+st.set_page_config(page_title="📊 Spend Analytics", page_icon="📊", layout="wide")
+
+st.title("📊 Spend Analytics")
+st.caption(f"Approved bid spend by month, vendor, approval tier and currency. Totals are in {BASE_CURRENCY} "
+           "at the FX rate of each bid.")
+
+
+@st.cache_resource
+def init_db_connection():
+    return init_schema(connect())
+
+
+# Reports run on a separate read-only connection, DuckDB when PROCUREMENT_ANALYTICS=duckdb
+@st.cache_resource
+def init_analytics_connection():
+    return analytics_connect()
+
+
+with span("connect"):
+    conn = init_db_connection()
+    analytics = init_analytics_connection()
+st.caption(f"Analytics engine: {analytics_engine(analytics)}")
+
+first_month, last_month = spend_month_range(conn)
+if first_month is None:
+    st.info("No bid has been approved yet.")
+    end_page()
+    st.stop()
+
+with span("load spend filters"):
+    months = pd.period_range(first_month, last_month, freq="M").strftime("%Y-%m").tolist()
+    tiers = load_spend(analytics, by=("tier",))["tier"].tolist()
+    currencies = load_spend(analytics, by=("currency",))["currency"].tolist()
+
+col1, col2, col3 = st.columns([2, 1, 1])
+with col1:
+    start_month, end_month = st.select_slider(
+        "Approved between", options=months, value=(months[max(len(months) - 12, 0)], months[-1])
+    )
+with col2:
+    tier = st.selectbox("Approval tier", [None, *tiers],
+                        format_func=lambda t: "All tiers" if t is None else t or "(none)")
+with col3:
+    currency = st.selectbox("Bid currency", [None, *currencies],
+                            format_func=lambda c: "All currencies" if c is None else c)
+
+filters = {"start_month": start_month, "end_month": end_month, "tier": tier, "currency": currency}
+
+with span("load spend overview"):
+    totals = load_spend(analytics, by=(), **filters)
+    vendor_count = len(load_spend(analytics, by=("vendor_id",), **filters))
+
+approvals = int(totals["approvals"].fillna(0).iloc[0])
+spend = float(totals["amount_base"].fillna(0).iloc[0])
+kpi1, kpi2, kpi3, kpi4 = st.columns(4)
+kpi1.metric("Approved Spend", f"{spend:,.2f} {BASE_CURRENCY}")
+kpi2.metric("Approved Bids", f"{approvals:,}")
+kpi3.metric("Average Bid", f"{spend / approvals:,.2f} {BASE_CURRENCY}" if approvals else "–")
+kpi4.metric("Vendors Paid", f"{vendor_count:,}")
+
+tab1, tab2, tab3, tab4 = st.tabs(["📅 Monthly Spend", "🏢 Vendors", "💱 Currencies", "📈 Year over Year"])
+
+with tab1:
+    with span("load monthly spend"):
+        monthly = load_spend(analytics, by=("month", "tier"), **filters)
+    if monthly.empty:
+        st.info("No approved spend in the selected period.")
+    else:
+        monthly["tier"] = monthly["tier"].replace("", "(none)")
+        by_tier = monthly.pivot_table(index="month", columns="tier", values="amount_base", aggfunc="sum").fillna(0)
+        st.subheader(f"Monthly spend by approval tier ({BASE_CURRENCY})")
+        st.bar_chart(by_tier)
+
+with tab2:
+    with span("load vendor spend"):
+        vendors = load_spend(analytics, by=("vendor_id",), **filters)
+    if vendors.empty:
+        st.info("No approved spend in the selected period.")
+    else:
+        st.subheader(f"Top {TOP_VENDORS} vendors")
+        top = vendors.head(TOP_VENDORS)
+        st.bar_chart(top.set_index("vendor_name")["amount_base"], horizontal=True)
+        st.dataframe(
+            top,
+            column_config={
+                "vendor_id": None,
+                "vendor_name": "Vendor",
+                "approvals": "Approved Bids",
+                "amount": None,
+                "amount_base": st.column_config.NumberColumn(f"Spend ({BASE_CURRENCY})", format="%.2f"),
+            },
+            use_container_width=True,
+            hide_index=True
+        )
+
+        vendor_names = dict(zip(vendors["vendor_id"], vendors["vendor_name"]))
+        vendor_id = st.selectbox("Drill down into vendor", list(vendor_names), format_func=vendor_names.get)
+        with span("load vendor monthly spend"):
+            vendor_monthly = load_spend(analytics, by=("month",), **{**filters, "vendor_id": vendor_id})
+        st.bar_chart(vendor_monthly.set_index("month").sort_index()["amount_base"], y_label=f"Spend ({BASE_CURRENCY})")
+
+    st.subheader("Vendor win rates")
+    st.caption("Share of each vendor's decided bids that were approved, for decisions in the selected months.")
+    with span("load vendor win rates"):
+        win_rates = load_vendor_win_rates(
+            analytics, f"{start_month}-01", (pd.Period(end_month, freq="M") + 1).strftime("%Y-%m-01"),
+            min_decisions=3
+        )
+    if win_rates.empty:
+        st.info("No vendor has three or more decided bids in the selected period.")
+    else:
+        st.dataframe(
+            win_rates,
+            column_config={
+                "vendor_id": None,
+                "vendor_name": "Vendor",
+                "wins": "Approved",
+                "decisions": "Decided",
+                "won_amount_base": st.column_config.NumberColumn(f"Won ({BASE_CURRENCY})", format="%.2f"),
+                "win_rate": st.column_config.ProgressColumn("Win Rate", format="%.2f", min_value=0, max_value=1),
+            },
+            use_container_width=True,
+            hide_index=True
+        )
+
+with tab3:
+    with span("load currency spend"):
+        by_currency = load_spend(analytics, by=("currency",), **filters)
+    if by_currency.empty:
+        st.info("No approved spend in the selected period.")
+    else:
+        st.dataframe(
+            by_currency,
+            column_config={
+                "currency": "Currency",
+                "approvals": "Approved Bids",
+                "amount": st.column_config.NumberColumn("Spend (bid currency)", format="%.2f"),
+                "amount_base": st.column_config.NumberColumn(f"Spend ({BASE_CURRENCY})", format="%.2f"),
+            },
+            use_container_width=True,
+            hide_index=True
+        )
+
+with tab4:
+    years = sorted({int(month[:4]) for month in months}, reverse=True)
+    year = st.selectbox("Year", years)
+    with span("load spend yoy"):
+        yoy = load_spend_yoy(analytics, year, tier=tier, currency=currency)
+    yoy = yoy.rename(columns={"amount_base": str(year), "prior_amount_base": str(year - 1)}).set_index("month")
+    st.line_chart(yoy[[str(year), str(year - 1)]], y_label=f"Spend ({BASE_CURRENCY})")
+    st.dataframe(
+        yoy,
+        column_config={"change_pct": st.column_config.NumberColumn("Change", format="%.1f%%")},
+        use_container_width=True
+    )
+
+end_page()
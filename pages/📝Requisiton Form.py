@@ -1,41 +1,31 @@
 import streamlit as st
-import sqlite3
 from datetime import datetime, date
-from openai import OpenAI
+from procurement.db import connect
+from procurement.requisitions import init_requisitions, insert_requisition
+from procurement.tracing import end_page, span, start_page
+
+start_page("Requisition Form")
 
 # --- OpenAI setup ---
-client = OpenAI()
+@st.cache_resource
+def get_openai_client():
+    # openai is slow to import, so it is loaded on the first generation request
+    from openai import OpenAI
+    return OpenAI()
 
 # --- DB setup ---
 def init_db():
-    conn = sqlite3.connect('../db.db')
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS requisitions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT,
-            description TEXT,
-            quantity INTEGER,
-            unit TEXT,
-            request_date TEXT,
-            generated_by_ai BOOLEAN,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    conn.commit()
+    conn = connect()
+    init_requisitions(conn)
     conn.close()
 
-def insert_requisition(title, description, quantity, unit, request_date, generated_by_ai):
-    conn = sqlite3.connect('db.db')
-    c = conn.cursor()
-    c.execute('''
-        INSERT INTO requisitions (title, description, quantity, unit, request_date, generated_by_ai)
-        VALUES (?, ?, ?, ?, ?, ?)
-    ''', (title, description, quantity, unit, request_date, generated_by_ai))
-    conn.commit()
+def save_requisition(title, description, quantity, unit, request_date, generated_by_ai, department=None):
+    conn = connect()
+    insert_requisition(conn, title, description, quantity, unit, request_date, generated_by_ai, department)
     conn.close()
 
-init_db()
+with span("connect"):
+    init_db()
 
 # --- Streamlit UI ---
 st.set_page_config(page_title="Procurement Requisition Portal", layout="wide")
@@ -45,7 +35,7 @@ st.markdown("Use LLM to generate or manually fill the requisition form for mater
 tab1, tab2 = st.tabs(["✨ Auto-generate with AI", "✍️ Manual Entry"])
 
 # --- Tab 1: AI-generated form ---
-with tab1:
+with tab1, span("ai tab"):
     st.subheader("LLM-assisted Requisition Generation")
     user_input = st.text_area("Describe your requisition needs:",
                               placeholder="e.g. 100 boxes of Nitrile Gloves for warehouse staff use, available in 10 days.")
@@ -54,16 +44,17 @@ with tab1:
         if not user_input.strip():
             st.warning("Please enter a description first.")
         else:
-            response = client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a structured requisition generator. Return only structured data in this exact format, without inferring dates. Always use today's date."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"""
+            with span("llm generate requisition"):
+                response = get_openai_client().chat.completions.create(
+                    model="gpt-4",
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "You are a structured requisition generator. Return only structured data in this exact format, without inferring dates. Always use today's date."
+                        },
+                        {
+                            "role": "user",
+                            "content": f"""
                 Please generate a structured requisition in this exact format, using today's date (not inferred) and substituting placeholders with information from the request. Do not infer dates based on availability or urgency. Always default dates to the current day.
 
                 Requisition No: [leave blank]  
@@ -82,10 +73,10 @@ with tab1:
 
                 Request: {user_input}
                 """
-                    }
-                ],
-                temperature=0
-            )
+                        }
+                    ],
+                    temperature=0
+                )
             st.session_state.generated_text = response.choices[0].message.content
 
     if "generated_text" in st.session_state:
@@ -121,29 +112,36 @@ with tab1:
             st.session_state["request_date"] = request_date
 
             if confirm:
-                insert_requisition(
-                    title=title,
-                    description=description,
-                    quantity=quantity,
-                    unit=unit,
-                    request_date=st.session_state["request_date"],
-                    generated_by_ai=True
-                )
+                with span("save requisition"):
+                    save_requisition(
+                        title=title,
+                        description=description,
+                        quantity=quantity,
+                        unit=unit,
+                        request_date=st.session_state["request_date"],
+                        generated_by_ai=True,
+                        department=department.strip()
+                    )
                 st.success("Requisition submitted and saved ✅")
                 del st.session_state["generated_text"]
                 del st.session_state["request_date"]
 
 # --- Tab 2: Manual form ---
-with tab2:
+with tab2, span("manual tab"):
     st.subheader("Manual Requisition Form")
     with st.form("manual_form"):
         title = st.text_input("Title")
         description = st.text_area("Description")
         quantity = st.number_input("Quantity", min_value=1, step=1)
         unit = st.text_input("Unit", value="pcs")
+        department = st.text_input("Department")
         request_date = st.date_input("Required By Date", value=date.today())
         submitted = st.form_submit_button("📥 Submit Requisition")
 
         if submitted:
-            insert_requisition(title, description, quantity, unit, request_date.strftime("%Y-%m-%d"), False)
-            st.success("Requisition submitted and saved ✅")
\ No newline at end of file
+            with span("save requisition"):
+                save_requisition(title, description, quantity, unit, request_date.strftime("%Y-%m-%d"), False,
+                                 department.strip())
+            st.success("Requisition submitted and saved ✅")
+
+end_page()
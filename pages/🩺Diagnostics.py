@@ -0,0 +1,141 @@
+import streamlit as st
+import pandas as pd
+from procurement.profiling import (
+    LARGE_TABLE_ROWS, PROFILE_ENABLED, SLOW_QUERY_LOG, SLOW_QUERY_MS, load_slow_queries, query_stats,
+    reset_query_stats
+)
+from procurement.tracing import (
+    METRICS_FILE, TRACE_ENABLED, metrics_endpoint, prometheus_text, reset_spans, span_summary
+)
+
+st.set_page_config(page_title="Diagnostics", page_icon="🩺", layout="wide")
+
+st.title("🩺 Diagnostics")
+
+if not PROFILE_ENABLED:
+    st.info("Query profiling is off. Start Streamlit with `PROCUREMENT_PROFILE=1` to record database timings.")
+
+tab1, tab2, tab3 = st.tabs(["⏱️ Query Statistics", "🐢 Slow Queries", "📈 Page Timings"])
+
+with tab1:
+    st.caption("Every statement run by this server process since it started, slowest total time first.")
+
+    stats = query_stats()
+    if stats.empty:
+        st.info("No queries recorded yet.")
+    else:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Statements", len(stats))
+        col2.metric("Calls", int(stats["calls"].sum()))
+        col3.metric("Total Time", f"{stats['total_ms'].sum() / 1000:,.2f} s")
+
+        st.dataframe(
+            stats,
+            column_config={
+                "sql": st.column_config.TextColumn("SQL", width="large"),
+                "calls": "Calls",
+                "total_ms": st.column_config.NumberColumn("Total (ms)", format="%.1f"),
+                "mean_ms": st.column_config.NumberColumn("Mean (ms)", format="%.2f"),
+                "max_ms": st.column_config.NumberColumn("Max (ms)", format="%.2f"),
+                "rows": "Rows",
+                "callers": st.column_config.TextColumn("Page / Function", width="large"),
+            },
+            use_container_width=True,
+            hide_index=True
+        )
+
+    if st.button("🔄 Reset Statistics"):
+        reset_query_stats()
+        st.rerun()
+
+with tab2:
+    st.caption(f"Statements slower than {SLOW_QUERY_MS:g} ms, logged to `{SLOW_QUERY_LOG}`. "
+               f"Full scans of tables above {LARGE_TABLE_ROWS:,} rows are flagged.")
+
+    entries = load_slow_queries()
+    if not entries:
+        st.info("The slow-query log is empty.")
+    else:
+        scans_only = st.checkbox("Only show full scans of large tables")
+        if scans_only:
+            entries = [e for e in entries if e["large_scans"]]
+
+        log = pd.DataFrame(entries)
+        if not log.empty:
+            log["flags"] = [", ".join(f"SCAN {s['table']} ({s['rows']:,} rows)" for s in scans)
+                            for scans in log["large_scans"]]
+            st.dataframe(
+                log[["logged_at", "duration_ms", "rows", "page", "function", "flags", "sql"]],
+                column_config={
+                    "logged_at": "Logged",
+                    "duration_ms": st.column_config.NumberColumn("Duration (ms)", format="%.1f"),
+                    "rows": "Rows",
+                    "page": "Page",
+                    "function": "Function",
+                    "flags": "Flags",
+                    "sql": st.column_config.TextColumn("SQL", width="large"),
+                },
+                use_container_width=True,
+                hide_index=True
+            )
+
+            st.markdown("### Query Plans")
+            for entry in entries[:20]:
+                label = f"{entry['duration_ms']:,.1f} ms · {entry['function'] or entry['sql'][:60]}"
+                if entry["large_scans"]:
+                    label = "⚠️ " + label
+                with st.expander(label):
+                    st.code(entry["sql"], language="sql")
+                    st.markdown(f"**Parameters:** `{entry['params']}`")
+                    st.markdown(f"**Page:** {entry['page'] or '-'}  \n**Rows:** {entry['rows']}")
+                    st.code("\n".join(entry["plan"]), language="text")
+
+with tab3:
+    if not TRACE_ENABLED:
+        st.info("Page tracing is turned off by `PROCUREMENT_TRACE=0`.")
+
+    st.caption("Named spans from every page rerun served by this process. "
+               "Percentiles are estimated from histogram buckets.")
+
+    spans = span_summary()
+    if spans.empty:
+        st.info("No page reruns recorded yet.")
+    else:
+        # CPU per page comes from the whole-rerun span so nested spans are not double counted
+        reruns = spans[spans["span"] == "rerun"].set_index("page")
+        if not reruns.empty:
+            st.markdown("### CPU Time by Page")
+            st.bar_chart(reruns["cpu_s"])
+
+        selected_page = st.selectbox("Page", ["All pages"] + sorted(spans["page"].unique()))
+        if selected_page != "All pages":
+            spans = spans[spans["page"] == selected_page]
+
+        st.dataframe(
+            spans,
+            column_config={
+                "page": "Page",
+                "span": "Span",
+                "calls": "Calls",
+                "total_s": st.column_config.NumberColumn("Total (s)", format="%.3f"),
+                "mean_ms": st.column_config.NumberColumn("Mean (ms)", format="%.1f"),
+                "p50_ms": st.column_config.NumberColumn("p50 (ms)", format="%.1f"),
+                "p95_ms": st.column_config.NumberColumn("p95 (ms)", format="%.1f"),
+                "cpu_s": st.column_config.NumberColumn("CPU (s)", format="%.3f"),
+            },
+            use_container_width=True,
+            hide_index=True
+        )
+
+    endpoint = metrics_endpoint()
+    if endpoint:
+        st.markdown(f"Prometheus endpoint: `{endpoint}`")
+    if METRICS_FILE:
+        st.markdown(f"Prometheus file: `{METRICS_FILE}`")
+
+    with st.expander("Prometheus Export"):
+        st.code(prometheus_text(), language="text")
+
+    if st.button("🔄 Reset Timings"):
+        reset_spans()
+        st.rerun()
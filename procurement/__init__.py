@@ -0,0 +1 @@
+"""Shared logic for the Meridian Manufacturing procurement pages."""
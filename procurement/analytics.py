@@ -0,0 +1,111 @@
+"""Read-only engine for the heavy report pages.
+
+Spend, SLA and vendor win-rate reports run on their own read-only connection
+from ``analytics_connect`` instead of the pages' write connection. By default
+that is SQLite opened with ``mode=ro``. ``init_schema`` puts the database in
+WAL mode, so these reads never block a bid or approval from committing, and
+a commit never blocks a report.
+
+With ``PROCUREMENT_ANALYTICS=duckdb`` and the optional ``duckdb`` package
+(``pip install -r requirements-analytics.txt``), db.db is attached read-only
+through DuckDB's SQLite scanner instead, so the reports run as columnar,
+multi-threaded scans. The first connection downloads DuckDB's sqlite
+extension, so it needs network access once. When duckdb or the extension is
+missing, the SQLite connection is used. Report SQL sticks to what both
+engines accept, and ``read_frame`` runs it on either.
+"""
+import os
+from datetime import date, datetime
+
+import pandas as pd
+
+from procurement.db import DB_PATH, connect
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+ANALYTICS_ENGINES = ("sqlite", "duckdb")
+ANALYTICS_ENGINE = os.environ.get("PROCUREMENT_ANALYTICS", "sqlite")
+
+
+def duckdb_available():
+    return duckdb is not None
+
+
+def _attach_duckdb(path):
+    conn = duckdb.connect()
+    try:
+        # INSTALL is a no-op once the extension is cached; it needs network access the first time
+        conn.execute("INSTALL sqlite")
+        conn.execute("LOAD sqlite")
+        quoted = path.replace("'", "''")
+        conn.execute(f"ATTACH '{quoted}' AS procurement (TYPE sqlite, READ_ONLY)")
+        conn.execute("USE procurement")
+    except duckdb.Error:
+        conn.close()
+        return None
+    return conn
+
+
+def analytics_connect(path=None, engine=None):
+    """A read-only connection for reports: DuckDB when asked for and available, else SQLite."""
+    engine = engine or ANALYTICS_ENGINE
+    if engine not in ANALYTICS_ENGINES:
+        raise ValueError(f"Unknown analytics engine: {engine}")
+    path = os.path.abspath(path or DB_PATH)
+    if engine == "duckdb" and duckdb is not None:
+        conn = _attach_duckdb(path)
+        if conn is not None:
+            return conn
+    return connect(path, read_only=True)
+
+
+def analytics_engine(conn):
+    return "duckdb" if duckdb is not None and isinstance(conn, duckdb.DuckDBPyConnection) else "sqlite"
+
+
+def read_frame(conn, sql, params=()):
+    # pandas only drives sqlite3 connections; DuckDB gets its own cursor per call since pages run on many threads
+    if analytics_engine(conn) == "duckdb":
+        return conn.cursor().execute(sql, list(params)).df()
+    return pd.read_sql_query(sql, conn, params=params)
+
+
+def _timestamp(value):
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, date):
+        return value.strftime("%Y-%m-%d")
+    return str(value)
+
+
+def load_vendor_win_rates(conn, start=None, end=None, min_decisions=1):
+    """Approved and rejected bids per vendor, decided in [start, end), highest win rate first.
+
+    ``win_rate`` is wins over decisions. This scans the whole decision history,
+    so it is the report that gains most from the DuckDB engine.
+    """
+    clauses, params = ["ba.status IN ('approved', 'rejected')"], []
+    if start is not None:
+        clauses.append("ba.approved_at >= ?")
+        params.append(_timestamp(start))
+    if end is not None:
+        clauses.append("ba.approved_at < ?")
+        params.append(_timestamp(end))
+    params.append(min_decisions)
+    df = read_frame(conn, f"""
+        SELECT vb.vendor_id, v.name as vendor_name,
+               SUM(CASE WHEN ba.status = 'approved' THEN 1 ELSE 0 END) as wins,
+               COUNT(*) as decisions,
+               SUM(CASE WHEN ba.status = 'approved' THEN vb.amount_base ELSE 0 END) as won_amount_base
+        FROM bid_approvals ba
+        JOIN vendor_bids vb ON vb.id = ba.vendor_bid_id
+        JOIN vendors v ON v.id = vb.vendor_id
+        WHERE {" AND ".join(clauses)}
+        GROUP BY vb.vendor_id, v.name
+        HAVING COUNT(*) >= ?
+    """, params)
+    df["win_rate"] = df["wins"] / df["decisions"]
+    return df.sort_values(["win_rate", "decisions"], ascending=False, ignore_index=True)
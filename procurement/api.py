@@ -0,0 +1,460 @@
+"""JSON API over the procurement data for ERP integrations.
+
+    python -m procurement.api --port 8600
+    PROCUREMENT_DB=/srv/procurement.db PROCUREMENT_API_TOKEN=secret python -m procurement.api
+
+Runs on tornado, which ships with Streamlit, and writes through the same
+functions as the pages, so a request costs one query instead of a full
+script rerun.
+
+    GET   /api/requisitions[/<id>]     POST, PATCH  /api/requisitions
+    GET   /api/vendors[/<id>]
+    GET   /api/assignments[/<id>]      POST, PATCH  /api/assignments
+    GET   /api/bids[/<id>]             POST         /api/bids
+    GET   /api/approvals[/<id>]        POST         /api/approvals
+    GET   /api/changes?since=<seq>
+    GET   /api/transitions?requisition_id=<id>
+    GET   /api/transitions?entity=<table>&entity_id=<id>
+    GET   /api/transitions?start=<ts>&end=<ts>[&entity=<table>]
+
+Lists take ``page`` and ``per_page`` plus the filters named in each handler's
+``filters``. Every GET carries an ETag built from the change log, so a poll
+with ``If-None-Match`` gets a 304 without running the query. Writes take
+``{"items": [...]}`` and commit the whole batch in one transaction. If any
+item is invalid, nothing is written and the error names that item.
+"""
+import argparse
+import hmac
+import json
+import os
+import sqlite3
+from datetime import date, datetime
+
+import tornado.ioloop
+import tornado.web
+
+from procurement.approvals import approve_bid, reject_bid
+from procurement.assignments import save_vendor_matches, update_vendor_match_status
+from procurement.bids import save_bid
+from procurement.changes import TRACKED_TABLES, changes_since, last_change
+from procurement.db import connect, init_schema
+from procurement.requisitions import insert_requisition, update_requisition
+from procurement.tiers import get_requisition_tier, load_approval_tiers
+from procurement.transitions import (TRACKED_ENTITIES, load_entity_transitions, load_requisition_transitions,
+                                     load_transitions_between)
+
+API_PORT = int(os.environ.get("PROCUREMENT_API_PORT", "8600"))
+API_TOKEN = os.environ.get("PROCUREMENT_API_TOKEN")
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+MAX_BATCH = 1000
+
+ASSIGNMENT_STATUSES = ("pending", "approved", "rejected")
+DELIVERY_UNITS = ("days", "weeks", "months")
+
+
+def _rows(cursor):
+    columns = [c[0] for c in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+class BaseHandler(tornado.web.RequestHandler):
+    def initialize(self, conn):
+        self.conn = conn
+
+    def prepare(self):
+        if API_TOKEN:
+            supplied = self.request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+            if not hmac.compare_digest(supplied.encode(), API_TOKEN.encode()):
+                raise tornado.web.HTTPError(401, "Missing or invalid API token")
+        # Writes go to the collection URL; single rows are read-only
+        if self.path_args and self.request.method != "GET":
+            raise tornado.web.HTTPError(405, "Send writes to the collection URL with an items list")
+
+    def set_default_headers(self):
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+
+    def compute_etag(self):
+        # ETags come from the change log before the query runs; see respond_unless_unchanged
+        return None
+
+    def write_error(self, status_code, **kwargs):
+        # HTTPErrors raised by the handlers carry a message for the client; anything else stays generic
+        error = kwargs.get("exc_info", (None, None))[1]
+        message = error.log_message if isinstance(error, tornado.web.HTTPError) and error.log_message else None
+        self.finish({"error": message or self._reason})
+
+    def respond_unless_unchanged(self, tables):
+        """Sets the ETag and returns True when the client's copy is still current."""
+        # Read before the query: a write landing in between only makes the next poll refetch
+        self.set_header("Etag", f'"{last_change(self.conn, tables)}"')
+        if self.check_etag_header():
+            self.set_status(304)
+            return True
+        return False
+
+    def send(self, body, status=200):
+        self.set_status(status)
+        self.finish(json.dumps(body, default=str))
+
+    def items(self):
+        try:
+            body = json.loads(self.request.body or b"null")
+        except ValueError:
+            raise tornado.web.HTTPError(400, "Request body is not valid JSON")
+        items = body.get("items") if isinstance(body, dict) else body
+        if not isinstance(items, list) or not items:
+            raise tornado.web.HTTPError(400, 'Expected {"items": [...]} with at least one item')
+        if len(items) > MAX_BATCH:
+            raise tornado.web.HTTPError(413, f"At most {MAX_BATCH} items per request")
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                raise tornado.web.HTTPError(400, f"Item {index} is not an object")
+        return items
+
+    def batch(self, write, status=200):
+        """Runs ``write(index, item)`` for every item in one transaction and responds with the results."""
+        items = self.items()
+        try:
+            with self.conn:
+                results = [write(index, item) for index, item in enumerate(items)]
+        except sqlite3.OperationalError as e:
+            raise tornado.web.HTTPError(503, f"Database unavailable: {e}")
+        self.send({"items": results, "count": len(results)}, status)
+
+    def exists(self, table, row_id):
+        return self.conn.execute(f"SELECT 1 FROM {table} WHERE id = ?", (row_id,)).fetchone() is not None
+
+
+def boolean(value):
+    # bool() would turn the string "false" into True, so only these spellings are accepted
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+        return value.strip().lower() == "true"
+    raise ValueError(f"not a boolean: {value!r}")
+
+
+def field(item, index, name, kind, default=None, required=False, choices=None):
+    """Reads and converts one field of a batch item, naming the item in any error."""
+    value = item.get(name, default)
+    if value is None:
+        if required:
+            raise tornado.web.HTTPError(400, f"Item {index}: '{name}' is required")
+        return None
+    try:
+        value = kind(value)
+    except (TypeError, ValueError):
+        raise tornado.web.HTTPError(400, f"Item {index}: '{name}' must be {kind.__name__}")
+    if choices and value not in choices:
+        raise tornado.web.HTTPError(400, f"Item {index}: '{name}' must be one of {', '.join(choices)}")
+    return value
+
+
+class CollectionHandler(BaseHandler):
+    """Paginated, filterable reads of one table; subclasses add the writes."""
+
+    table = None
+    # Query parameter -> column, all matched for equality
+    filters = {}
+    # Tables whose changes invalidate this resource's ETag
+    tables = ()
+
+    def get(self, row_id=None):
+        if self.respond_unless_unchanged(self.tables or (self.table,)):
+            return
+
+        if row_id is not None:
+            cursor = self.conn.execute(f"SELECT * FROM {self.table} WHERE id = ?", (int(row_id),))
+            rows = _rows(cursor)
+            if not rows:
+                raise tornado.web.HTTPError(404, f"No {self.table} row with id {row_id}")
+            self.send(rows[0])
+            return
+
+        try:
+            page = max(int(self.get_query_argument("page", "1")), 1)
+            per_page = min(max(int(self.get_query_argument("per_page", str(DEFAULT_PAGE_SIZE))), 1), MAX_PAGE_SIZE)
+        except ValueError:
+            raise tornado.web.HTTPError(400, "page and per_page must be integers")
+
+        clauses, params = [], []
+        for argument, column in self.filters.items():
+            value = self.get_query_argument(argument, None)
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        total = self.conn.execute(f"SELECT COUNT(*) FROM {self.table}{where}", params).fetchone()[0]
+        # Oldest first by id, so rows added while a client pages through never shift earlier pages
+        cursor = self.conn.execute(
+            f"SELECT * FROM {self.table}{where} ORDER BY id LIMIT ? OFFSET ?",
+            (*params, per_page, (page - 1) * per_page)
+        )
+        self.send({
+            "items": _rows(cursor),
+            "page": page,
+            "per_page": per_page,
+            "total": total,
+            "next_page": page + 1 if page * per_page < total else None,
+        })
+
+
+class RequisitionsHandler(CollectionHandler):
+    table = "requisitions"
+    filters = {"unit": "unit", "request_date": "request_date", "department": "department"}
+
+    def post(self):
+        def create(index, item):
+            return {"id": insert_requisition(
+                self.conn,
+                field(item, index, "title", str, required=True),
+                field(item, index, "description", str, ""),
+                field(item, index, "quantity", int, required=True),
+                field(item, index, "unit", str, ""),
+                field(item, index, "request_date", str, date.today().isoformat()),
+                field(item, index, "generated_by_ai", boolean, False),
+                field(item, index, "department", str),
+                commit=False
+            )}
+
+        self.batch(create, status=201)
+
+    def patch(self):
+        def update(index, item):
+            record_id = field(item, index, "id", int, required=True)
+            rows = _rows(self.conn.execute("SELECT * FROM requisitions WHERE id = ?", (record_id,)))
+            if not rows:
+                raise tornado.web.HTTPError(404, f"Item {index}: no requisition with id {record_id}")
+            # Fields left out of the item keep their stored values
+            current = rows[0]
+            update_requisition(
+                self.conn,
+                record_id,
+                field(item, index, "title", str, current["title"]),
+                field(item, index, "description", str, current["description"]),
+                field(item, index, "quantity", int, current["quantity"]),
+                field(item, index, "unit", str, current["unit"]),
+                field(item, index, "request_date", str, current["request_date"]),
+                field(item, index, "department", str),
+                commit=False
+            )
+            return {"id": record_id}
+
+        self.batch(update)
+
+
+class VendorsHandler(CollectionHandler):
+    table = "vendors"
+    filters = {"email": "email"}
+
+
+class AssignmentsHandler(CollectionHandler):
+    table = "requisition_vendors"
+    filters = {"requisition_id": "requisition_id", "vendor_id": "vendor_id", "status": "status"}
+
+    def post(self):
+        # Replaces each requisition's pending matches, as auto-assignment on the page does
+        def assign(index, item):
+            requisition_id = field(item, index, "requisition_id", int, required=True)
+            if not self.exists("requisitions", requisition_id):
+                raise tornado.web.HTTPError(404, f"Item {index}: no requisition with id {requisition_id}")
+            matches = item.get("matches")
+            if not isinstance(matches, list):
+                raise tornado.web.HTTPError(400, f"Item {index}: 'matches' must be a list")
+
+            prepared = []
+            for match in matches:
+                vendor_id = field(match, index, "vendor_id", int, required=True)
+                if not self.exists("vendors", vendor_id):
+                    raise tornado.web.HTTPError(404, f"Item {index}: no vendor with id {vendor_id}")
+                prepared.append({
+                    "vendor_id": vendor_id,
+                    "match_score": field(match, index, "match_score", float, required=True),
+                    "match_reason": field(match, index, "match_reason", str, ""),
+                })
+            save_vendor_matches(self.conn, requisition_id, prepared, commit=False)
+            return {"requisition_id": requisition_id, "matches": len(prepared)}
+
+        self.batch(assign, status=201)
+
+    def patch(self):
+        def set_status(index, item):
+            match_id = field(item, index, "id", int, required=True)
+            if not self.exists("requisition_vendors", match_id):
+                raise tornado.web.HTTPError(404, f"Item {index}: no assignment with id {match_id}")
+            status = field(item, index, "status", str, required=True, choices=ASSIGNMENT_STATUSES)
+            actor = field(item, index, "actor", str)
+            update_vendor_match_status(self.conn, match_id, status, actor, commit=False)
+            return {"id": match_id, "status": status}
+
+        self.batch(set_status)
+
+
+class BidsHandler(CollectionHandler):
+    table = "vendor_bids"
+    filters = {"requisition_id": "requisition_id", "vendor_id": "vendor_id", "status": "status"}
+
+    def post(self):
+        currencies = {row[0] for row in self.conn.execute("SELECT currency FROM fx_rates")}
+
+        # Creates the bid, or updates the vendor's existing bid on that requisition
+        def submit(index, item):
+            vendor_id = field(item, index, "vendor_id", int, required=True)
+            requisition_id = field(item, index, "requisition_id", int, required=True)
+            # Vendors may only bid on requisitions they were approved for, as on the Vendor Dashboard
+            approved = self.conn.execute("""
+                SELECT 1 FROM requisition_vendors
+                WHERE vendor_id = ? AND requisition_id = ? AND status = 'approved'
+            """, (vendor_id, requisition_id)).fetchone()
+            if approved is None:
+                raise tornado.web.HTTPError(
+                    409, f"Item {index}: vendor {vendor_id} is not approved for requisition {requisition_id}"
+                )
+
+            bid_amount = field(item, index, "bid_amount", float, required=True)
+            if bid_amount <= 0:
+                raise tornado.web.HTTPError(400, f"Item {index}: 'bid_amount' must be positive")
+            currency = field(item, index, "currency", str, "USD").upper()
+            if currency not in currencies:
+                raise tornado.web.HTTPError(400, f"Item {index}: no FX rate for currency {currency}")
+            delivery_time = field(item, index, "delivery_time", int, required=True)
+            if delivery_time < 1:
+                raise tornado.web.HTTPError(400, f"Item {index}: 'delivery_time' must be at least 1")
+
+            save_bid(
+                self.conn,
+                vendor_id,
+                requisition_id,
+                bid_amount,
+                currency,
+                field(item, index, "notes", str, ""),
+                delivery_time,
+                field(item, index, "delivery_unit", str, "days", choices=DELIVERY_UNITS),
+                commit=False
+            )
+            bid_id = self.conn.execute(
+                "SELECT id FROM vendor_bids WHERE vendor_id = ? AND requisition_id = ?", (vendor_id, requisition_id)
+            ).fetchone()[0]
+            return {"id": bid_id, "vendor_id": vendor_id, "requisition_id": requisition_id}
+
+        self.batch(submit, status=201)
+
+
+class ApprovalsHandler(CollectionHandler):
+    table = "bid_approvals"
+    filters = {"requisition_id": "requisition_id", "vendor_bid_id": "vendor_bid_id", "status": "status"}
+
+    def post(self):
+        tiers = load_approval_tiers(self.conn)
+
+        def decide(index, item):
+            bid_id = field(item, index, "bid_id", int, required=True)
+            bid = self.conn.execute("SELECT requisition_id FROM vendor_bids WHERE id = ?", (bid_id,)).fetchone()
+            if bid is None:
+                raise tornado.web.HTTPError(404, f"Item {index}: no bid with id {bid_id}")
+            requisition_id = bid[0]
+            decision = field(item, index, "decision", str, required=True, choices=("approve", "reject"))
+            approver = field(item, index, "approver", str, required=True)
+
+            tier_name = get_requisition_tier(self.conn, requisition_id, tiers)["name"]
+
+            writer = approve_bid if decision == "approve" else reject_bid
+            writer(self.conn, bid_id, requisition_id, approver, field(item, index, "notes", str, ""), tier_name,
+                   commit=False)
+            return {"bid_id": bid_id, "requisition_id": requisition_id, "decision": decision, "tier": tier_name}
+
+        self.batch(decide)
+
+
+class ChangesHandler(BaseHandler):
+    def get(self):
+        try:
+            since = int(self.get_query_argument("since", "0"))
+            limit = min(max(int(self.get_query_argument("limit", "1000")), 1), 10000)
+        except ValueError:
+            raise tornado.web.HTTPError(400, "since and limit must be integers")
+        if self.respond_unless_unchanged(TRACKED_TABLES):
+            return
+
+        changes = changes_since(self.conn, since, limit)
+        self.send({
+            "items": changes.astype(object).to_dict(orient="records"),
+            # Pass this back as `since` on the next poll
+            "last_seq": int(changes["seq"].iloc[-1]) if not changes.empty else since,
+        })
+
+
+class TransitionsHandler(BaseHandler):
+    # Status history of one requisition, one assignment or bid approval, or everything in a time range
+    def get(self):
+        args = {name: self.get_query_argument(name, None)
+                for name in ("requisition_id", "entity", "entity_id", "start", "end")}
+        if args["entity"] is not None and args["entity"] not in TRACKED_ENTITIES:
+            raise tornado.web.HTTPError(400, f"entity must be one of: {', '.join(TRACKED_ENTITIES)}")
+        try:
+            requisition_id, entity_id = (None if args[name] is None else int(args[name])
+                                         for name in ("requisition_id", "entity_id"))
+            start, end = (None if args[name] is None else datetime.fromisoformat(args[name])
+                          for name in ("start", "end"))
+        except ValueError:
+            raise tornado.web.HTTPError(400, "requisition_id and entity_id must be integers, start and end ISO timestamps")
+        if requisition_id is None and (args["entity"] is None or entity_id is None) and (start is None or end is None):
+            raise tornado.web.HTTPError(400, "Pass requisition_id, entity and entity_id, or start and end")
+        # vendors too: the requisition history carries vendor names
+        if self.respond_unless_unchanged(("vendors", *TRACKED_ENTITIES)):
+            return
+
+        if requisition_id is not None:
+            transitions = load_requisition_transitions(self.conn, requisition_id)
+        elif args["entity"] is not None and entity_id is not None:
+            transitions = load_entity_transitions(self.conn, args["entity"], entity_id)
+        else:
+            transitions = load_transitions_between(self.conn, start, end, args["entity"])
+        self.send({"items": transitions.astype(object).to_dict(orient="records")})
+
+
+class NotFoundHandler(BaseHandler):
+    def prepare(self):
+        raise tornado.web.HTTPError(404, "No such endpoint")
+
+
+def make_app(conn):
+    collections = {
+        "requisitions": RequisitionsHandler,
+        "vendors": VendorsHandler,
+        "assignments": AssignmentsHandler,
+        "bids": BidsHandler,
+        "approvals": ApprovalsHandler,
+    }
+    routes = [
+        (r"/api/changes", ChangesHandler, {"conn": conn}),
+        (r"/api/transitions", TransitionsHandler, {"conn": conn}),
+    ]
+    for name, handler in collections.items():
+        routes.append((rf"/api/{name}", handler, {"conn": conn}))
+        routes.append((rf"/api/{name}/(\d+)", handler, {"conn": conn}))
+    return tornado.web.Application(routes, default_handler_class=NotFoundHandler,
+                                   default_handler_args={"conn": conn})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--address", default="127.0.0.1", help="interface to listen on")
+    parser.add_argument("--db", help="database file (default: PROCUREMENT_DB or db.db)")
+    args = parser.parse_args()
+
+    # One connection serves every request; tornado handles them one at a time on the IO loop
+    conn = init_schema(connect(args.db))
+    make_app(conn).listen(args.port, address=args.address)
+    print(f"Procurement API listening on http://{args.address}:{args.port}/api")
+    tornado.ioloop.IOLoop.current().start()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""Bid approvals: review queries, approve/reject writers and dashboard aggregates.
+
+The dashboard reads pre-aggregated results straight from SQLite so its cost
+does not grow with the approval history.
+"""
+from datetime import datetime
+
+import pandas as pd
+
+from procurement.db import load_frame
+from procurement.fx import BASE_CURRENCY
+
+
+def init_bid_approvals(conn):
+    # Create bid_approvals table if it doesn't exist
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS bid_approvals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            requisition_id INTEGER,
+            vendor_bid_id INTEGER,
+            approval_tier TEXT,
+            approved_by TEXT,
+            approved_at TEXT,
+            approval_notes TEXT,
+            status TEXT DEFAULT 'pending',
+            FOREIGN KEY (requisition_id) REFERENCES requisitions (id),
+            FOREIGN KEY (vendor_bid_id) REFERENCES vendor_bids (id)
+        )
+    """)
+    init_approval_indexes(conn)
+
+
+def _dedupe_approvals(conn):
+    # Before decisions were unique, approve_bid appended a row per decision: keep each bid's latest decision,
+    # and of several approved bids on one requisition only the latest approval
+    conn.execute("""
+        DELETE FROM bid_approvals
+        WHERE id NOT IN (SELECT MAX(id) FROM bid_approvals GROUP BY vendor_bid_id)
+    """)
+    conn.execute("""
+        UPDATE bid_approvals
+        SET status = 'rejected', approval_notes = 'Automatically rejected as another bid was selected'
+        WHERE status = 'approved' AND id != (
+            SELECT latest.id FROM bid_approvals latest
+            WHERE latest.requisition_id = bid_approvals.requisition_id AND latest.status = 'approved'
+            ORDER BY latest.approved_at DESC, latest.id DESC
+            LIMIT 1
+        )
+    """)
+
+
+def init_approval_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_bid_approvals_status ON bid_approvals (status, approved_at)")
+    # One decision per bid, and at most one approved bid per requisition
+    if conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_bid_approvals_vendor_bid_unique'"
+    ).fetchone() is None:
+        _dedupe_approvals(conn)
+        conn.execute("CREATE UNIQUE INDEX idx_bid_approvals_vendor_bid_unique ON bid_approvals (vendor_bid_id)")
+        conn.execute("DROP INDEX IF EXISTS idx_bid_approvals_vendor_bid")
+    conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_bid_approvals_requisition_approved
+        ON bid_approvals (requisition_id) WHERE status = 'approved'
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_bid_approvals_requisition ON bid_approvals (requisition_id, status)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_vendor_bids_requisition ON vendor_bids (requisition_id)")
+    conn.commit()
+
+
+def load_requisitions_with_bids(conn):
+    df = load_frame(conn, """
+        SELECT r.id as requisition_id, r.title,
+               s.bid_count,
+               ROUND(s.min_bid, 2) as min_bid,
+               ROUND(s.max_bid, 2) as max_bid,
+               ROUND(s.avg_bid, 2) as avg_bid,
+               ? as currency
+        FROM requisition_summary s
+        JOIN requisitions r ON r.id = s.requisition_id
+        WHERE s.bid_count > 0
+        ORDER BY s.requisition_id DESC
+    """, (BASE_CURRENCY,))
+    return df
+
+
+def load_bids_for_requisition(conn, requisition_id):
+    # The vendor's notes are fetched for the selected bid only, with bids.get_bid_notes
+    df = load_frame(conn, """
+        SELECT vb.id, vb.vendor_id, vb.bid_amount, vb.currency, vb.amount_base, vb.delivery_time, vb.delivery_unit,
+               v.name as vendor_name,
+               ba.status as approval_status, ba.approved_by, ba.approved_at, ba.approval_notes
+        FROM vendor_bids vb
+        JOIN vendors v ON vb.vendor_id = v.id
+        LEFT JOIN bid_approvals ba ON vb.id = ba.vendor_bid_id
+        WHERE vb.requisition_id = ?
+        ORDER BY vb.amount_base ASC
+    """, (requisition_id,))
+    return df
+
+
+def get_bid_details(conn, bid_id):
+    df = pd.read_sql_query("""
+        SELECT vb.*, v.name as vendor_name, v.email as vendor_email
+        FROM vendor_bids vb
+        JOIN vendors v ON vb.vendor_id = v.id
+        WHERE vb.id = ?
+    """, conn, params=(bid_id,))
+    if df.empty:
+        return None
+    return df.iloc[0]
+
+
+def _decide(conn, bid_id, requisition_id, approver, notes, tier_name, status, approval_time):
+    # One row per bid: a new decision replaces the previous one
+    conn.execute(
+        """
+        INSERT INTO bid_approvals
+        (requisition_id, vendor_bid_id, approval_tier, approved_by, approved_at, approval_notes, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (vendor_bid_id) DO UPDATE SET
+            requisition_id = excluded.requisition_id, approval_tier = excluded.approval_tier,
+            approved_by = excluded.approved_by, approved_at = excluded.approved_at,
+            approval_notes = excluded.approval_notes, status = excluded.status
+        """,
+        (requisition_id, bid_id, tier_name, approver, approval_time, notes, status)
+    )
+
+
+def approve_bid(conn, bid_id, requisition_id, approver, notes, tier_name, commit=True):
+    approval_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    # Reject the requisition's other bids first; the unique index allows only one approved bid per requisition.
+    # Bids already rejected keep their own decision.
+    conn.execute(
+        """
+        INSERT INTO bid_approvals
+        (requisition_id, vendor_bid_id, approval_tier, approved_by, approved_at, approval_notes, status)
+        SELECT ?, id, ?, ?, ?, 'Automatically rejected as another bid was selected', 'rejected'
+        FROM vendor_bids
+        WHERE requisition_id = ? AND id != ?
+        ON CONFLICT (vendor_bid_id) DO UPDATE SET
+            approval_tier = excluded.approval_tier, approved_by = excluded.approved_by,
+            approved_at = excluded.approved_at, approval_notes = excluded.approval_notes, status = 'rejected'
+        WHERE bid_approvals.status != 'rejected'
+        """,
+        (requisition_id, tier_name, approver, approval_time, requisition_id, bid_id)
+    )
+    # Approvals filed under the requisition for bids no longer on it
+    conn.execute(
+        """
+        UPDATE bid_approvals
+        SET approved_by = ?, approved_at = ?, approval_notes = 'Automatically rejected as another bid was selected',
+            status = 'rejected'
+        WHERE requisition_id = ? AND vendor_bid_id != ? AND status = 'approved'
+        """,
+        (approver, approval_time, requisition_id, bid_id)
+    )
+    _decide(conn, bid_id, requisition_id, approver, notes, tier_name, "approved", approval_time)
+
+    if commit:
+        conn.commit()
+    return True
+
+
+def reject_bid(conn, bid_id, requisition_id, approver, notes, tier_name, commit=True):
+    approval_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    _decide(conn, bid_id, requisition_id, approver, notes, tier_name, "rejected", approval_time)
+
+    if commit:
+        conn.commit()
+    return True
+
+
+def load_lowest_undecided_bids(conn):
+    # The lowest base-currency bid of every requisition with no approved bid, plus its highest bid for tiering
+    return pd.read_sql_query("""
+        WITH ranked AS (
+            SELECT vb.requisition_id, vb.id as bid_id, vb.vendor_id, vb.amount_base,
+                   MAX(vb.amount_base) OVER (PARTITION BY vb.requisition_id) as max_bid_amount,
+                   ROW_NUMBER() OVER (PARTITION BY vb.requisition_id ORDER BY vb.amount_base, vb.id) as bid_rank
+            FROM vendor_bids vb
+            WHERE NOT EXISTS (
+                SELECT 1 FROM bid_approvals ba
+                WHERE ba.requisition_id = vb.requisition_id AND ba.status = 'approved'
+            )
+        )
+        SELECT requisition_id, bid_id, vendor_id, amount_base, max_bid_amount
+        FROM ranked
+        WHERE bid_rank = 1
+        ORDER BY requisition_id
+    """, conn)
+
+
+def load_approval_summary(conn):
+    # Approved bid count and base-currency amount per tier, from the spend rollup
+    return pd.read_sql_query("""
+        SELECT NULLIF(tier, '') as approval_tier,
+               SUM(approvals) as approval_count,
+               SUM(amount_base) as total_amount
+        FROM spend_monthly
+        GROUP BY tier
+    """, conn)
+
+
+def load_recent_approvals(conn, limit=10):
+    return load_frame(conn, """
+        SELECT ba.id, ba.approval_tier, ba.approved_by, ba.approved_at,
+               r.title as requisition_title, vb.bid_amount, vb.currency, v.name as vendor_name
+        FROM bid_approvals ba
+        JOIN requisitions r ON ba.requisition_id = r.id
+        JOIN vendor_bids vb ON ba.vendor_bid_id = vb.id
+        JOIN vendors v ON vb.vendor_id = v.id
+        WHERE ba.status = 'approved'
+        ORDER BY ba.approved_at DESC
+        LIMIT ?
+    """, (limit,))
+
+
+def load_pending_by_tier(conn, per_tier=10):
+    # Requisitions with unreviewed bids, bucketed into tiers by their highest bid.
+    # Only the top `per_tier` rows of each tier are returned; tier_total has the full count.
+    # A requisition none of whose bids has an FX rate has no amount; like resolve_approval_tiers,
+    # it goes to the highest tier rather than dropping out of the join, and is listed first there.
+    return load_frame(conn, """
+        WITH pending AS (
+            SELECT r.id as requisition_id, r.title,
+                   ROUND(MAX(vb.amount_base), 2) as max_bid_amount,
+                   ROUND(MIN(vb.amount_base), 2) as min_bid_amount,
+                   COUNT(vb.id) as bid_count,
+                   ? as currency
+            FROM requisitions r
+            JOIN vendor_bids vb ON r.id = vb.requisition_id
+            WHERE NOT EXISTS (SELECT 1 FROM bid_approvals ba WHERE ba.vendor_bid_id = vb.id)
+            GROUP BY r.id
+        ),
+        tiered AS (
+            SELECT p.*, t.name as tier_name,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY t.name ORDER BY p.max_bid_amount IS NULL DESC, p.max_bid_amount DESC
+                   ) as tier_rank,
+                   COUNT(*) OVER (PARTITION BY t.name) as tier_total
+            FROM pending p
+            JOIN approval_tiers t
+              ON (p.max_bid_amount >= t.min_amount AND (t.max_amount IS NULL OR p.max_bid_amount < t.max_amount))
+              OR (p.max_bid_amount IS NULL AND t.min_amount = (SELECT MAX(min_amount) FROM approval_tiers))
+        )
+        SELECT * FROM tiered
+        WHERE tier_rank <= ?
+        ORDER BY max_bid_amount IS NULL DESC, max_bid_amount DESC
+    """, (BASE_CURRENCY, per_tier))
@@ -0,0 +1,144 @@
+"""Vendor assignments (requisition_vendors) and their approval workflow."""
+from datetime import datetime
+
+from procurement.db import load_frame
+from procurement.presentation import format_timestamps, parse_timestamps, percent_value
+
+
+def init_requisition_vendors(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS requisition_vendors (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            requisition_id INTEGER,
+            vendor_id INTEGER,
+            match_score REAL,
+            match_reason TEXT,
+            status TEXT DEFAULT 'pending',
+            created_at TEXT,
+            approved_at TEXT,
+            FOREIGN KEY (requisition_id) REFERENCES requisitions (id),
+            FOREIGN KEY (vendor_id) REFERENCES vendors (id)
+        )
+    """)
+    # Who set the current status; recorded as the actor of each status transition
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(requisition_vendors)")]
+    if "decided_by" not in columns:
+        conn.execute("ALTER TABLE requisition_vendors ADD COLUMN decided_by TEXT")
+
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_requisition_vendors_requisition ON requisition_vendors (requisition_id, status)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_requisition_vendors_vendor ON requisition_vendors (vendor_id, status, created_at)"
+    )
+    conn.commit()
+
+
+def load_assignment_requisitions(conn):
+    # Requisitions with their assigned and approved vendor counts, precomputed in requisition_summary.
+    # Descriptions are left out; the page fetches the selected one with get_requisition_details.
+    df = load_frame(conn, """
+        SELECT r.id, r.title, r.quantity, r.unit, r.request_date, r.timestamp, s.vendor_count, s.approved_count
+        FROM requisitions r
+        JOIN requisition_summary s ON s.requisition_id = r.id
+        ORDER BY r.timestamp DESC
+    """)
+    return parse_timestamps(df, ["timestamp", "request_date"])
+
+
+def load_open_requisitions(conn, limit=None):
+    # Requisitions with no pending or approved vendor, i.e. never assigned or every match rejected.
+    # Only the fields the matching prompt uses are read.
+    return load_frame(conn, """
+        SELECT r.id, r.title, r.description, r.quantity, r.unit
+        FROM requisitions r
+        WHERE NOT EXISTS (
+            SELECT 1 FROM requisition_vendors rv
+            WHERE rv.requisition_id = r.id AND rv.status IN ('pending', 'approved')
+        )
+        ORDER BY r.id
+        LIMIT ?
+    """, (-1 if limit is None else limit,))
+
+
+def load_requisition_vendors(conn, requisition_id):
+    # One requisition's match cards, which show each reason
+    return load_frame(conn, """
+        SELECT rv.id, rv.vendor_id, rv.match_score, rv.match_reason, rv.status,
+               v.name as vendor_name, v.email as vendor_email
+        FROM requisition_vendors rv
+        JOIN vendors v ON rv.vendor_id = v.id
+        WHERE rv.requisition_id = ?
+        ORDER BY rv.match_score DESC
+    """, (requisition_id,))
+
+
+def load_vendor_assignments(conn):
+    # Every assignment card shows its match reason, so that is the one long text column read here
+    df = load_frame(conn, """
+        SELECT rv.id, rv.requisition_id, rv.vendor_id, rv.match_score, rv.match_reason, rv.status,
+               rv.created_at, rv.approved_at,
+               r.title as requisition_title,
+               v.name as vendor_name,
+               v.email as vendor_email
+        FROM requisition_vendors rv
+        JOIN requisitions r ON rv.requisition_id = r.id
+        JOIN vendors v ON rv.vendor_id = v.id
+        ORDER BY rv.created_at DESC
+    """)
+
+    # Parse and format once so the per-card loops only read prepared strings
+    parse_timestamps(df, ["created_at", "approved_at"])
+    df["created_display"] = format_timestamps(df["created_at"])
+    df["decided_display"] = format_timestamps(df["approved_at"])
+    df["match_percent"] = percent_value(df["match_score"])
+    return df
+
+
+def save_vendor_matches(conn, requisition_id, matches, commit=True):
+    cursor = conn.cursor()
+
+    # Delete existing matches that are still pending
+    cursor.execute(
+        "DELETE FROM requisition_vendors WHERE requisition_id = ? AND status = 'pending'",
+        (requisition_id,)
+    )
+
+    # Insert new matches
+    for match in matches:
+        cursor.execute(
+            """
+            INSERT INTO requisition_vendors
+            (requisition_id, vendor_id, match_score, match_reason, status, created_at)
+            VALUES (?, ?, ?, ?, 'pending', ?)
+            """,
+            (
+                requisition_id,
+                match["vendor_id"],
+                match["match_score"],
+                match["match_reason"],
+                datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            )
+        )
+
+    if commit:
+        conn.commit()
+    return True
+
+
+def update_vendor_match_status(conn, match_id, status, actor=None, commit=True):
+    cursor = conn.cursor()
+
+    # Update the status and decision timestamp; a match back in pending has no decision
+    cursor.execute(
+        """
+        UPDATE requisition_vendors
+        SET status = ?, approved_at = ?, decided_by = ?
+        WHERE id = ?
+        """,
+        (status, None if status == "pending" else datetime.now().strftime("%Y-%m-%d %H:%M:%S"), actor, match_id)
+    )
+
+    if commit:
+        conn.commit()
+    return True
@@ -0,0 +1,165 @@
+"""Vendor bids as submitted from the Vendor Dashboard."""
+from datetime import datetime
+
+from procurement.db import load_frame
+from procurement.presentation import DATE_FORMAT, format_timestamps, join_text, parse_timestamps
+
+
+def init_vendor_bids(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS vendor_bids (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            vendor_id INTEGER,
+            requisition_id INTEGER,
+            bid_amount REAL,
+            currency TEXT DEFAULT 'USD',
+            notes TEXT,
+            delivery_time INTEGER,
+            delivery_unit TEXT DEFAULT 'days',
+            bid_timestamp TEXT,
+            status TEXT DEFAULT 'submitted',
+            FOREIGN KEY (vendor_id) REFERENCES vendors (id),
+            FOREIGN KEY (requisition_id) REFERENCES requisitions (id)
+        )
+    """)
+    # When the bid was first submitted; save_bid moves bid_timestamp on every edit but leaves this alone
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(vendor_bids)")]
+    if "created_at" not in columns:
+        conn.execute("ALTER TABLE vendor_bids ADD COLUMN created_at TEXT")
+        # The revision history kept the timestamp each bid was created with
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'vendor_bid_revisions'").fetchone():
+            conn.execute("""
+                UPDATE vendor_bids SET created_at = (
+                    SELECT json_extract(fields, '$.bid_timestamp') FROM vendor_bid_revisions
+                    WHERE bid_id = vendor_bids.id AND kind = 'create'
+                )
+            """)
+        conn.execute("UPDATE vendor_bids SET created_at = bid_timestamp WHERE created_at IS NULL")
+
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_vendor_bids_vendor ON vendor_bids (vendor_id, requisition_id, bid_timestamp)"
+    )
+    conn.commit()
+
+
+def load_vendor_requisitions(conn, vendor_id):
+    # Get requisitions assigned to this vendor
+    df = load_frame(conn, """
+        SELECT rv.id, rv.requisition_id, rv.match_score, rv.status, rv.created_at,
+               r.title, r.description, r.quantity, r.unit, r.request_date
+        FROM requisition_vendors rv
+        JOIN requisitions r ON rv.requisition_id = r.id
+        WHERE rv.vendor_id = ? AND rv.status = 'approved'
+        ORDER BY rv.created_at DESC
+    """, (vendor_id,))
+    parse_timestamps(df, ["request_date"])
+    df["request_date_display"] = format_timestamps(df["request_date"], DATE_FORMAT)
+    return df
+
+
+def load_vendor_bids(conn, vendor_id):
+    # Get all bids submitted by this vendor; notes are fetched per bid with get_bid_notes
+    df = load_frame(conn, """
+        SELECT vb.id, vb.requisition_id, vb.bid_amount, vb.currency, vb.delivery_time, vb.delivery_unit,
+               vb.bid_timestamp, vb.status, r.title as requisition_title
+        FROM vendor_bids vb
+        JOIN requisitions r ON vb.requisition_id = r.id
+        WHERE vb.vendor_id = ?
+        ORDER BY vb.bid_timestamp DESC
+    """, (vendor_id,))
+    parse_timestamps(df, ["bid_timestamp"])
+    df["submitted_display"] = format_timestamps(df["bid_timestamp"])
+    df["bid_display"] = join_text(df["bid_amount"], df["currency"])
+    df["delivery_display"] = join_text(df["delivery_time"], df["delivery_unit"])
+    return df
+
+
+def get_bid_notes(conn, bid_id):
+    row = conn.execute("SELECT notes FROM vendor_bids WHERE id = ?", (bid_id,)).fetchone()
+    return row[0] if row else None
+
+
+def count_vendor_requisitions(conn, vendor_id):
+    return conn.execute(
+        "SELECT COUNT(*) FROM requisition_vendors WHERE vendor_id = ? AND status = 'approved'", (vendor_id,)
+    ).fetchone()[0]
+
+
+def load_vendor_requisition_page(conn, vendor_id, page, page_size):
+    """One page of the vendor's approved assignments, each with its latest bid (if any) joined on.
+
+    ``page`` counts from 1. Bid columns are NULL and ``has_bid`` is False
+    where the vendor has not bid yet.
+    """
+    df = load_frame(conn, """
+        SELECT rv.id, rv.requisition_id, rv.match_score, rv.status, rv.created_at,
+               r.title, r.description, r.quantity, r.unit, r.request_date,
+               vb.id as bid_id, vb.bid_amount, vb.currency, vb.notes, vb.delivery_time, vb.delivery_unit,
+               vb.bid_timestamp
+        FROM requisition_vendors rv
+        JOIN requisitions r ON rv.requisition_id = r.id
+        LEFT JOIN vendor_bids vb ON vb.id = (
+            SELECT id FROM vendor_bids
+            WHERE vendor_id = rv.vendor_id AND requisition_id = rv.requisition_id
+            ORDER BY bid_timestamp DESC, id DESC
+            LIMIT 1
+        )
+        WHERE rv.vendor_id = ? AND rv.status = 'approved'
+        ORDER BY rv.created_at DESC, rv.id DESC
+        LIMIT ? OFFSET ?
+    """, (vendor_id, page_size, (page - 1) * page_size))
+    parse_timestamps(df, ["request_date", "bid_timestamp"])
+    df["has_bid"] = df["bid_id"].notna()
+    df["notes"] = df["notes"].fillna("")
+    df["request_date_display"] = format_timestamps(df["request_date"], DATE_FORMAT)
+    df["submitted_display"] = format_timestamps(df["bid_timestamp"])
+    df["delivery_display"] = join_text(df["delivery_time"].astype("Int64"), df["delivery_unit"]).where(df["has_bid"], "")
+    return df
+
+
+def check_existing_bid(conn, vendor_id, requisition_id):
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT id FROM vendor_bids WHERE vendor_id = ? AND requisition_id = ?",
+        (vendor_id, requisition_id)
+    )
+    result = cursor.fetchone()
+    return result[0] if result else None
+
+
+def save_bid(conn, vendor_id, requisition_id, bid_amount, currency, notes, delivery_time, delivery_unit,
+             commit=True):
+    cursor = conn.cursor()
+    bid_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    # Check if bid already exists
+    existing_bid_id = check_existing_bid(conn, vendor_id, requisition_id)
+
+    if existing_bid_id:
+        # Update existing bid
+        cursor.execute(
+            """
+            UPDATE vendor_bids
+            SET bid_amount = ?, currency = ?, notes = ?,
+                delivery_time = ?, delivery_unit = ?,
+                created_at = COALESCE(created_at, bid_timestamp), bid_timestamp = ?, status = 'updated'
+            WHERE id = ?
+            """,
+            (bid_amount, currency, notes, delivery_time, delivery_unit, bid_timestamp, existing_bid_id)
+        )
+    else:
+        # Insert new bid
+        cursor.execute(
+            """
+            INSERT INTO vendor_bids
+            (vendor_id, requisition_id, bid_amount, currency, notes, delivery_time, delivery_unit, bid_timestamp, status,
+             created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'submitted', ?)
+            """,
+            (vendor_id, requisition_id, bid_amount, currency, notes, delivery_time, delivery_unit, bid_timestamp,
+             bid_timestamp)
+        )
+
+    if commit:
+        conn.commit()
+    return True
@@ -0,0 +1,65 @@
+"""Append-only change log fed by triggers on the transactional tables.
+
+Every insert, update and delete on the tables in ``TRACKED_TABLES`` appends a
+row to ``change_log``. ``seq`` is AUTOINCREMENT, so it only ever grows, even
+after old entries are pruned. The API derives ETags from the highest ``seq``
+of the tables behind a response, and integrations can poll
+``changes_since`` instead of re-reading whole collections.
+"""
+import pandas as pd
+
+TRACKED_TABLES = ("requisitions", "vendors", "requisition_vendors", "vendor_bids", "bid_approvals")
+
+
+def init_change_log(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            operation TEXT NOT NULL,
+            changed_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_change_log_table_seq ON change_log (table_name, seq)")
+
+    for table in TRACKED_TABLES:
+        for operation, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS change_log_{table}_{operation.lower()}
+                AFTER {operation} ON {table}
+                BEGIN
+                    INSERT INTO change_log (table_name, row_id, operation)
+                    VALUES ('{table}', {row}.id, '{operation.lower()}');
+                END
+            """)
+    conn.commit()
+
+
+def last_change(conn, tables=TRACKED_TABLES):
+    # One index probe per table, so checking for changes stays cheap however long the log gets
+    return max(
+        conn.execute("SELECT MAX(seq) FROM change_log WHERE table_name = ?", (table,)).fetchone()[0] or 0
+        for table in tables
+    )
+
+
+def changes_since(conn, seq, limit=1000, tables=TRACKED_TABLES):
+    return pd.read_sql_query(f"""
+        SELECT seq, table_name, row_id, operation, changed_at
+        FROM change_log
+        WHERE seq > ? AND table_name IN ({", ".join("?" * len(tables))})
+        ORDER BY seq
+        LIMIT ?
+    """, conn, params=(seq, *tables, limit))
+
+
+def prune_change_log(conn, before_seq):
+    """Deletes entries up to and including ``before_seq``; returns how many were removed."""
+    # The newest entry of each table is kept so last_change, and the ETags built on it, never go backwards
+    cursor = conn.execute("""
+        DELETE FROM change_log
+        WHERE seq <= ? AND seq NOT IN (SELECT MAX(seq) FROM change_log GROUP BY table_name)
+    """, (before_seq,))
+    conn.commit()
+    return cursor.rowcount
@@ -0,0 +1,438 @@
+"""Batch procurement jobs for cron and operations staff, no browser needed.
+
+    python -m procurement.cli import-vendors catalog.parquet
+    python -m procurement.cli export-vendors --out vendors.csv
+    python -m procurement.cli auto-assign --workers 4 --limit 200
+    python -m procurement.cli export-pdfs --out exports/ --workers 4 --since 2025-06-01
+    python -m procurement.cli approve --lowest --max-level 1 --approver nightly-job
+    python -m procurement.cli backup --out backups/
+    python -m procurement.cli export-parquet --out warehouse/
+    python -m procurement.cli compact --prune-changes-before 120000
+
+Each command reuses the functions the pages call. Every command takes
+``--db``, ``--dry-run`` (report what would happen, write nothing; the
+database must exist and is opened read-only, and one that predates the
+current schema is upgraded in a throwaway in-memory copy) and ``--summary
+PATH`` ("-" for stdout). The summary is a JSON record of counts, per-item
+latency percentiles and step timings. The exit status is 1 when
+any item failed.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from procurement.approvals import approve_bid, load_lowest_undecided_bids
+from procurement.assignments import load_open_requisitions, save_vendor_matches
+from procurement.changes import prune_change_log
+from procurement.db import DB_PATH, connect, init_schema, missing_schema
+from procurement.export import EXPORT_TABLES, export_tables
+from procurement.matching import match_vendors_to_requisition
+from procurement.pdf import generate_pdf
+from procurement.requisitions import REQUISITION_COLUMNS, load_requisitions
+from procurement.revisions import checkpoint_bid_revisions
+from procurement.search import optimize_search
+from procurement.tiers import get_requisition_tier, load_approval_tiers, resolve_approval_tiers
+# Aliased so the subcommand functions below can use the command names
+from procurement.vendors import FILE_FORMATS, VENDOR_COLUMNS, load_vendors, read_vendor_file
+from procurement.vendors import export_vendors as export_vendor_file, import_vendors as import_vendor_frame
+
+
+class Summary:
+    """Counts and timings for one command run, written out as JSON."""
+
+    def __init__(self, command, dry_run):
+        self.command = command
+        self.dry_run = dry_run
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self.started = time.perf_counter()
+        self.counts = {"succeeded": 0, "failed": 0, "skipped": 0}
+        self.latencies = []
+        self.steps = {}
+        self.errors = []
+        self.details = {}
+
+    def item(self, outcome, elapsed=None, error=None):
+        self.counts[outcome] += 1
+        if elapsed is not None:
+            self.latencies.append(elapsed)
+        if error is not None:
+            self.errors.append(error)
+
+    def step(self, name, elapsed):
+        self.steps[name] = self.steps.get(name, 0.0) + elapsed
+
+    def as_dict(self):
+        latencies = np.array(self.latencies) * 1000
+        return {
+            "command": self.command,
+            "dry_run": self.dry_run,
+            "started_at": self.started_at,
+            "elapsed_s": time.perf_counter() - self.started,
+            **self.counts,
+            "item_ms": {
+                "mean": float(latencies.mean()),
+                "p50": float(np.percentile(latencies, 50)),
+                "p95": float(np.percentile(latencies, 95)),
+                "max": float(latencies.max()),
+            } if len(latencies) else None,
+            "steps_s": self.steps,
+            "errors": self.errors[:100],
+            **self.details,
+        }
+
+
+class timed:
+    """``with timed(summary, "load"):`` adds the block's wall time to a summary step."""
+
+    def __init__(self, summary, name):
+        self.summary = summary
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.summary.step(self.name, time.perf_counter() - self.started)
+
+
+def batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def import_vendors(conn, args, summary):
+    with timed(summary, "read"):
+        vendors = read_vendor_file(args.file)
+    with timed(summary, "write"):
+        counts = import_vendor_frame(conn, vendors, update_existing=not args.insert_only, dry_run=args.dry_run)
+    summary.counts["succeeded"] = counts["inserted"] + counts["updated"]
+    summary.counts["skipped"] = counts["skipped"]
+    summary.details.update(counts)
+
+
+def export_vendors(conn, args, summary):
+    if args.dry_run:
+        summary.details["vendors"] = conn.execute("SELECT COUNT(*) FROM vendors").fetchone()[0]
+        return
+    with timed(summary, "write"):
+        summary.details["vendors"] = export_vendor_file(conn, args.out, args.format)
+    summary.item("succeeded", summary.steps["write"])
+
+
+def auto_assign(conn, args, summary):
+    with timed(summary, "load"):
+        requisitions = load_open_requisitions(conn, args.limit)
+        vendors = load_vendors(conn, columns=("id", *VENDOR_COLUMNS))
+    summary.details["requisitions"] = len(requisitions)
+    if args.dry_run or requisitions.empty:
+        for _ in range(len(requisitions)):
+            summary.item("skipped")
+        summary.details["would_match"] = requisitions["id"].tolist()
+        return
+
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        raise SystemExit("OPENAI_API_KEY must be set for auto-assign")
+    # openai is slow to import, so only this command loads it; one client is shared by the workers
+    import openai
+
+    client = openai.OpenAI(api_key=api_key)
+    vendor_ids = set(vendors["id"].tolist())
+
+    def match(requisition):
+        started = time.perf_counter()
+        try:
+            matches = match_vendors_to_requisition(requisition, vendors, api_key, client=client)
+        except Exception as e:
+            return requisition["id"], None, time.perf_counter() - started, f"{type(e).__name__}: {e}"
+        # Drop vendors the model invented and fill in what it left out
+        matches = [{
+            "vendor_id": int(m["vendor_id"]),
+            "match_score": float(m.get("match_score") or 0),
+            "match_reason": str(m.get("match_reason") or ""),
+        } for m in matches if isinstance(m, dict) and str(m.get("vendor_id")).isdigit()
+            and int(m["vendor_id"]) in vendor_ids]
+        return requisition["id"], matches, time.perf_counter() - started, None
+
+    rows = [row for _, row in requisitions.iterrows()]
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for batch in batches(rows, args.batch_size):
+            with timed(summary, "match"):
+                results = list(pool.map(match, batch))
+            # Each batch is saved in one transaction, so a failure later on keeps earlier batches
+            with timed(summary, "write"), conn:
+                for requisition_id, matches, elapsed, error in results:
+                    if error is not None:
+                        summary.item("failed", elapsed, f"requisition {requisition_id}: {error}")
+                    elif not matches:
+                        summary.item("skipped", elapsed)
+                    else:
+                        save_vendor_matches(conn, int(requisition_id), matches, commit=False)
+                        summary.item("succeeded", elapsed)
+
+
+def _export_pdf(job):
+    # Module-level so worker processes can unpickle it
+    row, path = job
+    started = time.perf_counter()
+    try:
+        generate_pdf(row, path)
+    except Exception as e:
+        return row["id"], time.perf_counter() - started, f"{type(e).__name__}: {e}"
+    return row["id"], time.perf_counter() - started, None
+
+
+def export_pdfs(conn, args, summary):
+    with timed(summary, "load"):
+        requisitions = load_requisitions(conn, columns=REQUISITION_COLUMNS)
+    if args.ids:
+        requisitions = requisitions[requisitions["id"].isin(args.ids)]
+    if args.since:
+        requisitions = requisitions[requisitions["timestamp"] >= args.since]
+
+    jobs = []
+    for row in requisitions.to_dict(orient="records"):
+        path = os.path.join(args.out, f"requisition_{row['id']}.pdf")
+        if os.path.exists(path) and not args.overwrite:
+            summary.item("skipped")
+        else:
+            jobs.append((row, path))
+    summary.details["pdfs"] = len(jobs)
+    if args.dry_run:
+        summary.details["would_write"] = [path for _, path in jobs]
+        return
+    os.makedirs(args.out, exist_ok=True)
+
+    # fpdf is pure Python, so parallel rendering needs processes rather than threads
+    with timed(summary, "render"):
+        if args.workers > 1:
+            with ProcessPoolExecutor(max_workers=args.workers) as pool:
+                results = list(pool.map(_export_pdf, jobs, chunksize=args.batch_size))
+        else:
+            results = [_export_pdf(job) for job in jobs]
+    for requisition_id, elapsed, error in results:
+        if error is None:
+            summary.item("succeeded", elapsed)
+        else:
+            summary.item("failed", elapsed, f"requisition {requisition_id}: {error}")
+
+
+def approve(conn, args, summary):
+    tiers = load_approval_tiers(conn)
+    with timed(summary, "load"):
+        if args.lowest:
+            candidates = load_lowest_undecided_bids(conn)
+            candidates["tier"] = resolve_approval_tiers(candidates["max_bid_amount"], tiers)["name"].to_numpy()
+            levels = dict(zip(tiers["name"], tiers["level"]))
+            within = candidates["tier"].map(levels) <= args.max_level
+            for _ in range(int((~within).sum())):
+                summary.item("skipped")
+            decisions = candidates[within][["bid_id", "requisition_id", "tier"]].values.tolist()
+        else:
+            decisions = []
+            for bid_id in args.bid:
+                bid = conn.execute("SELECT requisition_id FROM vendor_bids WHERE id = ?", (bid_id,)).fetchone()
+                if bid is None:
+                    summary.item("failed", error=f"bid {bid_id}: not found")
+                    continue
+                decisions.append([bid_id, bid[0], get_requisition_tier(conn, bid[0], tiers)["name"]])
+
+    if args.dry_run:
+        summary.details["would_approve"] = [{"bid_id": int(b), "requisition_id": int(r), "tier": t}
+                                            for b, r, t in decisions]
+        return
+
+    for batch in batches(decisions, args.batch_size):
+        with timed(summary, "write"), conn:
+            for bid_id, requisition_id, tier_name in batch:
+                started = time.perf_counter()
+                approve_bid(conn, int(bid_id), int(requisition_id), args.approver, args.notes, tier_name,
+                            commit=False)
+                summary.item("succeeded", time.perf_counter() - started)
+
+
+def backup(conn, args, summary):
+    target = args.out
+    if os.path.isdir(target) or target.endswith(os.sep):
+        if not args.dry_run:
+            os.makedirs(target, exist_ok=True)
+        target = os.path.join(target, f"db-{datetime.now():%Y%m%d-%H%M%S}.db")
+    summary.details["target"] = target
+    summary.details["source_bytes"] = os.path.getsize(args.db or DB_PATH)
+    if args.dry_run:
+        return
+
+    # The online backup API copies a consistent snapshot while the pages keep writing
+    started = time.perf_counter()
+    destination = sqlite3.connect(target)
+    try:
+        with timed(summary, "copy"):
+            conn.backup(destination, pages=args.batch_size)
+        with timed(summary, "verify"):
+            check = destination.execute("PRAGMA quick_check").fetchone()[0]
+    finally:
+        destination.close()
+    summary.details["target_bytes"] = os.path.getsize(target)
+    if check == "ok":
+        summary.item("succeeded", time.perf_counter() - started)
+    else:
+        summary.item("failed", time.perf_counter() - started, f"quick_check: {check}")
+
+
+def export_parquet(conn, args, summary):
+    started = time.perf_counter()
+    with timed(summary, "export"):
+        results = export_tables(conn, args.out, args.tables, batch_size=args.batch_size, full=args.full,
+                                dry_run=args.dry_run)
+    summary.details["tables"] = results
+    if not args.dry_run:
+        summary.item("succeeded", time.perf_counter() - started)
+
+
+def compact(conn, args, summary):
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    pages, free = conn.execute("PRAGMA page_count").fetchone()[0], conn.execute("PRAGMA freelist_count").fetchone()[0]
+    summary.details["bytes_before"] = pages * page_size
+    summary.details["free_bytes_before"] = free * page_size
+    if args.dry_run:
+        summary.details["bid_checkpoints"] = checkpoint_bid_revisions(conn, args.max_revision_chain, dry_run=True)
+        return
+
+    started = time.perf_counter()
+    if args.prune_changes_before is not None:
+        with timed(summary, "prune_changes"):
+            summary.details["changes_pruned"] = prune_change_log(conn, args.prune_changes_before)
+    with timed(summary, "checkpoint_bid_revisions"):
+        summary.details["bid_checkpoints"] = checkpoint_bid_revisions(conn, args.max_revision_chain)
+    with timed(summary, "optimize_search"):
+        optimize_search(conn)
+    with timed(summary, "analyze"):
+        conn.execute("ANALYZE")
+        conn.commit()
+    with timed(summary, "vacuum"):
+        conn.execute("VACUUM")
+    summary.details["bytes_after"] = conn.execute("PRAGMA page_count").fetchone()[0] * page_size
+    summary.item("succeeded", time.perf_counter() - started)
+
+
+COMMANDS = {
+    "import-vendors": import_vendors,
+    "export-vendors": export_vendors,
+    "auto-assign": auto_assign,
+    "export-pdfs": export_pdfs,
+    "approve": approve,
+    "backup": backup,
+    "export-parquet": export_parquet,
+    "compact": compact,
+}
+
+
+def parse_args(argv=None):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--db", help="database file (default: PROCUREMENT_DB or db.db)")
+    common.add_argument("--dry-run", action="store_true", help="report what would happen without writing")
+    common.add_argument("--summary", help='write a JSON timing summary to this path, "-" for stdout')
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("import-vendors", parents=[common], help="add or update vendors from CSV or Parquet")
+    p.add_argument("file", help=".csv or .parquet with name, email and optional description columns")
+    p.add_argument("--insert-only", action="store_true", help="skip vendors whose email is already on file")
+
+    p = commands.add_parser("export-vendors", parents=[common], help="write all vendors to CSV or Parquet")
+    p.add_argument("--out", required=True, help="target .csv or .parquet file")
+    p.add_argument("--format", choices=FILE_FORMATS, help="file format when --out has no such extension")
+
+    p = commands.add_parser("auto-assign", parents=[common], help="LLM-match every open requisition to vendors")
+    p.add_argument("--limit", type=int, help="at most this many requisitions")
+    p.add_argument("--workers", type=int, default=4, help="concurrent OpenAI requests")
+    p.add_argument("--batch-size", type=int, default=20, help="requisitions per transaction")
+
+    p = commands.add_parser("export-pdfs", parents=[common], help="render requisition PDFs into a directory")
+    p.add_argument("--out", required=True, help="output directory")
+    p.add_argument("--ids", type=lambda s: [int(i) for i in s.split(",")], help="comma-separated requisition ids")
+    p.add_argument("--since", help="only requisitions submitted on or after this timestamp, e.g. 2025-06-01")
+    p.add_argument("--overwrite", action="store_true", help="re-render PDFs that already exist")
+    p.add_argument("--workers", type=int, default=1, help="rendering processes")
+    p.add_argument("--batch-size", type=int, default=16, help="PDFs handed to a process at a time")
+
+    p = commands.add_parser("approve", parents=[common], help="approve bids in bulk")
+    target = p.add_mutually_exclusive_group(required=True)
+    target.add_argument("--bid", type=int, action="append", help="bid id to approve (repeatable)")
+    target.add_argument("--lowest", action="store_true",
+                        help="approve the lowest bid of every requisition with no approved bid")
+    p.add_argument("--max-level", type=int, default=1, help="with --lowest, only tiers up to this level")
+    p.add_argument("--approver", required=True)
+    p.add_argument("--notes", default="Approved by batch job")
+    p.add_argument("--batch-size", type=int, default=200, help="approvals per transaction")
+
+    p = commands.add_parser("backup", parents=[common], help="copy a consistent snapshot of the database")
+    p.add_argument("--out", required=True, help="target file, or a directory for a timestamped name")
+    p.add_argument("--batch-size", type=int, default=1024, help="pages copied per step")
+
+    p = commands.add_parser("export-parquet", parents=[common],
+                            help="append rows changed since the last export to Parquet datasets")
+    p.add_argument("--out", required=True, help="dataset directory, one subdirectory per table")
+    p.add_argument("--tables", type=lambda s: s.split(","), default=list(EXPORT_TABLES),
+                   help=f"comma-separated subset of {','.join(EXPORT_TABLES)}")
+    p.add_argument("--full", action="store_true", help="re-export every row, replacing the datasets")
+    p.add_argument("--batch-size", type=int, default=10000, help="rows per read and Parquet row group")
+
+    p = commands.add_parser("compact", parents=[common], help="prune the change log, checkpoint bid histories, optimize search indexes, ANALYZE and VACUUM")
+    p.add_argument("--prune-changes-before", type=int, metavar="SEQ",
+                   help="delete change_log entries up to this seq")
+    p.add_argument("--max-revision-chain", type=int, default=50, metavar="N",
+                   help="checkpoint bids with more than N revisions since their last full copy")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    summary = Summary(args.command, args.dry_run)
+
+    path = args.db or DB_PATH
+    if args.dry_run:
+        # A dry run writes nothing: no database is created and no schema upgrade or backfill touches the file
+        if not os.path.exists(path):
+            raise SystemExit(f"{args.command}: no database at {path}")
+        conn = connect(path, read_only=True)
+        missing = missing_schema(conn)
+        if missing:
+            # The commands need the current schema, so they run against an upgraded copy held in memory
+            more = f" and {len(missing) - 1} more" if len(missing) > 1 else ""
+            print(f"{args.command}: database needs upgrading (missing {missing[0]}{more}); dry run uses an "
+                  "upgraded in-memory copy. Run once without --dry-run to upgrade the file.", file=sys.stderr)
+            upgraded = sqlite3.connect(":memory:", check_same_thread=False)
+            conn.backup(upgraded)
+            conn.close()
+            conn = init_schema(upgraded)
+    else:
+        conn = init_schema(connect(path))
+    try:
+        COMMANDS[args.command](conn, args, summary)
+    finally:
+        conn.close()
+
+    result = summary.as_dict()
+    print(f"{args.command}: {result['succeeded']} succeeded, {result['failed']} failed, "
+          f"{result['skipped']} skipped in {result['elapsed_s']:.2f}s" + (" (dry run)" if args.dry_run else ""),
+          file=sys.stderr)
+    if args.summary == "-":
+        json.dump(result, sys.stdout, indent=2)
+        print()
+    elif args.summary:
+        with open(args.summary, "w") as f:
+            json.dump(result, f, indent=2)
+    return 1 if result["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""SQLite connection and schema setup shared by every page."""
+import os
+import sqlite3
+
+import pandas as pd
+
+from procurement.profiling import PROFILE_ENABLED, ProfiledConnection
+
+# Pages run from the repository root; PROCUREMENT_DB points tools at another file
+DB_PATH = os.environ.get("PROCUREMENT_DB", "db.db")
+
+
+# Low-cardinality text columns that page frames hold as categoricals
+CATEGORY_COLUMNS = ("status", "unit", "currency", "delivery_unit")
+
+
+def connect(path=None, timeout=5.0, read_only=False):
+    # timeout is how long a statement waits on another connection's lock before "database is locked"
+    factory = ProfiledConnection if PROFILE_ENABLED else sqlite3.Connection
+    path = path or DB_PATH
+    if read_only:
+        # mode=ro refuses writes and never creates the file
+        return sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", timeout=timeout, check_same_thread=False,
+                               factory=factory, uri=True)
+    return sqlite3.connect(path, timeout=timeout, check_same_thread=False, factory=factory)
+
+
+def copy_database(source, target):
+    """Copies ``source`` into a fresh ``target`` file through SQLite's backup API.
+
+    A plain file copy misses commits still in the source's WAL. Any ``-wal``
+    or ``-shm`` left next to ``target`` would also be replayed onto the copy,
+    so they are deleted with the old file.
+    """
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(target + suffix):
+            os.remove(target + suffix)
+    src, dst = connect(source, read_only=True), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+
+def load_frame(conn, sql, params=()):
+    """Runs a page query into a pyarrow-backed frame, with CATEGORY_COLUMNS as categoricals.
+
+    Arrow strings and numbers take a fraction of the memory of object columns;
+    nulls come back as ``pd.NA``. Masking a frame once per row is slower on Arrow
+    columns than on numpy ones, so pages build per-row lookups such as selectbox
+    labels in one pass.
+    """
+    df = pd.read_sql_query(sql, conn, params=params, dtype_backend="pyarrow")
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    return df
+
+
+def init_schema(conn):
+    # Imported here so each module can import `connect` without cycles
+    from procurement.approvals import init_bid_approvals
+    from procurement.assignments import init_requisition_vendors
+    from procurement.bids import init_vendor_bids
+    from procurement.changes import init_change_log
+    from procurement.fx import init_fx
+    from procurement.requisitions import init_requisitions
+    from procurement.revisions import init_bid_revisions
+    from procurement.search import init_search
+    from procurement.sla import init_sla
+    from procurement.spend import init_spend
+    from procurement.summary import init_requisition_summary
+    from procurement.tiers import init_approval_tiers
+    from procurement.transitions import init_status_transitions
+    from procurement.vendors import init_vendors
+
+    # WAL lets readers, such as the reports' read-only connection, run while a bid or approval commits.
+    # The mode is stored in the file, so it is switched once.
+    if conn.execute("PRAGMA journal_mode").fetchone()[0] not in ("wal", "memory"):
+        conn.execute("PRAGMA journal_mode = WAL")
+
+    init_requisitions(conn)
+    init_vendors(conn)
+    init_requisition_vendors(conn)
+    init_vendor_bids(conn)
+    init_bid_approvals(conn)
+    init_approval_tiers(conn)
+    init_fx(conn)
+    init_bid_revisions(conn)
+    init_requisition_summary(conn)
+    init_sla(conn)
+    init_spend(conn)
+    init_change_log(conn)
+    init_status_transitions(conn)
+    init_search(conn)
+    return conn
+
+
+def missing_schema(conn):
+    """Tables, views, indexes, triggers and columns ``init_schema`` would still add to ``conn``.
+
+    An empty list means the database is up to date. Columns are only listed
+    for tables that already exist. The reference schema is built in memory,
+    so ``conn`` may be read-only.
+    """
+    def objects(connection):
+        rows = connection.execute("SELECT type, name FROM sqlite_master WHERE name NOT LIKE 'sqlite_%'").fetchall()
+        return {(kind, name) for kind, name in rows}
+
+    def columns(connection, table):
+        return {column[1] for column in connection.execute(f'PRAGMA table_info("{table}")')}
+
+    reference = init_schema(sqlite3.connect(":memory:"))
+    try:
+        present = objects(conn)
+        missing = [f"{kind} {name}" for kind, name in sorted(objects(reference) - present)]
+        for kind, table in sorted(objects(reference) & present):
+            if kind == "table":
+                missing.extend(f"column {table}.{column}"
+                               for column in sorted(columns(reference, table) - columns(conn, table)))
+        return missing
+    finally:
+        reference.close()
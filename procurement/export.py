@@ -0,0 +1,205 @@
+"""Incremental Parquet export of the transactional tables for BI.
+
+Each table in ``EXPORT_TABLES`` becomes a Parquet dataset under the output
+directory, with one hive-style partition per export run::
+
+    out/vendor_bids/export_seq=12345/part-0.parquet
+
+The first run writes every row. Later runs append only the rows that the
+change log recorded as inserted, updated or deleted after the previous run's
+high-water mark. ``_export_state.json`` keeps that mark per table. Every row
+carries ``_seq``, the change-log position it reflects, and ``_op``, either
+``upsert`` or ``delete``; a deleted row keeps only its id. The current table
+is the latest ``_seq`` per id, minus deletes, and ``load_export`` reads it
+that way. If the change log was pruned past a table's mark, the changes in
+between are gone. That table is then exported in full again, replacing its
+dataset.
+
+Rows are read in keyset-paged batches of ``batch_size`` and written as
+Parquet row groups. Memory stays bounded by one batch, and no read lock is
+held between batches, whatever the table size.
+"""
+import json
+import os
+import shutil
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from procurement.changes import TRACKED_TABLES
+
+EXPORT_TABLES = TRACKED_TABLES
+STATE_FILE = "_export_state.json"
+
+# SQLite declared type -> Arrow type; TEXT and DATETIME stay strings, exactly as stored
+ARROW_TYPES = {"INTEGER": pa.int64(), "REAL": pa.float64(), "BOOLEAN": pa.bool_()}
+
+
+def arrow_schema(conn, table):
+    fields = [pa.field(name, ARROW_TYPES.get(declared.upper(), pa.string()))
+              for _, name, declared, *_ in conn.execute(f"PRAGMA table_info({table})")]
+    return pa.schema(fields + [pa.field("_seq", pa.int64()), pa.field("_op", pa.string())])
+
+
+def _column(values, type):
+    try:
+        return pa.array(values, type=type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # SQLite keeps values as given when they do not fit the declared type (and booleans as 0/1)
+        if pa.types.is_string(type):
+            return pa.array([None if v is None else str(v) for v in values], type=type)
+        numbers = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce")
+        return pa.array(numbers, from_pandas=True).cast(type, safe=False)
+
+
+def load_export_state(out):
+    path = os.path.join(out, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_state(out, state):
+    # Written last and atomically: a crashed run leaves the old marks, and its rerun overwrites the same partitions
+    path = os.path.join(out, STATE_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def _changes_pruned(conn, since, until):
+    # seq is AUTOINCREMENT and never skips, so a missing seq means prune_change_log removed it
+    count = conn.execute("SELECT COUNT(*) FROM change_log WHERE seq > ? AND seq <= ?", (since, until)).fetchone()[0]
+    return count < until - since
+
+
+def _queries(table, schema, full):
+    columns = [name for name in schema.names if name not in ("_seq", "_op")]
+    if full:
+        return f"""
+            SELECT {", ".join(columns)}, ? as _seq, 'upsert' as _op
+            FROM {table}
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?
+        """
+    # Latest change per row since the mark; a row that no longer exists was deleted
+    selected = ", ".join("c.row_id" if name == "id" else f"t.{name}" for name in columns)
+    return f"""
+        SELECT {selected}, c.seq as _seq, CASE WHEN t.id IS NULL THEN 'delete' ELSE 'upsert' END as _op
+        FROM (
+            SELECT row_id, MAX(seq) as seq
+            FROM change_log
+            WHERE table_name = ? AND seq > ? AND seq <= ? AND row_id > ?
+            GROUP BY row_id
+            ORDER BY row_id
+            LIMIT ?
+        ) c
+        LEFT JOIN {table} t ON t.id = c.row_id
+        ORDER BY c.row_id
+    """
+
+
+def _write_partition(conn, query, params, schema, path, batch_size):
+    """Streams ``query`` page by page into the Parquet file ``path``; returns (rows, deletes)."""
+    id_index = schema.get_field_index("id")
+    op_index = schema.get_field_index("_op")
+    writer, rows_written, deletes, last_id = None, 0, 0, 0
+    try:
+        while True:
+            rows = conn.execute(query, params(last_id)).fetchall()
+            if not rows:
+                break
+            columns = list(zip(*rows))
+            batch = pa.RecordBatch.from_arrays(
+                [_column(list(values), field.type) for values, field in zip(columns, schema)], schema=schema
+            )
+            if writer is None:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                writer = pq.ParquetWriter(path + ".tmp", schema)
+            writer.write_batch(batch)
+            rows_written += len(rows)
+            deletes += columns[op_index].count("delete")
+            last_id = rows[-1][id_index]
+            if len(rows) < batch_size:
+                break
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is not None:
+        os.replace(path + ".tmp", path)
+    return rows_written, deletes
+
+
+def export_tables(conn, out, tables=EXPORT_TABLES, batch_size=10000, full=False, dry_run=False):
+    """Exports each table's changes since its last export under ``out``; returns a result per table.
+
+    ``full`` re-exports every row, replacing the datasets. With ``dry_run``
+    nothing is written and ``rows`` is how many rows would be.
+    """
+    unknown = set(tables) - set(EXPORT_TABLES)
+    if unknown:
+        raise ValueError(f"Not an exportable table: {', '.join(sorted(unknown))}")
+    state = load_export_state(out)
+    until = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+
+    results = {}
+    for table in tables:
+        since = state.get(table, {}).get("seq")
+        table_full = full or since is None or since > until or _changes_pruned(conn, since, until)
+        result = {"mode": "full" if table_full else "incremental", "since": since, "seq": until}
+        results[table] = result
+
+        if dry_run:
+            if table_full:
+                result["rows"] = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            else:
+                result["rows"] = conn.execute(
+                    "SELECT COUNT(DISTINCT row_id) FROM change_log WHERE table_name = ? AND seq > ? AND seq <= ?",
+                    (table, since, until)
+                ).fetchone()[0]
+            continue
+
+        schema = arrow_schema(conn, table)
+        query = _queries(table, schema, table_full)
+        partition = f"export_seq={until}"
+        if table_full:
+            # Written beside the old dataset and swapped in once complete
+            target = os.path.join(out, f".{table}.full")
+            shutil.rmtree(target, ignore_errors=True)
+            rows, deletes = _write_partition(
+                conn, query, lambda last_id: (until, last_id, batch_size), schema,
+                os.path.join(target, partition, "part-0.parquet"), batch_size
+            )
+            shutil.rmtree(os.path.join(out, table), ignore_errors=True)
+            if rows:
+                os.replace(target, os.path.join(out, table))
+        else:
+            rows, deletes = _write_partition(
+                conn, query, lambda last_id: (table, since, until, last_id, batch_size), schema,
+                os.path.join(out, table, partition, "part-0.parquet"), batch_size
+            )
+        result["rows"], result["deletes"] = rows, deletes
+        state[table] = {"seq": until, "exported_at": datetime.now().isoformat(timespec="seconds")}
+
+    if not dry_run:
+        os.makedirs(out, exist_ok=True)
+        _save_state(out, state)
+    return results
+
+
+def load_export(out, table, columns=None):
+    """The table as of its last export: the latest row per id, without deleted rows."""
+    path = os.path.join(out, table)
+    if not os.path.isdir(path):
+        return pd.DataFrame(columns=columns)
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    read = None if columns is None else list(dict.fromkeys(["id", *columns, "_seq", "_op"]))
+    df = dataset.to_table(columns=read).to_pandas()
+    df = df.sort_values("_seq", kind="stable").drop_duplicates("id", keep="last")
+    df = df[df["_op"] != "delete"].drop(columns=["_seq", "_op", "export_seq"], errors="ignore")
+    return df.sort_values("id").reset_index(drop=True)
@@ -0,0 +1,106 @@
+"""Currency normalisation for vendor bids.
+
+``fx_rates`` holds one rate per currency into BASE_CURRENCY. Every bid carries
+a persisted ``amount_base`` column that triggers keep in step with
+``bid_amount``/``currency``, so sorting, aggregation and tiering can be done
+in SQL on comparable amounts.
+"""
+import os
+
+import pandas as pd
+
+BASE_CURRENCY = "USD"
+FX_RATES_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "fx_rates.csv")
+
+
+def init_fx(conn, csv_path=FX_RATES_CSV):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS fx_rates (
+            currency TEXT PRIMARY KEY,
+            rate_to_base REAL NOT NULL,
+            as_of TEXT
+        )
+    """)
+
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(vendor_bids)")]
+    if "amount_base" not in columns:
+        conn.execute("ALTER TABLE vendor_bids ADD COLUMN amount_base REAL")
+
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_vendor_bids_amount_base ON vendor_bids (amount_base)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_vendor_bids_requisition_amount ON vendor_bids (requisition_id, amount_base)"
+    )
+
+    # Keep amount_base in step with every write to vendor_bids
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS vendor_bids_amount_base_insert
+        AFTER INSERT ON vendor_bids
+        BEGIN
+            UPDATE vendor_bids
+            SET amount_base = NEW.bid_amount * (SELECT rate_to_base FROM fx_rates WHERE currency = NEW.currency)
+            WHERE id = NEW.id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS vendor_bids_amount_base_update
+        AFTER UPDATE OF bid_amount, currency ON vendor_bids
+        BEGIN
+            UPDATE vendor_bids
+            SET amount_base = NEW.bid_amount * (SELECT rate_to_base FROM fx_rates WHERE currency = NEW.currency)
+            WHERE id = NEW.id;
+        END
+    """)
+
+    if conn.execute("SELECT COUNT(*) FROM fx_rates").fetchone()[0] == 0 and os.path.exists(csv_path):
+        load_fx_rates_csv(conn, csv_path)
+    else:
+        # Backfill bids written before the column existed
+        conn.execute("""
+            UPDATE vendor_bids
+            SET amount_base = bid_amount * (SELECT rate_to_base FROM fx_rates WHERE currency = vendor_bids.currency)
+            WHERE amount_base IS NULL
+        """)
+    conn.commit()
+
+
+def load_fx_rates_csv(conn, source):
+    # `source` is a path or file-like object with currency,rate_to_base[,as_of] columns
+    rates = pd.read_csv(source)
+    missing = {"currency", "rate_to_base"} - set(rates.columns)
+    if missing:
+        raise ValueError(f"FX rate file is missing columns: {', '.join(sorted(missing))}")
+    if "as_of" not in rates.columns:
+        rates["as_of"] = None
+
+    rates["currency"] = rates["currency"].astype("string").str.strip().str.upper()
+    if (rates["currency"].isna() | (rates["currency"] == "")).any():
+        raise ValueError("FX rate file has rows without a currency")
+    duplicated = rates.loc[rates["currency"].duplicated(), "currency"].unique()
+    if len(duplicated):
+        raise ValueError(f"FX rate file lists a currency more than once: {', '.join(sorted(duplicated))}")
+    # Blank, non-numeric, zero or negative rates would store garbage and re-price bids from it
+    rates["rate_to_base"] = pd.to_numeric(rates["rate_to_base"], errors="coerce")
+    invalid = rates.loc[~(rates["rate_to_base"] > 0), "currency"]
+    if len(invalid):
+        raise ValueError(f"FX rate file needs a positive number as rate_to_base for: {', '.join(sorted(invalid))}")
+
+    rates["as_of"] = rates["as_of"].astype(object).where(rates["as_of"].notna(), None)
+    rows = [(str(currency), float(rate), as_of)
+            for currency, rate, as_of in rates[["currency", "rate_to_base", "as_of"]].itertuples(index=False)]
+
+    with conn:
+        conn.executemany("""
+            INSERT INTO fx_rates (currency, rate_to_base, as_of) VALUES (?, ?, ?)
+            ON CONFLICT(currency) DO UPDATE SET rate_to_base = excluded.rate_to_base, as_of = excluded.as_of
+        """, rows)
+
+        # Re-price the bids whose currency rate changed
+        conn.executemany(
+            "UPDATE vendor_bids SET amount_base = bid_amount * ? WHERE currency = ?",
+            [(rate, currency) for currency, rate, _ in rows]
+        )
+    return len(rows)
+
+
+def load_fx_rates(conn):
+    return pd.read_sql_query("SELECT currency, rate_to_base, as_of FROM fx_rates ORDER BY currency", conn)
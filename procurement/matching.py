@@ -0,0 +1,88 @@
+"""LLM vendor matching, shared by the Vendor Assignment page and the CLI."""
+import json
+
+MATCH_MODEL = "gpt-4o"
+SYSTEM_PROMPT = ("You are a procurement specialist AI that matches requisitions to suitable vendors. "
+                 "There can be more than one match. Return a list of dicts, even if you only have one return value.")
+
+
+def build_match_prompt(requisition, vendors):
+    # Prepare vendor data for the prompt
+    vendor_data = "\n\n".join([
+        f"Vendor {v['id']}: {v['name']}\nDescription: {v['description']}"
+        for _, v in vendors.iterrows()
+    ])
+
+    # Construct prompt
+    prompt = f"""
+You are an AI procurement assistant that matches requisitions to the most suitable vendors based on the requisition description and vendor capabilities.
+
+REQUISITION DETAILS:
+Title: {requisition['title']}
+Description: {requisition['description']}
+Quantity: {requisition['quantity']} {requisition['unit']}
+
+AVAILABLE VENDORS:
+{vendor_data}
+
+INSTRUCTIONS:
+1. Analyze the requisition details and identify key requirements.
+2. Evaluate each vendor's suitability based on their description.
+3. Select the top 3 most suitable vendors for this requisition.
+4. For each selected vendor, provide:
+   - Vendor ID
+   - Match score (0.0 to 1.0, where 1.0 is perfect match)
+   - A brief explanation of why this vendor is suitable
+
+OUTPUT FORMAT:
+Provide your response in JSON format as follows:
+[
+  {{
+    "vendor_id": <id>,
+    "match_score": <score>,
+    "match_reason": "<explanation>"
+  }},
+  ...
+]
+Do not include any other text in your response besides this JSON.
+"""
+    return prompt
+
+
+def parse_matches(result_text):
+    # Clean the response if it contains markdown code blocks
+    if "```json" in result_text:
+        result_text = result_text.split("```json")[1].split("```")[0].strip()
+    elif "```" in result_text:
+        result_text = result_text.split("```")[1].split("```")[0].strip()
+
+    results = json.loads(result_text)
+
+    # Ensure we have a list of matches
+    if isinstance(results, dict) and "matches" in results:
+        return results["matches"]
+    elif isinstance(results, list):
+        return results
+    else:
+        return []
+
+
+def match_vendors_to_requisition(requisition, vendors, api_key, client=None):
+    """Top vendor matches for one requisition; API and parsing errors propagate to the caller.
+
+    ``client`` lets batch callers share one OpenAI client across threads.
+    """
+    if client is None:
+        # openai is slow to import, so it is loaded on the first matching request
+        import openai
+
+        client = openai.OpenAI(api_key=api_key)
+
+    response = client.chat.completions.create(
+        model=MATCH_MODEL,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": build_match_prompt(requisition, vendors)}
+        ],
+    )
+    return parse_matches(response.choices[0].message.content)
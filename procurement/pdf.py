@@ -0,0 +1,181 @@
+"""Printable requisition PDFs, shared by the Releases page and the CLI."""
+import tempfile
+from datetime import datetime
+
+
+def generate_pdf(row, path=None):
+    """Renders one requisition to PDF and returns the file path.
+
+    ``row`` needs id, title, description, quantity, unit, request_date and
+    timestamp. Without ``path`` the PDF goes to a new temporary file.
+    """
+    # fpdf is only needed when a PDF is actually generated
+    from fpdf import FPDF
+
+    class BeautifulPDF(FPDF):
+        def __init__(self):
+            super().__init__()
+            # Set document properties
+            self.set_auto_page_break(auto=True, margin=15)
+            self.set_margins(left=10, top=10, right=10)
+
+            # Define colors for consistent use
+            self.blue_dark = (30, 58, 138)
+            self.blue_medium = (59, 130, 246)
+            self.gray_light = (240, 240, 240)
+            self.gray_text = (75, 85, 99)
+            self.black = (0, 0, 0)
+
+        def header(self):
+            # Create a professional header with styling
+            self.set_font('Arial', 'B', 16)
+            self.set_text_color(*self.blue_dark)
+
+            # Add a blue rectangle header background
+            self.set_fill_color(*self.blue_dark)
+            self.rect(10, 10, 190, 20, 'F')
+
+            # Add title text in white
+            self.set_text_color(255, 255, 255)
+            self.set_xy(15, 15)
+            self.cell(180, 10, 'MATERIAL REQUISITION', 0, 0, 'C')
+
+            # Add a secondary title below
+            self.set_font('Arial', 'I', 10)
+            self.set_text_color(*self.gray_text)
+            self.set_xy(10, 32)
+            self.cell(190, 6, 'Requisition Management System', 0, 0, 'C')
+
+            # Add a line separator
+            self.set_draw_color(*self.blue_medium)
+            self.set_line_width(0.5)
+            self.line(10, 40, 200, 40)
+
+            # Set the position for the content to begin
+            self.set_y(45)
+
+        def footer(self):
+            # Position at 1.5 cm from bottom
+            self.set_y(-15)
+            # Arial italic 8
+            self.set_font('Arial', 'I', 8)
+            self.set_text_color(*self.gray_text)
+            # Page number
+            self.cell(95, 10, f'Generated on {datetime.now().strftime("%Y-%m-%d %H:%M")}', 0, 0, 'L')
+            self.cell(95, 10, f'Page {self.page_no()}/{{nb}}', 0, 0, 'R')
+
+        def add_section_title(self, title):
+            # Style section titles with blue background
+            self.set_font('Arial', 'B', 12)
+            self.set_fill_color(*self.blue_medium)
+            self.set_text_color(255, 255, 255)
+            self.cell(0, 10, title, 0, 1, 'L', 1)
+            self.ln(2)  # Add a small space after the title
+
+        def add_info_field(self, title, value, width=90):
+            # Create a labeled field for information
+            self.set_font('Arial', 'B', 10)
+            self.set_text_color(*self.blue_dark)
+            self.cell(40, 8, f"{title}:", 0, 0)
+
+            # Set text style for the value
+            self.set_font('Arial', '', 10)
+            self.set_text_color(*self.black)
+
+            # For multi-line text (like descriptions)
+            if len(str(value)) > 50 or title == "Description":
+                self.ln()
+                self.set_x(20)  # Indent the description
+                self.set_fill_color(*self.gray_light)
+                self.multi_cell(width, 6, str(value), 0, 'L', 1)
+                self.ln(2)  # Add space after the description
+            else:
+                self.cell(width - 40, 8, str(value), 0, 1)
+
+    # Initialize PDF
+    pdf = BeautifulPDF()
+    pdf.alias_nb_pages()
+    pdf.add_page()
+
+    # Add requisition ID (reference number)
+    pdf.set_font('Arial', 'B', 10)
+    pdf.set_text_color(*pdf.blue_dark)
+    ref_id = f"REQ-{row.get('id', 1000):04d}"
+    pdf.cell(0, 8, f"Reference: {ref_id}", 0, 1, 'R')
+    pdf.ln(5)
+
+    # Requisition Details Section
+    pdf.add_section_title("REQUISITION DETAILS")
+
+    # Left column fields
+    pdf.add_info_field("Title", row["title"])
+    pdf.add_info_field("Description", row["description"])
+    pdf.add_info_field("Quantity", f"{row['quantity']} {row['unit']}")
+
+    # Add some space before date information
+    pdf.ln(5)
+
+    # Date information
+    pdf.add_info_field("Request Date", row["request_date"])
+    pdf.add_info_field("Timestamp", row["timestamp"])
+
+    # Add some space before signature section
+    pdf.ln(15)
+
+    # Signature section with proper spacing
+    pdf.set_font('Arial', 'B', 11)
+    pdf.set_text_color(*pdf.blue_dark)
+    pdf.cell(0, 10, "SIGNATURES", 0, 1, 'L')
+
+    # Draw signature lines
+    pdf.set_draw_color(*pdf.blue_medium)
+
+    # Calculate positions for signature lines
+    sig_y = pdf.get_y() + 15
+
+    # First signature (Requested By)
+    pdf.line(20, sig_y, 85, sig_y)
+    pdf.set_xy(20, sig_y + 2)
+    pdf.set_font('Arial', '', 9)
+    pdf.cell(65, 5, "Requested By", 0, 0, 'C')
+
+    # Second signature (Approved By)
+    pdf.line(115, sig_y, 180, sig_y)
+    pdf.set_xy(115, sig_y + 2)
+    pdf.set_font('Arial', '', 9)
+    pdf.cell(65, 5, "Approved By", 0, 1, 'C')
+
+    # Add date lines for signatures
+    sig_date_y = sig_y + 15
+    pdf.set_font('Arial', '', 8)
+
+    # First date line
+    pdf.line(20, sig_date_y, 85, sig_date_y)
+    pdf.set_xy(20, sig_date_y + 2)
+    pdf.cell(65, 5, "Date", 0, 0, 'C')
+
+    # Second date line
+    pdf.line(115, sig_date_y, 180, sig_date_y)
+    pdf.set_xy(115, sig_date_y + 2)
+    pdf.cell(65, 5, "Date", 0, 1, 'C')
+
+    # Add terms and conditions
+    pdf.ln(25)
+    pdf.add_section_title("TERMS AND CONDITIONS")
+
+    pdf.set_font('Arial', '', 9)
+    terms_text = """1. All requisitions must be approved before procurement.
+2. Items will be procured based on company policies and procedures.
+3. Delivery timelines depend on item availability and supplier terms.
+4. For any questions regarding this requisition, please contact the procurement department."""
+
+    pdf.set_fill_color(*pdf.blue_medium)
+    pdf.multi_cell(0, 6, terms_text, 0, 'L', 1)
+
+    # Output the PDF to a file
+    if path is not None:
+        pdf.output(path)
+        return path
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmpfile:
+        pdf.output(tmpfile.name)
+        return tmpfile.name
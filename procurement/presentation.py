@@ -0,0 +1,82 @@
+"""Shared display formatting for the Streamlit pages.
+
+Timestamps are parsed once when a frame is loaded and every composite display
+column is built with whole-column string/NumPy operations instead of
+``df.apply(..., axis=1)``.
+"""
+import numpy as np
+import pandas as pd
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M"
+DATE_FORMAT = "%Y-%m-%d"
+
+# Formats that map directly onto np.datetime_as_string units
+_NUMPY_UNITS = {
+    DATETIME_FORMAT: "m",
+    DATE_FORMAT: "D",
+}
+
+
+def parse_timestamps(df, columns):
+    # Convert the stored TEXT timestamps to datetime64 in place, once per load
+    for column in columns:
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column], format="ISO8601", errors="coerce")
+    return df
+
+
+def format_timestamps(values, fmt=DATETIME_FORMAT):
+    # Missing timestamps are rendered as an empty string rather than "NaT"
+    values = pd.Series(values)
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        values = pd.to_datetime(values, format="ISO8601", errors="coerce")
+
+    unit = _NUMPY_UNITS.get(fmt)
+    if unit is None:
+        return values.dt.strftime(fmt).fillna("")
+
+    text = np.datetime_as_string(values.to_numpy(dtype="datetime64[ns]"), unit=unit)
+    formatted = pd.Series(text, index=values.index).str.replace("T", " ", regex=False)
+    return formatted.where(values.notna(), "")
+
+
+def format_timestamp(value, fmt=DATETIME_FORMAT):
+    # Scalar counterpart of format_timestamps for single detail views
+    value = pd.to_datetime(value, format="ISO8601", errors="coerce")
+    return "" if pd.isna(value) else value.strftime(fmt)
+
+
+def join_text(*parts, sep=" "):
+    # Concatenate Series (and scalars) element-wise into a single string column
+    index = next((part.index for part in parts if isinstance(part, pd.Series)), None)
+    result = None
+    for part in parts:
+        if isinstance(part, pd.Series):
+            part = part.astype(str)
+        else:
+            part = str(part)
+        result = part if result is None else result + sep + part
+    if not isinstance(result, pd.Series):
+        result = pd.Series(result, index=index)
+    return result
+
+
+def percent_label(scores):
+    # 0.87 -> "87%"
+    return (scores * 100).round().astype(int).astype(str) + "%"
+
+
+def percent_value(scores):
+    # Truncated integer percentages used in the match cards
+    return (scores * 100).astype(int)
+
+
+def ratio_label(numerator, denominator, empty="None"):
+    # "approved/total" where a total exists, otherwise the empty label
+    label = join_text(numerator.fillna(0).astype(int), denominator.fillna(0).astype(int), sep="/")
+    return pd.Series(np.where(denominator > 0, label, empty), index=denominator.index)
+
+
+def price_range(currency, low, high):
+    # "USD 100.0 - USD 250.0"
+    return join_text(currency, low) + " - " + join_text(currency, high)
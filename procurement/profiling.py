@@ -0,0 +1,281 @@
+"""Query profiler for every connection opened through procurement.db.connect.
+
+Enabled with ``PROCUREMENT_PROFILE=1``. Each statement's wall time (execute
+plus fetch), rows returned and calling page/function are aggregated in
+process. Statements slower than ``PROCUREMENT_SLOW_MS`` are appended to the
+JSONL slow-query log at ``PROCUREMENT_SLOW_LOG`` along with their
+``EXPLAIN QUERY PLAN``. Full scans of tables with more than
+``PROCUREMENT_SCAN_ROWS`` rows are flagged. The Diagnostics page reads
+both the aggregates and the log.
+"""
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+PROFILE_ENABLED = os.environ.get("PROCUREMENT_PROFILE", "").lower() in ("1", "true", "yes")
+SLOW_QUERY_MS = float(os.environ.get("PROCUREMENT_SLOW_MS", "100"))
+SLOW_QUERY_LOG = os.environ.get("PROCUREMENT_SLOW_LOG", os.path.join("logs", "slow_queries.jsonl"))
+LARGE_TABLE_ROWS = int(os.environ.get("PROCUREMENT_SCAN_ROWS", "10000"))
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES_DIR = os.path.join(REPO_ROOT, "pages")
+
+_TABLE_REFERENCE = re.compile(r"\b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_SCAN = re.compile(r"^SCAN (\w+)(?!.*USING (?:COVERING )?INDEX)")
+_NOT_ALIASES = {"where", "on", "join", "left", "inner", "group", "order", "limit", "set", "values", "using",
+                "select", "cross", "natural", "outer"}
+# Frames from these files are plumbing, not the caller we want to report
+_SKIP_FILES = (os.path.abspath(__file__), os.path.dirname(pd.__file__), os.path.dirname(sqlite3.__file__))
+
+_lock = threading.Lock()
+_stats = {}
+_table_sizes = {}
+
+
+def _normalise(sql):
+    return " ".join(sql.split())
+
+
+def _callers():
+    # (page, function) of the nearest page frame and the nearest non-plumbing frame
+    page = function = None
+    frame = sys._getframe(2)
+    while frame is not None and page is None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if function is None and not filename.startswith(_SKIP_FILES):
+            if filename.startswith(REPO_ROOT + os.sep):
+                module = os.path.splitext(os.path.relpath(filename, REPO_ROOT))[0].replace(os.sep, ".")
+            else:
+                module = os.path.basename(filename)
+            function = f"{module}.{frame.f_code.co_name}"
+        if filename.startswith(PAGES_DIR) or os.path.basename(filename) == "Home.py":
+            page = os.path.basename(filename)
+        frame = frame.f_back
+    return page, function
+
+
+def _table_aliases(sql):
+    aliases = {}
+    for table, alias in _TABLE_REFERENCE.findall(sql):
+        aliases[table] = table
+        if alias and alias.lower() not in _NOT_ALIASES:
+            aliases[alias] = table
+    return aliases
+
+
+def _table_size(conn, table):
+    # max(rowid) is an O(log n) estimate, unlike COUNT(*)
+    if table not in _table_sizes:
+        try:
+            row = sqlite3.Connection.execute(conn, f"SELECT MAX(rowid) FROM {table}").fetchone()
+            _table_sizes[table] = row[0] or 0
+        except sqlite3.Error:
+            _table_sizes[table] = 0
+    return _table_sizes[table]
+
+
+def explain(conn, sql, params=()):
+    """``EXPLAIN QUERY PLAN`` rows plus the large tables the plan scans in full."""
+    try:
+        plan = [row[3] for row in sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", params)]
+    except sqlite3.Error as e:
+        return [f"unavailable: {e}"], []
+
+    aliases = _table_aliases(sql)
+    large_scans = []
+    for detail in plan:
+        match = _SCAN.match(detail)
+        if match:
+            table = aliases.get(match.group(1), match.group(1))
+            rows = _table_size(conn, table)
+            if rows > LARGE_TABLE_ROWS:
+                large_scans.append({"table": table, "rows": rows})
+    return plan, large_scans
+
+
+class _Query:
+    """One execution of one statement, completed once its results are fetched."""
+
+    __slots__ = ("conn", "sql", "params", "page", "function", "elapsed", "rows", "done")
+
+    def __init__(self, conn, sql, params):
+        self.conn = conn
+        self.sql = sql
+        self.params = params
+        self.page, self.function = _callers()
+        self.elapsed = 0.0
+        self.rows = 0
+        self.done = False
+
+    def finish(self):
+        if self.done:
+            return
+        self.done = True
+        record(self.conn, self.sql, self.params, self.elapsed, self.rows, self.page, self.function)
+
+
+def record(conn, sql, params, elapsed, rows, page=None, function=None):
+    key = _normalise(sql)
+    with _lock:
+        stats = _stats.get(key)
+        if stats is None:
+            stats = _stats[key] = {"calls": 0, "total_s": 0.0, "max_s": 0.0, "rows": 0, "callers": {}}
+        stats["calls"] += 1
+        stats["total_s"] += elapsed
+        stats["max_s"] = max(stats["max_s"], elapsed)
+        stats["rows"] += rows
+        caller = f"{page or '-'} / {function or '-'}"
+        stats["callers"][caller] = stats["callers"].get(caller, 0) + 1
+
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        plan, large_scans = explain(conn, sql, params)
+        _write_slow_query({
+            "logged_at": datetime.now().isoformat(timespec="seconds"),
+            "duration_ms": round(elapsed * 1000, 3),
+            "rows": rows,
+            "page": page,
+            "function": function,
+            "sql": key,
+            "params": repr(params)[:500],
+            "plan": plan,
+            "large_scans": large_scans,
+        })
+
+
+def _write_slow_query(entry):
+    directory = os.path.dirname(SLOW_QUERY_LOG)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with _lock, open(SLOW_QUERY_LOG, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    _query = None
+
+    def _start(self, sql, params):
+        if self._query is not None:
+            self._query.finish()
+        self._query = _Query(self.connection, sql, params)
+
+    def execute(self, sql, parameters=()):
+        self._start(sql, parameters)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._query.elapsed += time.perf_counter() - started
+            # Statements without a result set are complete once executed
+            if self.description is None:
+                self._query.rows = max(self.rowcount, 0)
+                self._query.finish()
+
+    def executemany(self, sql, seq_of_parameters):
+        self._start(sql, ())
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._query.elapsed += time.perf_counter() - started
+            self._query.rows = max(self.rowcount, 0)
+            self._query.finish()
+
+    def _fetch(self, method, *args):
+        started = time.perf_counter()
+        result = method(*args)
+        query = self._query
+        if query is not None and not query.done:
+            query.elapsed += time.perf_counter() - started
+            if result is None:
+                query.finish()
+            elif isinstance(result, list):
+                query.rows += len(result)
+                # fetchall, or a short fetchmany, drains the result set
+                if method.__name__ == "fetchall" or len(result) < args[0]:
+                    query.finish()
+            else:
+                query.rows += 1
+        return result
+
+    def fetchone(self):
+        return self._fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._fetch(super().fetchmany, self.arraysize if size is None else size)
+
+    def fetchall(self):
+        return self._fetch(super().fetchall)
+
+    def __next__(self):
+        # `for row in conn.execute(...)` bypasses the fetch methods
+        row = self._fetch(self._next_row)
+        if row is None:
+            raise StopIteration
+        return row
+
+    def _next_row(self):
+        try:
+            return super().__next__()
+        except StopIteration:
+            return None
+
+    def close(self):
+        if self._query is not None:
+            self._query.finish()
+        super().close()
+
+    def __del__(self):
+        if self._query is not None:
+            self._query.finish()
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """Connection whose cursors, including the implicit ones behind execute(), are profiled."""
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def query_stats():
+    """Per-statement aggregates since the process started, slowest total first."""
+    with _lock:
+        rows = [{
+            "sql": sql,
+            "calls": s["calls"],
+            "total_ms": s["total_s"] * 1000,
+            "mean_ms": s["total_s"] * 1000 / s["calls"],
+            "max_ms": s["max_s"] * 1000,
+            "rows": s["rows"],
+            "callers": ", ".join(f"{c} ({n})" for c, n in sorted(s["callers"].items(), key=lambda i: -i[1])),
+        } for sql, s in _stats.items()]
+    columns = ["sql", "calls", "total_ms", "mean_ms", "max_ms", "rows", "callers"]
+    return pd.DataFrame(rows, columns=columns).sort_values("total_ms", ascending=False, ignore_index=True)
+
+
+def reset_query_stats():
+    with _lock:
+        _stats.clear()
+        _table_sizes.clear()
+
+
+def load_slow_queries(path=None, limit=500):
+    """Most recent slow-query log entries, newest first."""
+    path = path or SLOW_QUERY_LOG
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        lines = f.readlines()[-limit:]
+    return [json.loads(line) for line in reversed(lines) if line.strip()]
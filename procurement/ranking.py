@@ -0,0 +1,100 @@
+"""Weighted multi-criteria bid ranking.
+
+Each bid is scored on price (base-currency amount), lead time (normalised to
+days), the vendor's match score for the requisition and the vendor's
+historical win rate. Price and lead time are min-max scaled within each
+requisition, so every requisition in a frame is ranked in one vectorized pass.
+"""
+import numpy as np
+import pandas as pd
+
+DELIVERY_UNIT_DAYS = {
+    "day": 1, "days": 1,
+    "week": 7, "weeks": 7,
+    "month": 30, "months": 30,
+}
+
+DEFAULT_WEIGHTS = {
+    "price": 0.5,
+    "lead_time": 0.2,
+    "match_score": 0.2,
+    "win_rate": 0.1,
+}
+
+
+def delivery_days(delivery_time, delivery_unit):
+    # "2 weeks" and "14 days" both become 14; unknown units become NaN
+    factor = delivery_unit.astype(str).str.strip().str.lower().map(DELIVERY_UNIT_DAYS)
+    return pd.to_numeric(delivery_time, errors="coerce") * factor
+
+
+def load_bids_for_ranking(conn, requisition_ids=None):
+    where = ""
+    params = []
+    if requisition_ids is not None:
+        requisition_ids = [int(x) for x in requisition_ids]
+        if not requisition_ids:
+            requisition_ids = [-1]
+        where = f"WHERE vb.requisition_id IN ({', '.join('?' * len(requisition_ids))})"
+        params = requisition_ids
+
+    return pd.read_sql_query(f"""
+        SELECT vb.id as bid_id, vb.requisition_id, vb.vendor_id, v.name as vendor_name,
+               vb.bid_amount, vb.currency, vb.amount_base,
+               vb.delivery_time, vb.delivery_unit,
+               rv.match_score,
+               COALESCE(hist.wins, 0) as wins,
+               COALESCE(hist.decisions, 0) as decisions
+        FROM vendor_bids vb
+        JOIN vendors v ON vb.vendor_id = v.id
+        LEFT JOIN (
+            SELECT requisition_id, vendor_id, MAX(match_score) as match_score
+            FROM requisition_vendors
+            GROUP BY requisition_id, vendor_id
+        ) rv ON rv.requisition_id = vb.requisition_id AND rv.vendor_id = vb.vendor_id
+        LEFT JOIN (
+            SELECT vb2.vendor_id,
+                   SUM(CASE WHEN ba.status = 'approved' THEN 1 ELSE 0 END) as wins,
+                   COUNT(*) as decisions
+            FROM bid_approvals ba
+            JOIN vendor_bids vb2 ON ba.vendor_bid_id = vb2.id
+            WHERE ba.status IN ('approved', 'rejected')
+            GROUP BY vb2.vendor_id
+        ) hist ON hist.vendor_id = vb.vendor_id
+        {where}
+    """, conn, params=params)
+
+
+def _lower_is_better(values, groups):
+    # Scale to [0, 1] within each requisition; 1 is the best (lowest) value
+    low = values.groupby(groups).transform("min")
+    high = values.groupby(groups).transform("max")
+    spread = (high - low).to_numpy()
+    scaled = np.divide((high - values).to_numpy(), spread, out=np.ones(len(values)), where=spread > 0)
+    return pd.Series(scaled, index=values.index).where(values.notna(), 0.0)
+
+
+def rank_bids(bids, weights=None):
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    total_weight = sum(weights.values()) or 1.0
+
+    ranked = bids.copy()
+    groups = ranked["requisition_id"]
+
+    ranked["delivery_days"] = delivery_days(ranked["delivery_time"], ranked["delivery_unit"])
+    # Laplace-smoothed so vendors without history start at 0.5
+    ranked["win_rate"] = (ranked["wins"] + 1) / (ranked["decisions"] + 2)
+
+    ranked["price_score"] = _lower_is_better(ranked["amount_base"], groups)
+    ranked["lead_time_score"] = _lower_is_better(ranked["delivery_days"], groups)
+    ranked["match_score"] = ranked["match_score"].fillna(0.0)
+
+    ranked["score"] = (
+        weights["price"] * ranked["price_score"]
+        + weights["lead_time"] * ranked["lead_time_score"]
+        + weights["match_score"] * ranked["match_score"]
+        + weights["win_rate"] * ranked["win_rate"]
+    ) / total_weight
+
+    ranked["rank"] = ranked.groupby("requisition_id")["score"].rank(method="min", ascending=False).astype(int)
+    return ranked.sort_values(["requisition_id", "rank", "amount_base"]).reset_index(drop=True)
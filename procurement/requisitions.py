@@ -0,0 +1,66 @@
+"""Requisition records."""
+import pandas as pd
+
+from procurement.db import load_frame
+
+REQUISITION_COLUMNS = ("id", "title", "description", "quantity", "unit", "request_date", "generated_by_ai",
+                       "timestamp", "department")
+# List views leave out the free-text description; get_requisition_details fetches it for the selected row
+REQUISITION_LIST_COLUMNS = tuple(column for column in REQUISITION_COLUMNS if column != "description")
+
+
+def init_requisitions(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS requisitions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT,
+            description TEXT,
+            quantity INTEGER,
+            unit TEXT,
+            request_date TEXT,
+            generated_by_ai BOOLEAN,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(requisitions)")]
+    if "department" not in columns:
+        conn.execute("ALTER TABLE requisitions ADD COLUMN department TEXT")
+    conn.commit()
+
+
+def insert_requisition(conn, title, description, quantity, unit, request_date, generated_by_ai, department=None,
+                       commit=True):
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO requisitions (title, description, quantity, unit, request_date, generated_by_ai, department)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (title, description, quantity, unit, request_date, generated_by_ai, department or None))
+    if commit:
+        conn.commit()
+    return cursor.lastrowid
+
+
+def load_requisitions(conn, columns=REQUISITION_LIST_COLUMNS):
+    return load_frame(conn, f"SELECT {', '.join(columns)} FROM requisitions ORDER BY timestamp DESC")
+
+
+def get_requisition_details(conn, requisition_id):
+    df = pd.read_sql_query("""
+        SELECT * FROM requisitions WHERE id = ?
+    """, conn, params=(requisition_id,))
+    if df.empty:
+        return None
+    return df.iloc[0]
+
+
+def update_requisition(conn, record_id, title, description, quantity, unit, request_date, department=None,
+                       commit=True):
+    # department is only changed when one is given
+    conn.execute("""
+        UPDATE requisitions
+        SET title = ?, description = ?, quantity = ?, unit = ?, request_date = ?,
+            department = COALESCE(?, department)
+        WHERE id = ?
+    """, (title, description, quantity, unit, request_date, department or None, record_id))
+    if commit:
+        conn.commit()
@@ -0,0 +1,168 @@
+"""Append-only revision history of vendor bids.
+
+``save_bid`` updates a bid in place, so triggers record each change in
+``vendor_bid_revisions``. The first revision of a bid holds every tracked
+field. Later ones hold only the fields that changed, as a JSON object.
+Reconstructing a bid replays the deltas from the nearest full row, and
+``checkpoint_bid_revisions`` appends full "checkpoint" rows to long chains so
+that replay stays short. Rows are never updated or deleted.
+
+Revision kinds: ``create`` and ``checkpoint`` (all fields), ``update``
+(changed fields only) and ``delete`` (the bid was removed).
+"""
+import json
+from datetime import datetime
+
+import pandas as pd
+
+# Fields a revision tracks; amount_base is derived from these and the FX rates
+BID_FIELDS = ("vendor_id", "requisition_id", "bid_amount", "currency", "notes", "delivery_time", "delivery_unit",
+              "bid_timestamp", "status")
+
+# Same format as the timestamps the app writes, in local time
+_NOW = "strftime('%Y-%m-%d %H:%M:%S', 'now', 'localtime')"
+_NEXT_REVISION = "(SELECT COALESCE(MAX(revision), 0) + 1 FROM vendor_bid_revisions WHERE bid_id = {bid})"
+
+
+def init_bid_revisions(conn):
+    created = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'vendor_bid_revisions'"
+    ).fetchone() is None
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS vendor_bid_revisions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            bid_id INTEGER NOT NULL,
+            revision INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            revised_at TEXT NOT NULL,
+            fields TEXT NOT NULL
+        )
+    """)
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_vendor_bid_revisions_bid ON vendor_bid_revisions (bid_id, revision)"
+    )
+
+    full_row = "json_object(" + ", ".join(f"'{f}', new.{f}" for f in BID_FIELDS) + ")"
+    changed = " UNION ALL ".join(
+        f"SELECT '{f}' as field, new.{f} as value WHERE old.{f} IS NOT new.{f}" for f in BID_FIELDS
+    )
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS vendor_bid_revisions_insert AFTER INSERT ON vendor_bids
+        BEGIN
+            INSERT INTO vendor_bid_revisions (bid_id, revision, kind, revised_at, fields)
+            VALUES (new.id, {_NEXT_REVISION.format(bid="new.id")}, 'create', {_NOW}, {full_row});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS vendor_bid_revisions_update AFTER UPDATE OF {", ".join(BID_FIELDS)} ON vendor_bids
+        WHEN {" OR ".join(f"old.{f} IS NOT new.{f}" for f in BID_FIELDS)}
+        BEGIN
+            INSERT INTO vendor_bid_revisions (bid_id, revision, kind, revised_at, fields)
+            VALUES (
+                new.id, {_NEXT_REVISION.format(bid="new.id")}, 'update', {_NOW},
+                (SELECT json_group_object(field, value) FROM ({changed}))
+            );
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS vendor_bid_revisions_delete AFTER DELETE ON vendor_bids
+        BEGIN
+            INSERT INTO vendor_bid_revisions (bid_id, revision, kind, revised_at, fields)
+            VALUES (old.id, {_NEXT_REVISION.format(bid="old.id")}, 'delete', {_NOW}, '{{}}');
+        END
+    """)
+
+    if created:
+        # Bids written before the history existed start from their current state
+        conn.execute(f"""
+            INSERT INTO vendor_bid_revisions (bid_id, revision, kind, revised_at, fields)
+            SELECT id, 1, 'create', COALESCE(bid_timestamp, {_NOW}),
+                   json_object({", ".join(f"'{f}', {f}" for f in BID_FIELDS)})
+            FROM vendor_bids
+        """)
+    conn.commit()
+
+
+def _timestamp(value):
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return str(value)
+
+
+def _replay(rows, state=None):
+    # rows: (revision, kind, revised_at, fields) in revision order, applied on top of `state`
+    for revision, kind, revised_at, fields in rows:
+        if kind == "delete":
+            state = None
+        elif kind in ("create", "checkpoint"):
+            state = json.loads(fields)
+        elif state is not None:
+            state.update(json.loads(fields))
+        if state is not None:
+            state = {**state, "revision": revision, "revised_at": revised_at}
+    return state
+
+
+def bid_as_of(conn, bid_id, as_of):
+    """The bid's fields as they stood at ``as_of``, or None if it did not exist (or was deleted) then."""
+    as_of = _timestamp(as_of)
+    rows = conn.execute("""
+        SELECT revision, kind, revised_at, fields
+        FROM vendor_bid_revisions
+        WHERE bid_id = ? AND revised_at <= ? AND revision >= (
+            SELECT COALESCE(MAX(revision), 0) FROM vendor_bid_revisions
+            WHERE bid_id = ? AND kind IN ('create', 'checkpoint') AND revised_at <= ?
+        )
+        ORDER BY revision
+    """, (bid_id, as_of, bid_id, as_of)).fetchall()
+    state = _replay(rows)
+    return None if state is None else {"id": bid_id, **state}
+
+
+def load_bid_history(conn, bid_id):
+    # Every revision of the bid with the full state after it; checkpoints add nothing new, so they are left out
+    rows = conn.execute("""
+        SELECT revision, kind, revised_at, fields
+        FROM vendor_bid_revisions
+        WHERE bid_id = ?
+        ORDER BY revision
+    """, (bid_id,)).fetchall()
+    history, state = [], None
+    for revision, kind, revised_at, fields in rows:
+        state = _replay([(revision, kind, revised_at, fields)], state)
+        if kind != "checkpoint":
+            history.append({
+                **(state or {}), "revision": revision, "kind": kind, "revised_at": revised_at,
+                "changed": ", ".join(json.loads(fields)) if kind == "update" else ""
+            })
+    return pd.DataFrame(history, columns=["revision", "kind", "revised_at", "changed", *BID_FIELDS])
+
+
+def checkpoint_bid_revisions(conn, max_chain=50, dry_run=False):
+    """Appends a checkpoint to every bid with more than ``max_chain`` deltas since its last full row.
+
+    Returns how many bids were (or, with ``dry_run``, would be) checkpointed.
+    """
+    long_chains = conn.execute("""
+        SELECT r.bid_id
+        FROM vendor_bid_revisions r
+        WHERE r.kind = 'update' AND r.revision > (
+            SELECT MAX(revision) FROM vendor_bid_revisions
+            WHERE bid_id = r.bid_id AND kind IN ('create', 'checkpoint', 'delete')
+        )
+        GROUP BY r.bid_id
+        HAVING COUNT(*) > ?
+    """, (max_chain,)).fetchall()
+    if dry_run:
+        return len(long_chains)
+
+    with conn:
+        for (bid_id,) in long_chains:
+            state = bid_as_of(conn, bid_id, "9999-12-31")
+            # Stamped with the last revision's time, so it replaces the replay for any later as-of
+            conn.execute("""
+                INSERT INTO vendor_bid_revisions (bid_id, revision, kind, revised_at, fields)
+                VALUES (?, ?, 'checkpoint', ?, ?)
+            """, (bid_id, state["revision"] + 1, state["revised_at"],
+                  json.dumps({f: state[f] for f in BID_FIELDS})))
+    return len(long_chains)
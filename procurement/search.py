@@ -0,0 +1,145 @@
+"""Full-text search over requisitions, vendors and vendor match reasons.
+
+Each source table has an external-content FTS5 index, so the text is stored
+once and triggers keep the index in step with every insert, update and
+delete. Results are ranked with bm25, with title and name columns weighted
+above descriptions, and come with highlighted snippets.
+"""
+import re
+
+import pandas as pd
+
+# kind -> (index, source table, indexed columns, bm25 weights per column)
+INDEXES = {
+    "requisition": ("requisitions_fts", "requisitions", ("title", "description"), (10.0, 1.0)),
+    "vendor": ("vendors_fts", "vendors", ("name", "description"), (10.0, 1.0)),
+    "match": ("match_reasons_fts", "requisition_vendors", ("match_reason",), (1.0,)),
+}
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+_fts5 = None
+
+
+def fts5_available(conn):
+    # A property of the SQLite library, so it is checked once per process
+    global _fts5
+    if _fts5 is None:
+        _fts5 = any(option == "ENABLE_FTS5" for (option,) in conn.execute("PRAGMA compile_options"))
+    return _fts5
+
+
+def init_search(conn):
+    if not fts5_available(conn):
+        return
+    for index, table, columns, weights in INDEXES.values():
+        created = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (index,)
+        ).fetchone() is None
+        column_list = ", ".join(columns)
+        new_values = ", ".join(f"new.{c}" for c in columns)
+        old_values = ", ".join(f"old.{c}" for c in columns)
+
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5(
+                {column_list}, content='{table}', content_rowid='id', tokenize='porter unicode61'
+            )
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {index}_insert AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO {index} (rowid, {column_list}) VALUES (new.id, {new_values});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {index}_delete AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO {index} ({index}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+            END
+        """)
+        # Only text edits touch the index; status changes and the like do not
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {index}_update AFTER UPDATE OF {column_list} ON {table}
+            BEGIN
+                INSERT INTO {index} ({index}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+                INSERT INTO {index} (rowid, {column_list}) VALUES (new.id, {new_values});
+            END
+        """)
+
+        if created:
+            # Rank by weighted bm25, and index the rows written before the triggers existed
+            conn.execute(f"INSERT INTO {index} ({index}, rank) VALUES ('rank', 'bm25({', '.join(map(str, weights))})')")
+            conn.execute(f"INSERT INTO {index} ({index}) VALUES ('rebuild')")
+    conn.commit()
+
+
+def fts_query(text):
+    """Turns free text into an FTS5 query: every word must match, the last one as a prefix."""
+    # Quoting each word keeps FTS5 operators and punctuation in the input from being parsed
+    words = _TOKEN.findall(text)
+    if not words:
+        return None
+    return " ".join(f'"{w}"' for w in words[:-1]) + (" " if len(words) > 1 else "") + f'"{words[-1]}"*'
+
+
+def search(conn, text, kinds=None, limit=20, mark=("**", "**")):
+    """Best matches across the indexes, best first: kind, id, title, snippet and score.
+
+    Scores are bm25 ranks, lower is better. They are computed per index, so
+    the order across kinds is approximate.
+    """
+    query = fts_query(text)
+    columns = ["kind", "id", "title", "snippet", "score"]
+    if query is None or not fts5_available(conn):
+        return pd.DataFrame(columns=columns)
+
+    start, end = mark
+    selects = {
+        "requisition": """
+            SELECT 'requisition' as kind, f.id, r.title, f.snippet, f.score
+            FROM (
+                SELECT rowid as id, snippet(requisitions_fts, -1, :start, :end, '…', 12) as snippet, rank as score
+                FROM requisitions_fts WHERE requisitions_fts MATCH :query ORDER BY rank LIMIT :limit
+            ) f
+            JOIN requisitions r ON r.id = f.id
+        """,
+        "vendor": """
+            SELECT 'vendor' as kind, f.id, v.name as title, f.snippet, f.score
+            FROM (
+                SELECT rowid as id, snippet(vendors_fts, -1, :start, :end, '…', 12) as snippet, rank as score
+                FROM vendors_fts WHERE vendors_fts MATCH :query ORDER BY rank LIMIT :limit
+            ) f
+            JOIN vendors v ON v.id = f.id
+        """,
+        "match": """
+            SELECT 'match' as kind, f.id, r.title || ' → ' || v.name as title, f.snippet, f.score
+            FROM (
+                SELECT rowid as id, snippet(match_reasons_fts, 0, :start, :end, '…', 12) as snippet, rank as score
+                FROM match_reasons_fts WHERE match_reasons_fts MATCH :query ORDER BY rank LIMIT :limit
+            ) f
+            JOIN requisition_vendors rv ON rv.id = f.id
+            JOIN requisitions r ON r.id = rv.requisition_id
+            JOIN vendors v ON v.id = rv.vendor_id
+        """,
+    }
+    # Each index returns its own top `limit` before joining, so the merge never sees more than that per kind
+    union = " UNION ALL ".join(f"SELECT * FROM ({selects[kind]})" for kind in (kinds or INDEXES))
+    return pd.read_sql_query(
+        f"SELECT * FROM ({union}) ORDER BY score LIMIT :limit",
+        conn,
+        params={"query": query, "start": start, "end": end, "limit": limit}
+    )
+
+
+def optimize_search(conn):
+    # Merges each index's b-trees into one; worth running after bulk loads
+    if not fts5_available(conn):
+        return
+    for index, _, _, _ in INDEXES.values():
+        conn.execute(f"INSERT INTO {index} ({index}) VALUES ('optimize')")
+    conn.commit()
+
+
+def rebuild_search(conn):
+    for index, _, _, _ in INDEXES.values():
+        conn.execute(f"INSERT INTO {index} ({index}) VALUES ('rebuild')")
+    conn.commit()
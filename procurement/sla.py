@@ -0,0 +1,320 @@
+"""Procurement cycle-time SLAs: time to assignment, first bid and approval.
+
+Triggers keep each requisition's milestones in ``requisition_sla``: the time
+of its first approved vendor, its first submitted bid (revising a bid does
+not move it) and its earliest approved bid.
+Any write to a source row recomputes the milestone from the source rows, the
+same way ``rebuild_sla`` does, so out-of-order events and reversed decisions
+are followed. Each milestone counts its duration since the requisition was
+raised into ``sla_daily``. When the milestone, the requisition's department
+or its approval tier changes, or the requisition is deleted, the old event
+is taken out first. That table is a histogram per day,
+metric, department and approval tier, with log-spaced duration buckets
+(``SLA_BUCKET_HOURS``). Histograms add up, so percentiles over any date
+range come from summing a few hundred bucket rows, never from a scan of the
+event history. The percentiles are accurate to the bucket width, about 19%.
+
+Requisition timestamps default to CURRENT_TIMESTAMP (UTC) while the other
+tables store local time, so requisitions are converted to local time first.
+"""
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from procurement.analytics import read_frame
+
+SLA_METRICS = {
+    "assignment": "Time to assignment",
+    "bid": "Time to first bid",
+    "approval": "Time to approval",
+}
+
+# metric -> milestone column of requisition_sla
+_MILESTONES = {"assignment": "assigned_at", "bid": "first_bid_at", "approval": "approved_at"}
+
+# Upper bound of each bucket in hours: 15 minutes doubling every 4 buckets, then one open-ended bucket
+SLA_BUCKET_HOURS = [0.25 * 2 ** (k / 4) for k in range(61)] + [float("inf")]
+
+SLA_GROUPS = ("department", "tier")
+
+# Not INSERT OR IGNORE: inside a trigger, the conflict policy of an outer upsert would override the IGNORE
+_ENSURE = """
+    INSERT INTO requisition_sla (requisition_id, department, created_at)
+    SELECT id, COALESCE(department, ''), datetime(timestamp, 'localtime') FROM requisitions
+    WHERE id = {rid} AND NOT EXISTS (SELECT 1 FROM requisition_sla WHERE requisition_id = {rid});
+"""
+# requisition_sla column -> its value for requisition {rid}, computed from the source rows
+_APPROVED_BID = ("(SELECT {column} FROM bid_approvals WHERE requisition_id = {{rid}} AND status = 'approved' "
+                 "ORDER BY approved_at, id LIMIT 1)")
+_MILESTONE_VALUES = {
+    "assigned_at": "(SELECT MIN(approved_at) FROM requisition_vendors WHERE requisition_id = {rid} AND status = 'approved')",
+    # created_at, not bid_timestamp, which moves each time a vendor revises the bid; rows inserted
+    # without it fall back to their bid_timestamp
+    "first_bid_at": "(SELECT MIN(COALESCE(created_at, bid_timestamp)) FROM vendor_bids WHERE requisition_id = {rid})",
+    "approved_at": _APPROVED_BID.format(column="approved_at"),
+    "approval_tier": _APPROVED_BID.format(column="approval_tier"),
+}
+# source table -> (requisition_sla columns it sets, columns they depend on, rows that can count, for new/old)
+_MILESTONE_SOURCES = {
+    "requisition_vendors": (("assigned_at",), "status, approved_at, requisition_id", "{row}.status = 'approved'"),
+    "vendor_bids": (("first_bid_at",), "created_at, bid_timestamp, requisition_id", "1"),
+    "bid_approvals": (("approved_at", "approval_tier"), "status, approved_at, approval_tier, requisition_id",
+                      "{row}.status = 'approved'"),
+}
+_HOURS = "MAX((julianday({end}) - julianday({start})) * 24, 0)"
+_BUCKET = "(SELECT MIN(bucket) FROM sla_buckets WHERE upper_hours >= {hours})"
+
+
+def _replace_trigger(conn, name, definition):
+    # Creates or redefines trigger `name`; True when the stored definition differed (an older version)
+    sql = f"CREATE TRIGGER {name} {definition.strip()}"
+    stored = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (name,)).fetchone()
+    if stored is not None and stored[0] == sql:
+        return False
+    conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    conn.execute(sql)
+    return True
+
+
+def _recompute(columns, rid):
+    sets = ", ".join(f"{column} = {_MILESTONE_VALUES[column].format(rid=rid)}" for column in columns)
+    return f"UPDATE requisition_sla SET {sets} WHERE requisition_id = {rid};"
+
+
+def init_sla(conn):
+    created = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'requisition_sla'"
+    ).fetchone() is None
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS requisition_sla (
+            requisition_id INTEGER PRIMARY KEY,
+            department TEXT NOT NULL DEFAULT '',
+            created_at TEXT,
+            assigned_at TEXT,
+            first_bid_at TEXT,
+            approved_at TEXT,
+            approval_tier TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sla_daily (
+            day TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            department TEXT NOT NULL,
+            tier TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            events INTEGER NOT NULL,
+            total_hours REAL NOT NULL,
+            PRIMARY KEY (day, metric, department, tier, bucket)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE TABLE IF NOT EXISTS sla_buckets (bucket INTEGER PRIMARY KEY, upper_hours REAL NOT NULL)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sla_buckets_upper ON sla_buckets (upper_hours)")
+    # SQLite has no infinity literal, so the open-ended bucket gets a bound no duration reaches
+    conn.executemany(
+        "INSERT OR IGNORE INTO sla_buckets (bucket, upper_hours) VALUES (?, ?)",
+        [(i, min(hours, 1e12)) for i, hours in enumerate(SLA_BUCKET_HOURS)]
+    )
+
+    # Requisitions: a row per requisition, following its department
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS requisition_sla_requisition_insert AFTER INSERT ON requisitions
+        BEGIN {_ENSURE.format(rid="new.id")} END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS requisition_sla_requisition_department AFTER UPDATE OF department ON requisitions
+        BEGIN
+            UPDATE requisition_sla SET department = COALESCE(new.department, '') WHERE requisition_id = new.id;
+        END
+    """)
+    # Clearing the milestones first takes the requisition's events back out of sla_daily
+    replaced = _replace_trigger(conn, "requisition_sla_requisition_delete", """
+        AFTER DELETE ON requisitions
+        BEGIN
+            UPDATE requisition_sla SET assigned_at = NULL, first_bid_at = NULL, approved_at = NULL
+            WHERE requisition_id = old.id;
+            DELETE FROM requisition_sla WHERE requisition_id = old.id;
+        END
+    """)
+
+    # Milestones are recomputed from the source rows whenever one of them changes, exactly as rebuild_sla
+    # computes them, so out-of-order events, reversed decisions and deletes all land where a rebuild would
+    for table, (columns, watched, condition) in _MILESTONE_SOURCES.items():
+        new, old = condition.format(row="new"), condition.format(row="old")
+        replaced |= _replace_trigger(conn, f"requisition_sla_{table}_insert", f"""
+            AFTER INSERT ON {table}
+            WHEN {new}
+            BEGIN
+                {_ENSURE.format(rid="new.requisition_id")}
+                {_recompute(columns, "new.requisition_id")}
+            END
+        """)
+        replaced |= _replace_trigger(conn, f"requisition_sla_{table}_update", f"""
+            AFTER UPDATE OF {watched} ON {table}
+            WHEN {old} OR {new}
+            BEGIN
+                {_ENSURE.format(rid="new.requisition_id")}
+                {_recompute(columns, "new.requisition_id")}
+                {_recompute(columns, "old.requisition_id")}
+            END
+        """)
+        replaced |= _replace_trigger(conn, f"requisition_sla_{table}_delete", f"""
+            AFTER DELETE ON {table}
+            WHEN {old}
+            BEGIN {_recompute(columns, "old.requisition_id")} END
+        """)
+    # Triggers of the first version, which only ever moved a milestone earlier
+    for name in ("assigned_insert", "assigned_update", "first_bid_insert", "approved_insert", "approved_update"):
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+                        (f"requisition_sla_{name}",)).fetchone():
+            conn.execute(f"DROP TRIGGER requisition_sla_{name}")
+            replaced = True
+
+    # Rollups: a milestone's event sits in the histogram of its day, department and tier. When any of those
+    # changes (a stamp, an earlier stamp, a new department, a cleared milestone) the old event is taken out
+    # and the new one, if any, added.
+    for metric, column in _MILESTONES.items():
+        hours = _HOURS.format(end=f"new.{column}", start="new.created_at")
+        old_hours = _HOURS.format(end=f"old.{column}", start="old.created_at")
+        tier = "COALESCE(new.approval_tier, '')" if metric == "approval" else "''"
+        old_tier = "COALESCE(old.approval_tier, '')" if metric == "approval" else "''"
+        moved = f"old.{column} IS NOT new.{column} OR old.department IS NOT new.department"
+        columns = f"{column}, department"
+        if metric == "approval":
+            moved += " OR old.approval_tier IS NOT new.approval_tier"
+            columns += ", approval_tier"
+        old_key = f"""
+            day = date(old.{column}) AND metric = '{metric}' AND department = old.department AND tier = {old_tier}
+            AND bucket = {_BUCKET.format(hours=old_hours)}
+        """
+        replaced |= _replace_trigger(conn, f"sla_daily_{metric}", f"""
+            AFTER UPDATE OF {columns} ON requisition_sla
+            WHEN {moved}
+            BEGIN
+                UPDATE sla_daily SET events = events - 1, total_hours = total_hours - {old_hours}
+                WHERE old.{column} IS NOT NULL AND old.created_at IS NOT NULL AND {old_key};
+                DELETE FROM sla_daily WHERE events = 0 AND {old_key};
+                INSERT INTO sla_daily (day, metric, department, tier, bucket, events, total_hours)
+                SELECT date(new.{column}), '{metric}', new.department, {tier}, {_BUCKET.format(hours=hours)}, 1,
+                       {hours}
+                WHERE new.{column} IS NOT NULL AND new.created_at IS NOT NULL
+                ON CONFLICT (day, metric, department, tier, bucket)
+                DO UPDATE SET events = events + 1, total_hours = total_hours + excluded.total_hours;
+            END
+        """)
+
+    # Rollups kept by an older version of the triggers missed department changes and deletes
+    if created or replaced:
+        rebuild_sla(conn, commit=False)
+    conn.commit()
+
+
+def rebuild_sla(conn, commit=True):
+    """Recomputes the milestones and histograms from the full history; only needed once or for repairs."""
+    conn.execute("DELETE FROM requisition_sla")
+    conn.execute("DELETE FROM sla_daily")
+    conn.execute(f"""
+        INSERT INTO requisition_sla
+            (requisition_id, department, created_at, assigned_at, first_bid_at, approved_at, approval_tier)
+        SELECT r.id, COALESCE(r.department, ''), datetime(r.timestamp, 'localtime'),
+               {", ".join(_MILESTONE_VALUES[column].format(rid="r.id") for column in _MILESTONE_VALUES)}
+        FROM requisitions r
+    """)
+    for metric, column in _MILESTONES.items():
+        hours = _HOURS.format(end=column, start="created_at")
+        tier = "COALESCE(approval_tier, '')" if metric == "approval" else "''"
+        conn.execute(f"""
+            INSERT INTO sla_daily (day, metric, department, tier, bucket, events, total_hours)
+            SELECT day, '{metric}', department, tier, bucket, COUNT(*), SUM(hours)
+            FROM (
+                SELECT date({column}) as day, department, {tier} as tier, {hours} as hours,
+                       {_BUCKET.format(hours=hours)} as bucket
+                FROM requisition_sla
+                WHERE {column} IS NOT NULL AND created_at IS NOT NULL
+            )
+            GROUP BY day, department, tier, bucket
+        """)
+    if commit:
+        conn.commit()
+
+
+def sla_drift(conn):
+    """Histogram rows where ``sla_daily`` differs from what ``rebuild_sla`` computes; empty when consistent.
+
+    The rebuild runs inside a savepoint that is rolled back, so nothing changes.
+    """
+    key = ["day", "metric", "department", "tier", "bucket"]
+    query = f"SELECT {', '.join(key)}, events, total_hours FROM sla_daily"
+    conn.execute("SAVEPOINT sla_drift")
+    try:
+        rollup = pd.read_sql_query(query, conn)
+        rebuild_sla(conn, commit=False)
+        rebuilt = pd.read_sql_query(query, conn)
+    finally:
+        conn.execute("ROLLBACK TO sla_drift")
+        conn.execute("RELEASE sla_drift")
+    df = rollup.merge(rebuilt, on=key, how="outer", suffixes=("_rollup", "_rebuild"))
+    df[["events_rollup", "events_rebuild"]] = df[["events_rollup", "events_rebuild"]].fillna(0)
+    # Hour totals are float sums built in a different order, so they only agree to rounding
+    hours = df[["total_hours_rollup", "total_hours_rebuild"]].fillna(0)
+    off = (hours["total_hours_rollup"] - hours["total_hours_rebuild"]).abs() > 1e-6 * hours.abs().max(axis=1).clip(lower=1)
+    return df[(df["events_rollup"] != df["events_rebuild"]) | off].reset_index(drop=True)
+
+
+def _day(value):
+    return value.strftime("%Y-%m-%d") if isinstance(value, (date, datetime)) else str(value)
+
+
+def sla_date_range(conn):
+    # First and last day with any SLA event, or (None, None)
+    return conn.execute("SELECT MIN(day), MAX(day) FROM sla_daily").fetchone()
+
+
+def _percentile(buckets, counts, q):
+    # Linear interpolation inside the bucket holding the q-th event
+    cumulative = np.cumsum(counts)
+    target = q * cumulative[-1]
+    i = int(np.searchsorted(cumulative, target))
+    upper = SLA_BUCKET_HOURS[buckets[i]]
+    lower = SLA_BUCKET_HOURS[buckets[i] - 1] if buckets[i] > 0 else 0.0
+    if upper == float("inf"):
+        return lower
+    before = cumulative[i - 1] if i > 0 else 0
+    return lower + (upper - lower) * (target - before) / counts[i]
+
+
+def load_sla_percentiles(conn, start, end, by=SLA_GROUPS, percentiles=(0.5, 0.9, 0.95)):
+    """Event count, mean and percentile durations in hours per metric and ``by`` group, for days in [start, end]."""
+    by = [column for column in by if column in SLA_GROUPS]
+    group_columns = "".join(f", {column}" for column in by)
+    histogram = read_frame(conn, f"""
+        SELECT metric{group_columns}, bucket, SUM(events) as events, SUM(total_hours) as total_hours
+        FROM sla_daily
+        WHERE day >= ? AND day <= ?
+        GROUP BY metric{group_columns}, bucket
+        ORDER BY metric{group_columns}, bucket
+    """, (_day(start), _day(end)))
+
+    rows = []
+    for key, group in histogram.groupby(["metric", *by], sort=False):
+        buckets, counts = group["bucket"].to_numpy(), group["events"].to_numpy()
+        row = dict(zip(["metric", *by], key))
+        row["events"] = int(counts.sum())
+        row["mean_hours"] = group["total_hours"].sum() / row["events"]
+        for q in percentiles:
+            row[f"p{round(q * 100)}_hours"] = _percentile(buckets, counts, q)
+        rows.append(row)
+    columns = ["metric", *by, "events", "mean_hours", *(f"p{round(q * 100)}_hours" for q in percentiles)]
+    return pd.DataFrame(rows, columns=columns)
+
+
+def load_sla_trend(conn, metric, start, end):
+    # Events and mean duration per day, for charting
+    return read_frame(conn, """
+        SELECT day, SUM(events) as events, SUM(total_hours) / SUM(events) as mean_hours
+        FROM sla_daily
+        WHERE day >= ? AND day <= ? AND metric = ?
+        GROUP BY day
+        ORDER BY day
+    """, (_day(start), _day(end), metric))
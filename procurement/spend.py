@@ -0,0 +1,196 @@
+"""Spend analytics over approved bids, pre-aggregated by month, vendor, tier and currency.
+
+``spend_monthly`` holds one row per approval month, vendor, approval tier and
+bid currency, with the approval count and the spend in both the bid
+currency and BASE_CURRENCY. Triggers keep it current as bids are approved,
+un-approved or deleted, and when an approved bid's amount, currency or FX
+price changes, so every drill-down reads a few rollup rows, however long
+the approval history gets.
+"""
+import pandas as pd
+
+from procurement.analytics import read_frame
+
+SPEND_DIMENSIONS = ("month", "vendor_id", "tier", "currency")
+
+
+def _key(approval, bid):
+    # Rollup key of one approval; `approval`/`bid` are trigger row aliases or table aliases
+    return (f"COALESCE(strftime('%Y-%m', {approval}.approved_at), '')", f"{bid}.vendor_id",
+            f"COALESCE({approval}.approval_tier, '')", f"COALESCE({bid}.currency, '')")
+
+
+def _add(approval, bid, source):
+    # Counts every approval selected by `source` (a FROM ... WHERE clause) into its month
+    month, vendor, tier, currency = _key(approval, bid)
+    return f"""
+        INSERT INTO spend_monthly (month, vendor_id, tier, currency, approvals, amount, amount_base)
+        SELECT {month}, {vendor}, {tier}, {currency}, 1, COALESCE({bid}.bid_amount, 0),
+               COALESCE({bid}.amount_base, 0)
+        {source}
+        ON CONFLICT (month, vendor_id, tier, currency) DO UPDATE SET
+            approvals = approvals + 1,
+            amount = amount + excluded.amount,
+            amount_base = amount_base + excluded.amount_base;
+    """
+
+
+def _subtract(approval, bid, source):
+    # Takes the approvals selected by `source` back out of their rows, dropping rows that reach zero
+    month, vendor, tier, currency = _key(approval, bid)
+    match = f"(month, vendor_id, tier, currency) IN (SELECT {month}, {vendor}, {tier}, {currency} {source})"
+    same_row = (f"{source} AND {month} = spend_monthly.month AND {vendor} = spend_monthly.vendor_id "
+                f"AND {tier} = spend_monthly.tier AND {currency} = spend_monthly.currency")
+    return f"""
+        UPDATE spend_monthly SET
+            approvals = approvals - (SELECT COUNT(*) {same_row}),
+            amount = amount - (SELECT TOTAL({bid}.bid_amount) {same_row}),
+            amount_base = amount_base - (SELECT TOTAL({bid}.amount_base) {same_row})
+        WHERE {match};
+        DELETE FROM spend_monthly WHERE approvals <= 0 AND {match};
+    """
+
+
+def init_spend(conn):
+    created = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'spend_monthly'"
+    ).fetchone() is None
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS spend_monthly (
+            month TEXT NOT NULL,
+            vendor_id INTEGER NOT NULL,
+            tier TEXT NOT NULL,
+            currency TEXT NOT NULL,
+            approvals INTEGER NOT NULL,
+            amount REAL NOT NULL,
+            amount_base REAL NOT NULL,
+            PRIMARY KEY (month, vendor_id, tier, currency)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_spend_monthly_vendor ON spend_monthly (vendor_id, month)")
+
+    # An approval's bid, as a one-row source for _add/_subtract
+    def bid_of(approval):
+        return f"FROM vendor_bids b WHERE b.id = {approval}.vendor_bid_id"
+
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS spend_monthly_approval_insert AFTER INSERT ON bid_approvals
+        WHEN new.status = 'approved'
+        BEGIN {_add("new", "b", bid_of("new"))} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS spend_monthly_approval_delete AFTER DELETE ON bid_approvals
+        WHEN old.status = 'approved'
+        BEGIN {_subtract("old", "b", bid_of("old"))} END
+    """)
+    # Un-approving, re-dating or re-tiering an approval moves it; both halves are skipped when not approved
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS spend_monthly_approval_update
+        AFTER UPDATE OF status, approved_at, approval_tier, vendor_bid_id ON bid_approvals
+        WHEN old.status = 'approved' OR new.status = 'approved'
+        BEGIN
+            {_subtract("old", "b", bid_of("old") + " AND old.status = 'approved'")}
+            {_add("new", "b", bid_of("new") + " AND new.status = 'approved'")}
+        END
+    """)
+    # An approved bid that is edited or re-priced moves its spend with it
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS spend_monthly_bid_update
+        AFTER UPDATE OF vendor_id, bid_amount, currency, amount_base ON vendor_bids
+        WHEN EXISTS (SELECT 1 FROM bid_approvals WHERE vendor_bid_id = new.id AND status = 'approved')
+        BEGIN
+            {_subtract("a", "old", "FROM bid_approvals a WHERE a.vendor_bid_id = old.id AND a.status = 'approved'")}
+            {_add("a", "new", "FROM bid_approvals a WHERE a.vendor_bid_id = new.id AND a.status = 'approved'")}
+        END
+    """)
+
+    if created:
+        rebuild_spend(conn, commit=False)
+    conn.commit()
+
+
+def rebuild_spend(conn, commit=True):
+    """Recomputes the rollup from every approved bid; only needed once or for repairs."""
+    month, vendor, tier, currency = _key("a", "b")
+    conn.execute("DELETE FROM spend_monthly")
+    conn.execute(f"""
+        INSERT INTO spend_monthly (month, vendor_id, tier, currency, approvals, amount, amount_base)
+        SELECT {month}, {vendor}, {tier}, {currency}, COUNT(*), SUM(COALESCE(b.bid_amount, 0)),
+               SUM(COALESCE(b.amount_base, 0))
+        FROM bid_approvals a
+        JOIN vendor_bids b ON b.id = a.vendor_bid_id
+        WHERE a.status = 'approved'
+        GROUP BY 1, 2, 3, 4
+    """)
+    if commit:
+        conn.commit()
+
+
+def _month(value):
+    # Dates, datetimes and "YYYY-MM[-DD]" strings
+    return value.strftime("%Y-%m") if hasattr(value, "strftime") else str(value)[:7]
+
+
+def _where(start_month, end_month, filters):
+    clauses, params = [], []
+    if start_month is not None:
+        clauses.append("s.month >= ?")
+        params.append(_month(start_month))
+    if end_month is not None:
+        clauses.append("s.month <= ?")
+        params.append(_month(end_month))
+    for column, value in filters.items():
+        if column not in SPEND_DIMENSIONS:
+            raise ValueError(f"Unknown spend dimension: {column}")
+        if value is not None:
+            clauses.append(f"s.{column} = ?")
+            params.append(value)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def spend_month_range(conn):
+    # First and last month with approved spend, or (None, None)
+    return conn.execute("SELECT MIN(month), MAX(month) FROM spend_monthly WHERE month != ''").fetchone()
+
+
+def load_spend(conn, by=("month",), start_month=None, end_month=None, **filters):
+    """Approvals and spend grouped by ``by`` (any of SPEND_DIMENSIONS), largest base-currency spend first.
+
+    ``filters`` narrow to one value of a dimension, e.g. ``vendor_id=12`` or
+    ``tier="VP Level"``. ``amount`` is in the bid currency, so it only adds
+    up when ``currency`` is among ``by`` or filtered on. Grouping by vendor
+    adds ``vendor_name``.
+    """
+    by = list(by)
+    unknown = set(by) - set(SPEND_DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown spend dimension: {', '.join(sorted(unknown))}")
+    where, params = _where(start_month, end_month, filters)
+    columns = "".join(f"s.{column}, " for column in by)
+    vendor_name = "v.name as vendor_name, " if "vendor_id" in by else ""
+    join = " LEFT JOIN vendors v ON v.id = s.vendor_id" if "vendor_id" in by else ""
+    group = f" GROUP BY {', '.join(f's.{column}' for column in by)}" if by else ""
+    group += ", v.name" if "vendor_id" in by else ""
+    return read_frame(conn, f"""
+        SELECT {columns}{vendor_name}SUM(s.approvals) as approvals, SUM(s.amount) as amount,
+               SUM(s.amount_base) as amount_base
+        FROM spend_monthly s{join}{where}{group}
+        ORDER BY amount_base DESC
+    """, params)
+
+
+def load_spend_yoy(conn, year, **filters):
+    # Base-currency spend per calendar month of `year` against the same month a year earlier
+    where, params = _where(f"{year - 1}-01", f"{year}-12", filters)
+    df = read_frame(conn, f"""
+        SELECT CAST(substr(s.month, 6, 2) AS INTEGER) as month,
+               SUM(CASE WHEN substr(s.month, 1, 4) = ? THEN s.amount_base ELSE 0 END) as amount_base,
+               SUM(CASE WHEN substr(s.month, 1, 4) = ? THEN s.amount_base ELSE 0 END) as prior_amount_base
+        FROM spend_monthly s{where}
+        GROUP BY 1
+        ORDER BY 1
+    """, [str(year), str(year - 1), *params])
+    df = pd.DataFrame({"month": range(1, 13)}).merge(df, on="month", how="left").fillna(0.0)
+    prior = df["prior_amount_base"].where(df["prior_amount_base"] != 0)
+    df["change_pct"] = (df["amount_base"] - prior) / prior * 100
+    return df
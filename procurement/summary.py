@@ -0,0 +1,112 @@
+"""Per-requisition vendor and bid aggregates, kept current by triggers.
+
+``requisition_summary`` holds one row per requisition with its assigned and
+approved vendor counts and its bid count and min/max/avg bid in
+BASE_CURRENCY. Every write to requisition_vendors or vendor_bids recomputes
+the row of the requisition it touched, from the covering indexes on
+``(requisition_id, status)`` and ``(requisition_id, amount_base)``, so list
+pages read the aggregates with one lookup instead of grouping whole tables.
+"""
+
+SUMMARY_COLUMNS = {
+    "requisition_vendors": """
+        vendor_count = (SELECT COUNT(*) FROM requisition_vendors WHERE requisition_id = {rid}),
+        approved_count = (
+            SELECT COUNT(*) FROM requisition_vendors WHERE requisition_id = {rid} AND status = 'approved'
+        )
+    """,
+    # amount_base is NULL for currencies without an FX rate; those bids count but are not priced
+    "vendor_bids": """
+        bid_count = (SELECT COUNT(*) FROM vendor_bids WHERE requisition_id = {rid}),
+        min_bid = (SELECT MIN(amount_base) FROM vendor_bids WHERE requisition_id = {rid}),
+        max_bid = (SELECT MAX(amount_base) FROM vendor_bids WHERE requisition_id = {rid}),
+        avg_bid = (SELECT AVG(amount_base) FROM vendor_bids WHERE requisition_id = {rid})
+    """,
+}
+
+# Columns whose change can move a row's contribution to the summary
+WATCHED_COLUMNS = {
+    "requisition_vendors": "requisition_id, status",
+    "vendor_bids": "requisition_id, amount_base",
+}
+
+
+def _refresh(table, rid):
+    return f"""
+        INSERT OR IGNORE INTO requisition_summary (requisition_id) VALUES ({rid});
+        UPDATE requisition_summary SET {SUMMARY_COLUMNS[table].format(rid=rid)} WHERE requisition_id = {rid};
+    """
+
+
+def init_requisition_summary(conn):
+    created = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'requisition_summary'"
+    ).fetchone() is None
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS requisition_summary (
+            requisition_id INTEGER PRIMARY KEY,
+            vendor_count INTEGER NOT NULL DEFAULT 0,
+            approved_count INTEGER NOT NULL DEFAULT 0,
+            bid_count INTEGER NOT NULL DEFAULT 0,
+            min_bid REAL,
+            max_bid REAL,
+            avg_bid REAL
+        )
+    """)
+
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS requisition_summary_requisition_insert AFTER INSERT ON requisitions
+        BEGIN
+            INSERT OR IGNORE INTO requisition_summary (requisition_id) VALUES (new.id);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS requisition_summary_requisition_delete AFTER DELETE ON requisitions
+        BEGIN
+            DELETE FROM requisition_summary WHERE requisition_id = old.id;
+        END
+    """)
+    for table in SUMMARY_COLUMNS:
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS requisition_summary_{table}_insert AFTER INSERT ON {table}
+            BEGIN {_refresh(table, "new.requisition_id")} END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS requisition_summary_{table}_delete AFTER DELETE ON {table}
+            BEGIN {_refresh(table, "old.requisition_id")} END
+        """)
+        # Both sides, in case the row moved to another requisition
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS requisition_summary_{table}_update
+            AFTER UPDATE OF {WATCHED_COLUMNS[table]} ON {table}
+            BEGIN {_refresh(table, "old.requisition_id")} {_refresh(table, "new.requisition_id")} END
+        """)
+
+    if created:
+        rebuild_requisition_summary(conn)
+    conn.commit()
+
+
+def rebuild_requisition_summary(conn, commit=True):
+    """Recomputes every row from the source tables, e.g. after writes made with the triggers dropped."""
+    conn.execute("DELETE FROM requisition_summary")
+    conn.execute("""
+        INSERT INTO requisition_summary
+            (requisition_id, vendor_count, approved_count, bid_count, min_bid, max_bid, avg_bid)
+        SELECT r.id,
+               COALESCE(rv.vendor_count, 0), COALESCE(rv.approved_count, 0),
+               COALESCE(vb.bid_count, 0), vb.min_bid, vb.max_bid, vb.avg_bid
+        FROM requisitions r
+        LEFT JOIN (
+            SELECT requisition_id, COUNT(*) as vendor_count,
+                   SUM(CASE WHEN status = 'approved' THEN 1 ELSE 0 END) as approved_count
+            FROM requisition_vendors GROUP BY requisition_id
+        ) rv ON rv.requisition_id = r.id
+        LEFT JOIN (
+            SELECT requisition_id, COUNT(*) as bid_count,
+                   MIN(amount_base) as min_bid, MAX(amount_base) as max_bid, AVG(amount_base) as avg_bid
+            FROM vendor_bids GROUP BY requisition_id
+        ) vb ON vb.requisition_id = r.id
+    """)
+    if commit:
+        conn.commit()
@@ -0,0 +1,72 @@
+"""Approval tiers, stored in the ``approval_tiers`` table.
+
+A tier covers amounts in ``[min_amount, max_amount)``; the last tier has no
+upper bound. Tiers are resolved for a whole column at once with
+``numpy.searchsorted`` over the sorted lower thresholds.
+"""
+import numpy as np
+import pandas as pd
+
+DEFAULT_TIERS = [
+    ("Department Manager", 0, 5000, 1, "tier-1"),
+    ("Division Director", 5000, 25000, 2, "tier-2"),
+    ("VP Level", 25000, 100000, 3, "tier-3"),
+    ("C-Suite", 100000, None, 4, "tier-4"),
+]
+
+
+def init_approval_tiers(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS approval_tiers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE,
+            min_amount REAL NOT NULL,
+            max_amount REAL,
+            level INTEGER,
+            css_class TEXT
+        )
+    """)
+
+    # Seed the standard tiers the first time the table is created
+    if conn.execute("SELECT COUNT(*) FROM approval_tiers").fetchone()[0] == 0:
+        conn.executemany(
+            "INSERT INTO approval_tiers (name, min_amount, max_amount, level, css_class) VALUES (?, ?, ?, ?, ?)",
+            DEFAULT_TIERS
+        )
+    conn.commit()
+
+
+def load_approval_tiers(conn):
+    return pd.read_sql_query("""
+        SELECT name, min_amount, max_amount, level, css_class
+        FROM approval_tiers
+        ORDER BY min_amount
+    """, conn)
+
+
+def resolve_approval_tiers(amounts, tiers):
+    # One row of `tiers` per amount, aligned to the index of `amounts` when it is a Series
+    thresholds = tiers["min_amount"].to_numpy(dtype=float)
+    values = np.asarray(amounts, dtype=float)
+
+    positions = np.searchsorted(thresholds, values, side="right") - 1
+    positions = np.clip(positions, 0, len(thresholds) - 1)
+    # Missing amounts require the highest tier, as the per-row lookup did
+    positions[np.isnan(values)] = len(thresholds) - 1
+
+    resolved = tiers.iloc[positions].reset_index(drop=True)
+    if isinstance(amounts, pd.Series):
+        resolved.index = amounts.index
+    return resolved
+
+
+def get_approval_tier(amount, tiers):
+    return resolve_approval_tiers([amount], tiers).iloc[0].to_dict()
+
+
+def get_requisition_tier(conn, requisition_id, tiers):
+    # A requisition's tier follows its highest base-currency bid, as on the Bid Approvals page
+    max_bid = conn.execute(
+        "SELECT MAX(amount_base) FROM vendor_bids WHERE requisition_id = ?", (requisition_id,)
+    ).fetchone()[0]
+    return get_approval_tier(max_bid, tiers)
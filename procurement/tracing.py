@@ -0,0 +1,215 @@
+"""Per-page rerun tracing: named spans aggregated into in-process histograms.
+
+A page calls ``start_page("Bid Approvals")`` before its first Streamlit call
+and ``end_page()`` as its last statement, and wraps interesting work in
+``with span("load bids"):``. Wall time and thread CPU time of every span are
+bucketed per (page, span). A rerun cut short by ``st.rerun()``/``st.stop()``
+keeps its spans but not its "rerun" total.
+
+The histograms are exported in Prometheus text format. They are written
+to ``PROCUREMENT_METRICS_FILE`` (at most every
+``PROCUREMENT_METRICS_INTERVAL`` seconds) and served at
+``http://127.0.0.1:$PROCUREMENT_METRICS_PORT/metrics`` when that port is
+set. ``PROCUREMENT_TRACE=0`` turns tracing off.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+TRACE_ENABLED = os.environ.get("PROCUREMENT_TRACE", "1").lower() not in ("0", "false", "no")
+METRICS_FILE = os.environ.get("PROCUREMENT_METRICS_FILE")
+METRICS_INTERVAL = float(os.environ.get("PROCUREMENT_METRICS_INTERVAL", "10"))
+METRICS_PORT = os.environ.get("PROCUREMENT_METRICS_PORT")
+
+# Upper bounds in seconds; the last bucket is +Inf
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+_histograms = {}
+_local = threading.local()
+_last_export = 0.0
+_server = None
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "cpu")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.cpu = 0.0
+
+
+def observe(page, name, seconds, cpu_seconds=0.0):
+    index = int(np.searchsorted(BUCKETS, seconds))
+    with _lock:
+        histogram = _histograms.get((page, name))
+        if histogram is None:
+            histogram = _histograms[(page, name)] = _Histogram()
+        histogram.counts[index] += 1
+        histogram.sum += seconds
+        histogram.cpu += cpu_seconds
+
+
+def current_page():
+    return getattr(_local, "page", None) or "unknown"
+
+
+def start_page(page):
+    """Marks the start of a rerun of ``page`` on this script thread."""
+    _local.page = page
+    _local.started = (time.perf_counter(), time.thread_time())
+    _start_server()
+
+
+def end_page():
+    started = getattr(_local, "started", None)
+    if TRACE_ENABLED and started is not None:
+        observe(current_page(), "rerun", time.perf_counter() - started[0], time.thread_time() - started[1])
+    _local.started = None
+    _export_file()
+
+
+@contextmanager
+def span(name):
+    if not TRACE_ENABLED:
+        yield
+        return
+    wall, cpu = time.perf_counter(), time.thread_time()
+    try:
+        yield
+    finally:
+        observe(current_page(), name, time.perf_counter() - wall, time.thread_time() - cpu)
+
+
+def _quantile(counts, q):
+    # Linear interpolation inside the bucket holding the q-th observation
+    total = sum(counts)
+    if not total:
+        return float("nan")
+    target = q * total
+    cumulative = 0
+    for i, count in enumerate(counts):
+        if count and cumulative + count >= target:
+            lower = BUCKETS[i - 1] if i else 0.0
+            upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+            return lower + (upper - lower) * (target - cumulative) / count
+        cumulative += count
+    return BUCKETS[-1]
+
+
+def span_summary():
+    """One row per (page, span): calls, mean/p50/p95 wall time and CPU seconds."""
+    with _lock:
+        items = [(key, list(h.counts), h.sum, h.cpu) for key, h in _histograms.items()]
+    rows = [{
+        "page": page,
+        "span": name,
+        "calls": sum(counts),
+        "total_s": total,
+        "mean_ms": total * 1000 / sum(counts),
+        "p50_ms": _quantile(counts, 0.5) * 1000,
+        "p95_ms": _quantile(counts, 0.95) * 1000,
+        "cpu_s": cpu,
+    } for (page, name), counts, total, cpu in items]
+    columns = ["page", "span", "calls", "total_s", "mean_ms", "p50_ms", "p95_ms", "cpu_s"]
+    return pd.DataFrame(rows, columns=columns).sort_values(["page", "total_s"], ascending=[True, False],
+                                                           ignore_index=True)
+
+
+def reset_spans():
+    with _lock:
+        _histograms.clear()
+
+
+def _label(value):
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def prometheus_text():
+    with _lock:
+        items = sorted((key, list(h.counts), h.sum, h.cpu) for key, h in _histograms.items())
+
+    lines = [
+        "# HELP procurement_span_seconds Wall time of named spans in Streamlit page reruns.",
+        "# TYPE procurement_span_seconds histogram",
+    ]
+    for (page, name), counts, total, _ in items:
+        labels = f'page="{_label(page)}",span="{_label(name)}"'
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ("+Inf",), counts):
+            cumulative += count
+            lines.append(f'procurement_span_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"procurement_span_seconds_sum{{{labels}}} {total}")
+        lines.append(f"procurement_span_seconds_count{{{labels}}} {cumulative}")
+
+    lines += [
+        "# HELP procurement_span_cpu_seconds_total Thread CPU time spent in named spans.",
+        "# TYPE procurement_span_cpu_seconds_total counter",
+    ]
+    for (page, name), _, _, cpu in items:
+        lines.append(f'procurement_span_cpu_seconds_total{{page="{_label(page)}",span="{_label(name)}"}} {cpu}')
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path):
+    # Written to a temporary name first so a scraper never reads half a file
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    partial = f"{path}.tmp"
+    with open(partial, "w") as f:
+        f.write(prometheus_text())
+    os.replace(partial, path)
+
+
+def _export_file():
+    global _last_export
+    if not METRICS_FILE or time.monotonic() - _last_export < METRICS_INTERVAL:
+        return
+    _last_export = time.monotonic()
+    write_prometheus(METRICS_FILE)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _start_server():
+    # One endpoint per Streamlit process, bound to localhost only
+    global _server
+    if not METRICS_PORT or _server is not None:
+        return
+    with _lock:
+        if _server is not None:
+            return
+        try:
+            _server = ThreadingHTTPServer(("127.0.0.1", int(METRICS_PORT)), _MetricsHandler)
+        except OSError:
+            _server = False
+            return
+    threading.Thread(target=_server.serve_forever, name="procurement-metrics", daemon=True).start()
+
+
+def metrics_endpoint():
+    """URL of this process's metrics endpoint, or None when it is not running."""
+    if not _server:
+        return None
+    return f"http://127.0.0.1:{_server.server_address[1]}/metrics"
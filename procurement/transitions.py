@@ -0,0 +1,106 @@
+"""Append-only audit trail of assignment and bid approval status changes.
+
+Triggers on requisition_vendors and bid_approvals append a row to
+``status_transitions`` whenever a status is set, changed or removed. The
+row is written in the same transaction as the change, so the trail cannot
+drift from the data. The actor is the row's ``decided_by`` or
+``approved_by``. ``from_status`` is NULL for a new row and ``to_status``
+is NULL for a deleted one.
+"""
+from datetime import datetime
+
+import pandas as pd
+
+# entity table -> column naming who set the current status
+TRACKED_ENTITIES = {
+    "requisition_vendors": "decided_by",
+    "bid_approvals": "approved_by",
+}
+
+ENTITY_LABELS = {"requisition_vendors": "Assignment", "bid_approvals": "Bid approval"}
+
+_NOW = "strftime('%Y-%m-%d %H:%M:%S', 'now', 'localtime')"
+
+
+def init_status_transitions(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS status_transitions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            requisition_id INTEGER,
+            from_status TEXT,
+            to_status TEXT,
+            actor TEXT,
+            transitioned_at TEXT NOT NULL
+        )
+    """)
+    # "History of X" for one row or a whole requisition, and "everything in a time range"
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_status_transitions_entity ON status_transitions (entity, entity_id, id)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_status_transitions_requisition ON status_transitions (requisition_id, id)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_status_transitions_time ON status_transitions (transitioned_at)")
+
+    for table, actor in TRACKED_ENTITIES.items():
+        insert = f"""
+            INSERT INTO status_transitions
+                (entity, entity_id, requisition_id, from_status, to_status, actor, transitioned_at)
+        """
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS status_transitions_{table}_insert AFTER INSERT ON {table}
+            BEGIN
+                {insert} VALUES ('{table}', new.id, new.requisition_id, NULL, new.status, new.{actor}, {_NOW});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS status_transitions_{table}_update AFTER UPDATE OF status ON {table}
+            WHEN old.status IS NOT new.status
+            BEGIN
+                {insert} VALUES ('{table}', new.id, new.requisition_id, old.status, new.status, new.{actor}, {_NOW});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS status_transitions_{table}_delete AFTER DELETE ON {table}
+            BEGIN
+                {insert} VALUES ('{table}', old.id, old.requisition_id, old.status, NULL, NULL, {_NOW});
+            END
+        """)
+    conn.commit()
+
+
+def load_entity_transitions(conn, entity, entity_id):
+    return pd.read_sql_query("""
+        SELECT * FROM status_transitions
+        WHERE entity = ? AND entity_id = ?
+        ORDER BY id
+    """, conn, params=(entity, entity_id))
+
+
+def load_requisition_transitions(conn, requisition_id):
+    """Assignment and bid approval changes of one requisition, interleaved in the order they happened.
+
+    ``vendor_name`` is the assigned or bidding vendor; it is empty once the row was deleted.
+    """
+    return pd.read_sql_query("""
+        SELECT st.*, v.name as vendor_name
+        FROM status_transitions st
+        LEFT JOIN requisition_vendors rv ON st.entity = 'requisition_vendors' AND rv.id = st.entity_id
+        LEFT JOIN bid_approvals ba ON st.entity = 'bid_approvals' AND ba.id = st.entity_id
+        LEFT JOIN vendor_bids vb ON vb.id = ba.vendor_bid_id
+        LEFT JOIN vendors v ON v.id = COALESCE(rv.vendor_id, vb.vendor_id)
+        WHERE st.requisition_id = ?
+        ORDER BY st.id
+    """, conn, params=(requisition_id,))
+
+
+def load_transitions_between(conn, start, end, entity=None):
+    """Transitions with ``start <= transitioned_at < end``, oldest first; datetimes or timestamp strings."""
+    start, end = (value.strftime("%Y-%m-%d %H:%M:%S") if isinstance(value, datetime) else str(value)
+                  for value in (start, end))
+    entity_clause = "" if entity is None else " AND entity = ?"
+    return pd.read_sql_query(f"""
+        SELECT * FROM status_transitions
+        WHERE transitioned_at >= ? AND transitioned_at < ?{entity_clause}
+        ORDER BY transitioned_at, id
+    """, conn, params=(start, end) if entity is None else (start, end, entity))
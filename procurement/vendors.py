@@ -0,0 +1,183 @@
+"""Vendor master data, including bulk import and export as CSV or Parquet.
+
+Vendors are identified by email (trimmed and lower-cased) when importing, so
+re-importing a catalog updates it in place instead of duplicating it.
+"""
+import os
+
+import pandas as pd
+
+from procurement.db import load_frame
+
+VENDOR_COLUMNS = ["name", "email", "description"]
+FILE_FORMATS = ("csv", "parquet")
+
+
+def init_vendors(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS vendors (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            email TEXT,
+            description TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_vendors_email ON vendors (email)")
+    # Grid pages are read in name order
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_vendors_name ON vendors (name, id)")
+    conn.commit()
+
+
+def add_vendor(conn, name, email, description, commit=True):
+    conn.execute("INSERT INTO vendors (name, email, description) VALUES (?, ?, ?)", (name, email, description))
+    if commit:
+        conn.commit()
+
+
+def get_vendors(conn):
+    return conn.execute("SELECT * FROM vendors").fetchall()
+
+
+def load_vendors(conn, columns=("id", "name", "email")):
+    # Pass ("id", *VENDOR_COLUMNS) where the descriptions are needed, e.g. for LLM matching
+    return load_frame(conn, f"SELECT {', '.join(columns)} FROM vendors ORDER BY name")
+
+
+def _search_clause(search):
+    # Case-insensitive substring match on name, email and description; % and _ in the search are literal
+    if not search:
+        return "", ()
+    pattern = "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return (" WHERE name LIKE ? ESCAPE '\\' OR email LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\'",
+            (pattern, pattern, pattern))
+
+
+def count_vendors(conn, search=None):
+    where, params = _search_clause(search)
+    return conn.execute(f"SELECT COUNT(*) FROM vendors{where}", params).fetchone()[0]
+
+
+def load_vendor_page(conn, page, page_size, search=None):
+    # Only the rows on screen are read; `page` counts from 1
+    where, params = _search_clause(search)
+    return pd.read_sql_query(f"""
+        SELECT id, name, email, description
+        FROM vendors{where}
+        ORDER BY name, id
+        LIMIT ? OFFSET ?
+    """, conn, params=(*params, page_size, (page - 1) * page_size))
+
+
+def diff_vendor_page(original, edited):
+    """Inserts, updates and deletes that turn one loaded page into its edited version.
+
+    Rows without an id are new. Rows of ``original`` missing from ``edited``
+    were deleted. Other rows count as updates only if a field changed.
+    """
+    before = original.set_index("id")[VENDOR_COLUMNS].fillna("")
+    kept = edited[edited["id"].notna()].astype({"id": int}).set_index("id")[VENDOR_COLUMNS].fillna("")
+    added = edited[edited["id"].isna()][VENDOR_COLUMNS].fillna("")
+
+    common = before.index.intersection(kept.index)
+    changed = (before.loc[common] != kept.loc[common]).any(axis=1)
+    updated = kept.loc[common[changed.to_numpy()]]
+    return {
+        "inserts": [tuple(str(v).strip() for v in row) for row in added.itertuples(index=False, name=None)],
+        "updates": [(*(str(v).strip() for v in row[1:]), int(row[0])) for row in updated.itertuples(name=None)],
+        "deletes": [(int(vendor_id),) for vendor_id in before.index.difference(kept.index)],
+    }
+
+
+def save_vendor_changes(conn, changes):
+    """Applies a diff_vendor_page result in one transaction; returns the count of each kind."""
+    with conn:
+        conn.executemany("INSERT INTO vendors (name, email, description) VALUES (?, ?, ?)", changes["inserts"])
+        conn.executemany("UPDATE vendors SET name = ?, email = ?, description = ? WHERE id = ?", changes["updates"])
+        conn.executemany("DELETE FROM vendors WHERE id = ?", changes["deletes"])
+    return {kind: len(rows) for kind, rows in changes.items()}
+
+
+def update_vendor(conn, vendor_id, name, email, description):
+    conn.execute("UPDATE vendors SET name = ?, email = ?, description = ? WHERE id = ?",
+                 (name, email, description, vendor_id))
+    conn.commit()
+
+
+def delete_vendor(conn, vendor_id):
+    conn.execute("DELETE FROM vendors WHERE id = ?", (vendor_id,))
+    conn.commit()
+
+
+def _file_format(target, fmt=None):
+    # Taken from the file name unless given
+    name = target if isinstance(target, str) else getattr(target, "name", None) or ""
+    fmt = (fmt or os.path.splitext(name)[1].lstrip(".")).lower()
+    if fmt not in FILE_FORMATS:
+        raise ValueError(f"Unsupported vendor file format '{fmt}'; use {' or '.join(FILE_FORMATS)}")
+    return fmt
+
+
+def read_vendor_file(source, fmt=None):
+    # `source` is a path or a file-like object with a name, such as a Streamlit upload
+    fmt = _file_format(source, fmt)
+    if fmt == "parquet":
+        vendors = pd.read_parquet(source)
+    else:
+        vendors = pd.read_csv(source, dtype=str, keep_default_na=False)
+
+    missing = {"name", "email"} - set(vendors.columns)
+    if missing:
+        raise ValueError(f"Vendor file is missing columns: {', '.join(sorted(missing))}")
+    if "description" not in vendors.columns:
+        vendors["description"] = ""
+    return vendors[VENDOR_COLUMNS]
+
+
+def import_vendors(conn, vendors, update_existing=True, dry_run=False):
+    """Inserts new vendors and updates known ones in one transaction; returns the counts.
+
+    Rows are matched on email. Within the file the last row for an email
+    wins. Rows without a name or email, earlier duplicates, unchanged
+    vendors and, with ``update_existing=False``, every known vendor are
+    counted as skipped.
+    """
+    vendors = vendors.fillna("").astype(str).apply(lambda column: column.str.strip())
+    vendors["email"] = vendors["email"].str.lower()
+    valid = vendors[(vendors["name"] != "") & (vendors["email"] != "")]
+    valid = valid.drop_duplicates("email", keep="last")
+
+    # One pass over the table; the first vendor on file for an email is the one updated
+    existing = {}
+    for vendor_id, name, email, description in conn.execute(
+            "SELECT id, name, LOWER(TRIM(email)), description FROM vendors ORDER BY id"):
+        existing.setdefault(email, (vendor_id, name, description or ""))
+
+    inserts, updates = [], []
+    for name, email, description in valid.itertuples(index=False, name=None):
+        known = existing.get(email)
+        if known is None:
+            inserts.append((name, email, description))
+        elif update_existing and (name, description) != known[1:]:
+            updates.append((name, description, known[0]))
+
+    if not dry_run:
+        with conn:
+            conn.executemany("INSERT INTO vendors (name, email, description) VALUES (?, ?, ?)", inserts)
+            conn.executemany("UPDATE vendors SET name = ?, description = ? WHERE id = ?", updates)
+
+    return {
+        "inserted": len(inserts),
+        "updated": len(updates),
+        "skipped": len(vendors) - len(inserts) - len(updates),
+    }
+
+
+def export_vendors(conn, destination, fmt=None):
+    # `destination` is a path, or a binary buffer when `fmt` is given
+    fmt = _file_format(destination, fmt)
+    vendors = pd.read_sql_query("SELECT id, name, email, description FROM vendors ORDER BY id", conn)
+    if fmt == "parquet":
+        vendors.to_parquet(destination, index=False)
+    else:
+        vendors.to_csv(destination, index=False)
+    return len(vendors)